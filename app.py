@@ -1,26 +1,52 @@
 import os
 import logging
-from flask import Flask, request, render_template, redirect, url_for, flash, session, send_file
+from config import Config
+from utils import metrics, startup_profile
+
+# Time every import below when profiling startup (STARTUP_PROFILE=1 or =path.json)
+if Config.STARTUP_PROFILE:
+    startup_profile.enable()
+
+from flask import Flask, request, render_template, redirect, url_for, flash, session, send_file, jsonify
 from flask_babel import Babel
 from werkzeug.utils import secure_filename
 from werkzeug.middleware.proxy_fix import ProxyFix
-import tempfile
+import io
+import hashlib
+import time
+from functools import wraps
+from typing import List, NamedTuple, Tuple
 from urllib.parse import urlparse
 
-from services.ocr_service import OCRService
-from services.ai_service import AIService
-from services.vector_service import VectorService
-from services.pdf_service_unicode import PDFService
-from utils.file_utils import allowed_file, save_uploaded_file
-from config import Config
+from services.report_cache import ReportCache
+from services.analysis_store import get_analysis_store
+from services.kv_store import get_kv_store
+from utils.admission import ADMITTED_ENVIRON_KEY, PRIORITIES, AdmissionController, AdmissionRejected
+from utils.assets import AssetManifest
+from utils.file_utils import allowed_file, get_upload_hash, UploadRejected, UploadRequest
+from utils.i18n import FragmentCache, get_locale, get_translator, gettext
+from utils.janitor import Janitor
+from utils.kv_session import KVSessionInterface
+from utils.lazy_service import LazyService
+from utils.profiling import ProfileStore, ProfilingMiddleware, check_secret, is_profiling
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; records carry the trace id of the request they belong to
+metrics.install_log_trace_ids()
+logging.basicConfig(level=Config.LOG_LEVEL, format='%(levelname)s:%(name)s:%(trace_id)s:%(message)s')
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config.from_object(Config)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# Forwarded headers trusted from the one reverse proxy in front of the app
+PROXY_FIX = dict(x_for=1, x_proto=1, x_host=1)
+app.wsgi_app = ProxyFix(app.wsgi_app, **PROXY_FIX)
+profiles = ProfileStore()
+if Config.PROFILE_SECRET:
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, profiles)
+metrics.init_app(app)
+fragments = FragmentCache(app)
+assets = AssetManifest(app)
 
 def is_safe_url(target):
     """Check if a URL is safe to redirect to (same host)"""
@@ -36,116 +62,126 @@ def is_safe_url(target):
     except Exception:
         return False
 
-# Locale selector function
-def get_locale():
-    # Check if user has set a language preference
-    if 'language' in session:
-        return session['language']
-    # Otherwise try to guess the language from the user accept header
-    return request.accept_languages.best_match(['ru', 'en'], default='en')
-
-# Simple translation function fallback
-def simple_gettext(text):
-    """Simple fallback translation function"""
-    # Russian translations map
-    ru_translations = {
-        'AI Material Selection': 'ИИ подбор материалов',
-        'Material Selection Analysis': 'Анализ выбора материалов',
-        'About': 'О системе',
-        'AI-powered material selection system for engineering applications': 'Система подбора материалов на основе ИИ для инженерных приложений',
-        'Material Analysis System': 'Система анализа материалов',
-        'Upload technical drawings or provide descriptions for AI-powered material recommendations': 'Загрузите технические чертежи или предоставьте описания для рекомендаций материалов на основе ИИ',
-        'Input Data': 'Входные данные',
-        'Technical Description': 'Техническое описание',
-        'Describe the component, its purpose, operating conditions, and requirements...': 'Опишите компонент, его назначение, условия эксплуатации и требования...',
-        'Provide detailed information about the component including dimensions, operating temperature, loads, environment, etc.': 'Предоставьте подробную информацию о компоненте, включая размеры, рабочую температуру, нагрузки, окружающую среду и т.д.',
-        'Technical Drawing': 'Технический чертеж',
-        'Upload PNG or JPEG images. OCR will extract text from technical drawings.': 'Загрузите изображения PNG или JPEG. OCR извлечет текст из технических чертежей.',
-        'Note:': 'Примечание:',
-        'You can provide either a text description, upload a drawing, or both. The system will analyze all available information to provide comprehensive material recommendations.': 'Вы можете предоставить текстовое описание, загрузить чертеж или и то, и другое. Система проанализирует всю доступную информацию для предоставления комплексных рекомендаций по материалам.',
-        'Analyze Materials': 'Анализировать материалы',
-        'OCR Processing': 'OCR обработка',
-        'Extract text from technical drawings using advanced OCR technology': 'Извлечение текста из технических чертежей с использованием передовой технологии OCR',
-        'AI Analysis': 'ИИ анализ',
-        'Powered by Google Gemini for intelligent material recommendations': 'На основе Google Gemini для интеллектуальных рекомендаций материалов',
-        'PDF Reports': 'PDF отчеты',
-        'Generate professional PDF reports with detailed analysis': 'Создание профессиональных PDF отчетов с подробным анализом',
-        'Analysis Report Sections': 'Разделы аналитического отчета',
-        'Product Purpose Assessment': 'Оценка назначения продукта',
-        'Material Selection & Justification': 'Выбор материала и обоснование',
-        'Manufacturing Technology': 'Технология производства',
-        'Structural Characteristics': 'Структурные характеристики',
-        'Defect Analysis & Prevention': 'Анализ дефектов и предотвращение',
-        'Testing Methods & Standards': 'Методы испытаний и стандарты',
-        'Please provide either a text description or upload a drawing.': 'Пожалуйста, предоставьте текстовое описание или загрузите чертеж.',
-        'Text successfully extracted from drawing.': 'Текст успешно извлечен из чертежа.',
-        'No text could be extracted from the drawing.': 'Из чертежа не удалось извлечь текст.',
-        'Invalid file format. Please upload PNG or JPEG files only.': 'Неверный формат файла. Пожалуйста, загружайте только файлы PNG или JPEG.',
-        'No text available for analysis.': 'Нет текста для анализа.',
-        'Failed to generate material analysis. Please try again.': 'Не удалось сгенерировать анализ материала. Пожалуйста, попробуйте еще раз.',
-        'No analysis available for PDF generation.': 'Нет анализа для создания PDF.',
-        'File size must be less than 16MB': 'Размер файла должен быть менее 16МБ',
-        'Please upload PNG or JPEG files only': 'Пожалуйста, загружайте только файлы PNG или JPEG',
-        'Please provide either a text description or upload a drawing': 'Пожалуйста, предоставьте текстовое описание или загрузите чертеж',
-        'Processing...': 'Обработка...',
-        'Page Not Found': 'Страница не найдена',
-        'The page you are looking for does not exist.': 'Страница, которую вы ищете, не существует.',
-        'Return to Home': 'Вернуться на главную',
-        'Internal Server Error': 'Внутренняя ошибка сервера',
-        'Something went wrong on our end. Please try again later.': 'Что-то пошло не так с нашей стороны. Пожалуйста, попробуйте позже.',
-        
-        # Analysis section titles
-        'Material Analysis Results': 'Результаты анализа материалов',
-        'Analysis Results': 'Результаты анализа',
-        'Input Data Summary': 'Сводка входных данных',
-        'Download PDF': 'Скачать PDF',
-        'New Analysis': 'Новый анализ',
-        '1. Product Purpose and Operating Conditions Assessment': '1. Оценка назначения изделия и условий эксплуатации',
-        '2. Material Selection and Justification': '2. Выбор и обоснование материала',
-        '3. Manufacturing Technology and Processing': '3. Технология изготовления и обработки',
-        '4. Material Structure Characteristics': '4. Структурные характеристики материала',
-        '5. Defect Analysis and Prevention': '5. Анализ дефектов и предотвращение',
-        '6. Material Properties Testing Methods': '6. Методы испытаний свойств материала',
-        
-        # Subsection titles
-        'Purpose': 'Назначение',
-        'Operating Conditions': 'Условия эксплуатации',
-        'Critical Requirements': 'Критические требования',
-        'Recommended Materials': 'Рекомендуемые материалы',
-        'Primary Choice': 'Основной выбор',
-        'Justification': 'Обоснование',
-        'GOST Standards': 'Стандарты ГОСТ',
-        'Processing Methods': 'Методы обработки',
-        'Heat Treatment': 'Термическая обработка',
-        'Surface Treatment': 'Обработка поверхности',
-        'Microstructure': 'Микроструктура',
-        'Mechanical Properties': 'Механические свойства',
-        'Common Defects': 'Типичные дефекты',
-        'Prevention Methods': 'Методы предотвращения',
-        'Mechanical Tests': 'Механические испытания',
-        'Testing Standards': 'Стандарты испытаний',
-        'No analysis results available.': 'Результаты анализа недоступны.',
-        'Download PDF Report': 'Скачать PDF отчет'
-    }
-    
-    current_locale = get_locale()
-    if current_locale == 'ru' and text in ru_translations:
-        return ru_translations[text]
-    return text
-
 # Make functions available to templates
 @app.context_processor
 def inject_template_vars():
     return {
-        '_': simple_gettext,
-        'get_locale': get_locale
+        '_': get_translator(),
+        'get_locale': get_locale,
+        'fragment': fragments.render
     }
 
 # Initialize services
-ocr_service = OCRService()
-ai_service = AIService()
-vector_service = VectorService()
-pdf_service = PDFService()
+# Shared KV tier (Redis, or a local SQLite file) seen by every worker
+kv_store = get_kv_store()
+shared_cache = kv_store if Config.SHARED_CACHE_ENABLED else None
+if Config.SESSION_BACKEND == 'kv':
+    app.session_interface = KVSessionInterface(kv_store)
+
+# Services are built on first use: numpy, faiss and reportlab are only imported
+# by the requests that need them. warm_up() builds them all ahead of time.
+def _create_ocr_service():
+    from services.ocr_service import OCRService
+    return OCRService(shared_cache=shared_cache)
+
+def _create_ai_service():
+    from services.ai_service import AIService
+    return AIService(cache=shared_cache)
+
+def _create_vector_service():
+    from services.vector_service import VectorService
+    return VectorService()
+
+def _create_pdf_service():
+    from services.pdf_service_unicode import PDFService
+    return PDFService()
+
+ocr_service = LazyService('ocr', _create_ocr_service)
+ai_service = LazyService('ai', _create_ai_service)
+vector_service = LazyService('vector', _create_vector_service)
+pdf_service = LazyService('pdf', _create_pdf_service)
+report_cache = ReportCache(pdf_service, shared=shared_cache)
+analysis_store = get_analysis_store(kv=kv_store)
+
+# Sweep stale uploads and analysis files in the background
+janitor = Janitor()
+
+# Bounded queues in front of the expensive endpoints. asgi.py replaces the
+# 'analyze' controller with a wider one, as its analyses do not hold a thread.
+admission = {}
+if Config.ADMISSION_ENABLED:
+    admission['analyze'] = AdmissionController(
+        'analyze', Config.ANALYZE_MAX_ACTIVE, Config.ANALYZE_MAX_QUEUE, Config.ANALYZE_MAX_WAIT,
+        Config.ANALYZE_RATE_PER_MINUTE, Config.ANALYZE_BURST, store=kv_store
+    )
+    admission['download_pdf'] = AdmissionController(
+        'download_pdf', Config.PDF_MAX_ACTIVE, Config.PDF_MAX_QUEUE, Config.PDF_MAX_WAIT,
+        Config.PDF_RATE_PER_MINUTE, Config.PDF_BURST, store=kv_store
+    )
+
+def request_priority():
+    """Queue priority of the current request; batch clients send X-Request-Priority: batch"""
+    return PRIORITIES.get(request.headers.get('X-Request-Priority', '').lower(), PRIORITIES['interactive'])
+
+def busy_response(rejection):
+    """429/503 response with Retry-After for a request that was not admitted"""
+    headers = {'Retry-After': str(rejection.retry_after)}
+    if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+        return jsonify({'error': rejection.reason, 'retry_after': rejection.retry_after}), rejection.status, headers
+    return render_template('busy.html', status=rejection.status, retry_after=rejection.retry_after), rejection.status, headers
+
+def admission_required(name):
+    """Run the view only once the named admission controller admits the request"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = admission.get(name)
+            if controller is None or request.environ.get(ADMITTED_ENVIRON_KEY):
+                return view(*args, **kwargs)
+            queued_at = time.perf_counter()
+            try:
+                with controller.admit(request.remote_addr, request_priority(), request.args.get('ticket')):
+                    metrics.add_span('queue_wait', time.perf_counter() - queued_at)
+                    return view(*args, **kwargs)
+            except AdmissionRejected as e:
+                return busy_response(e)
+        return wrapper
+    return decorator
+
+def warm_up():
+    """
+    Construct every service now instead of on first use
+    
+    Called from gunicorn's master before it forks (gunicorn.conf.py), so the
+    workers share the loaded modules, fonts and materials database
+    copy-on-write.
+    """
+    for service in (ocr_service, ai_service, vector_service, pdf_service):
+        service.get()
+    startup_profile.mark('services warmed up')
+    startup_profile.report(_startup_profile_path())
+
+def after_fork():
+    """
+    Drop database and Redis connections inherited from gunicorn's master
+    
+    Called in every worker right after the fork (gunicorn.conf.py), so
+    workers open their own connections instead of sharing the master's.
+    """
+    kv_store.after_fork()
+    if hasattr(analysis_store, 'after_fork'):
+        analysis_store.after_fork()
+
+def _startup_profile_path():
+    return Config.STARTUP_PROFILE if Config.STARTUP_PROFILE.endswith('.json') else None
+
+@app.before_request
+def start_background_tasks():
+    # Threads do not survive a fork, so start them in the serving process
+    if Config.JANITOR_ENABLED:
+        janitor.start()
+    if Config.METRICS_ENABLED:
+        metrics.registry.start_flushing(Config.METRICS_DIR, Config.METRICS_FLUSH_INTERVAL)
 
 @app.route('/')
 def index():
@@ -160,149 +196,197 @@ def set_language(language=None):
         return redirect(next_url)
     return redirect(url_for('index'))
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    try:
-        # Get form data
-        description = request.form.get('description', '')
-        uploaded_file = request.files.get('drawing')
-        
-        if not description and not uploaded_file:
-            flash(simple_gettext('Please provide either a text description or upload a drawing.'), 'error')
+class PreparedAnalysis(NamedTuple):
+    """Input of an analysis, ready for the LLM call"""
+    combined_text: str
+    ocr_text: str
+    language: str
+    messages: List[Tuple[str, str]]  # (message, category) to flash with the result
+
+def prepare_analysis():
+    """
+    Read the analysis form and OCR the uploaded drawing
+    
+    Shared by the Flask route and the async path in asgi.py, which runs it in
+    an executor. Must be called in a request context.
+    
+    Returns:
+        PreparedAnalysis, or a redirect response when there is nothing to analyze
+    """
+    # Get form data
+    with metrics.span('upload'):
+        try:
+            description = request.form.get('description', '')
+            uploaded_file = request.files.get('drawing')
+        except UploadRejected as e:
+            # Refused while the body was still arriving; the rest is not read
+            logging.info(f"Upload rejected: {e.description}")
+            flash(e.message(), 'error')
             return redirect(url_for('index'))
-        
-        # Process uploaded file if provided
-        ocr_text = ""
-        if uploaded_file and uploaded_file.filename and allowed_file(uploaded_file.filename):
-            try:
-                # Save uploaded file
-                file_path = save_uploaded_file(uploaded_file)
-                
-                # Extract text using OCR
-                ocr_text = ocr_service.extract_text(file_path)
-                
-                # Clean up uploaded file
-                os.remove(file_path)
+    
+    if not description and not uploaded_file:
+        flash(gettext('Please provide either a text description or upload a drawing.'), 'error')
+        return redirect(url_for('index'))
+    
+    # Process uploaded file if provided
+    ocr_text = ""
+    messages = []
+    if uploaded_file and uploaded_file.filename and allowed_file(uploaded_file.filename):
+        try:
+            # The upload is already buffered in memory (spooled to an anonymous
+            # temp file only when large) and hashed as it was received
+            with metrics.span('ocr'):
+                ocr_text = ocr_service.extract_text(
+                    uploaded_file.stream,
+                    content_hash=get_upload_hash(uploaded_file)
+                )
+            
+            if ocr_text:
+                messages.append((gettext('Text successfully extracted from drawing.'), 'success'))
+            else:
+                messages.append((gettext('No text could be extracted from the drawing.'), 'warning'))
                 
-                if ocr_text:
-                    flash(simple_gettext('Text successfully extracted from drawing.'), 'success')
-                else:
-                    flash(simple_gettext('No text could be extracted from the drawing.'), 'warning')
-                    
-            except Exception as e:
-                logging.error(f"Error processing uploaded file: {str(e)}")
-                flash(f"Error processing uploaded file: {str(e)}", 'error')
-                return redirect(url_for('index'))
-        elif uploaded_file and uploaded_file.filename:
-            flash(simple_gettext('Invalid file format. Please upload PNG or JPEG files only.'), 'error')
-            return redirect(url_for('index'))
-        
-        # Combine description and OCR text
-        combined_text = f"{description}\n\n{ocr_text}".strip()
-        
-        if not combined_text:
-            flash(simple_gettext('No text available for analysis.'), 'error')
+        except Exception as e:
+            logging.error(f"Error processing uploaded file: {str(e)}")
+            flash(f"Error processing uploaded file: {str(e)}", 'error')
             return redirect(url_for('index'))
-        
-        # Generate AI analysis
-        current_language = get_locale()
-        analysis_result = ai_service.analyze_material_requirements(combined_text, current_language)
-        
-        if not analysis_result:
-            flash(simple_gettext('Failed to generate material analysis. Please try again.'), 'error')
-            return redirect(url_for('index'))
-        
-        # Store analysis data in temporary file due to Flask session size limits (4KB)
-        # Large analysis results exceed session capacity, so we use file-based storage
-        import json
-        import uuid
-        
-        analysis_id = str(uuid.uuid4())
-        temp_dir = os.path.join(os.getcwd(), 'temp_analysis')
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        analysis_file = os.path.join(temp_dir, f"{analysis_id}.json")
-        
-        # Save complete analysis data to JSON file with UTF-8 encoding
-        with open(analysis_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'input_text': combined_text,
-                'analysis': analysis_result,
-                'ocr_extracted': bool(ocr_text),
-                'language': get_locale()
-            }, f, ensure_ascii=False, indent=2)
-        
-        # Store only the unique analysis ID in session for later retrieval
-        session['analysis_id'] = analysis_id
-        
+    elif uploaded_file and uploaded_file.filename:
+        flash(gettext('Invalid file format. Please upload PNG, JPEG, TIFF or PDF files only.'), 'error')
+        return redirect(url_for('index'))
+    
+    # Combine description and OCR text
+    combined_text = f"{description}\n\n{ocr_text}".strip()
+    
+    if not combined_text:
+        flash(gettext('No text available for analysis.'), 'error')
+        return redirect(url_for('index'))
+    
+    return PreparedAnalysis(combined_text, ocr_text, get_locale(), messages)
+
+def finish_analysis(prepared, analysis_result):
+    """
+    Store an analysis result and render it
+    
+    Args:
+        prepared (PreparedAnalysis): Result of prepare_analysis()
+        analysis_result (dict): LLM analysis, or None if it failed
+    
+    Returns:
+        Response body or redirect
+    """
+    for message, category in prepared.messages:
+        flash(message, category)
+    
+    if not analysis_result:
+        flash(gettext('Failed to generate material analysis. Please try again.'), 'error')
+        return redirect(url_for('index'))
+    
+    # Store analysis data outside the session due to Flask session size limits (4KB)
+    # Large analysis results exceed session capacity, so only the id is kept there
+    import uuid
+    
+    analysis_id = str(uuid.uuid4())
+    analysis_data = {
+        'input_text': prepared.combined_text,
+        'analysis': analysis_result,
+        'ocr_extracted': bool(prepared.ocr_text),
+        'language': prepared.language
+    }
+    
+    user_id = session.setdefault('user_id', uuid.uuid4().hex)
+    content_hash = hashlib.sha256(f"{analysis_data['language']}:{prepared.combined_text}".encode('utf-8')).hexdigest()
+    with metrics.span('store'):
+        analysis_store.save(analysis_id, analysis_data, user_id=user_id, content_hash=content_hash)
+    
+    # Render the PDF report in the background while the user reads the results
+    report_cache.submit(analysis_id, analysis_data)
+    
+    # Store only the unique analysis ID (and report language) in session for later retrieval
+    session['analysis_id'] = analysis_id
+    session['analysis_language'] = analysis_data['language']
+    
+    with metrics.span('render'):
         return render_template('analysis.html', 
                              analysis=analysis_result,
-                             input_text=combined_text,
-                             ocr_extracted=bool(ocr_text),
+                             input_text=prepared.combined_text,
+                             ocr_extracted=bool(prepared.ocr_text),
                              current_language=get_locale())
+
+def analysis_error(error):
+    """Redirect back to the form after an unexpected analysis failure"""
+    logging.error(f"Error in analyze route: {str(error)}")
+    flash(f"An error occurred during analysis: {str(error)}", 'error')
+    return redirect(url_for('index'))
+
+@app.route('/analyze', methods=['POST'])
+@admission_required('analyze')
+def analyze():
+    try:
+        prepared = prepare_analysis()
+        if not isinstance(prepared, PreparedAnalysis):
+            return prepared
+        
+        # Generate AI analysis
+        analysis_result = ai_service.analyze_material_requirements(prepared.combined_text, prepared.language)
+        return finish_analysis(prepared, analysis_result)
         
     except Exception as e:
-        logging.error(f"Error in analyze route: {str(e)}")
-        flash(f"An error occurred during analysis: {str(e)}", 'error')
-        return redirect(url_for('index'))
+        return analysis_error(e)
 
 @app.route('/download_pdf')
+@admission_required('download_pdf')
 def download_pdf():
     try:
         # Check if analysis ID exists in session
         if 'analysis_id' not in session:
-            flash(simple_gettext('No analysis available for PDF generation.'), 'error')
+            flash(gettext('No analysis available for PDF generation.'), 'error')
             return redirect(url_for('index'))
         
         analysis_id = session['analysis_id']
-        temp_dir = os.path.join(os.getcwd(), 'temp_analysis')
-        analysis_file = os.path.join(temp_dir, f"{analysis_id}.json")
-        
-        # Load analysis data from file
-        if not os.path.exists(analysis_file):
-            flash(simple_gettext('No analysis available for PDF generation.'), 'error')
-            return redirect(url_for('index'))
         
-        import json
-        with open(analysis_file, 'r', encoding='utf-8') as f:
-            analysis_data = json.load(f)
+        # Serve the report pre-rendered at analysis time, waiting if it is still in flight.
+        # A profiled request builds it here instead, so the ReportLab build is in the profile.
+        profiled = is_profiling(request.environ)
+        pdf_bytes = None
+        if not profiled:
+            with metrics.span('report_wait'):
+                pdf_bytes = report_cache.get(analysis_id, session.get('analysis_language', get_locale()))
         
-        # Validate analysis data
-        if 'analysis' not in analysis_data or not analysis_data['analysis']:
-            flash(simple_gettext('No analysis available for PDF generation.'), 'error')
-            return redirect(url_for('index'))
-        
-        # Generate PDF using the stored language preference
-        stored_language = analysis_data.get('language', get_locale())
-        pdf_buffer = pdf_service.generate_report(
-            analysis_data['analysis'],
-            analysis_data.get('input_text', ''),
-            stored_language
-        )
-        
-        # Create temporary file for download
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_buffer.getvalue())
-            tmp_file_path = tmp_file.name
-        
-        def cleanup_files():
-            # Clean up temporary files
-            try:
-                os.unlink(tmp_file_path)
-                os.unlink(analysis_file)
-            except:
-                pass
+        if pdf_bytes is None:
+            # Load analysis data from the store (another instance may have produced it)
+            with metrics.span('store_load'):
+                analysis_data = analysis_store.load(analysis_id)
+            
+            # Validate analysis data
+            if not analysis_data or not analysis_data.get('analysis'):
+                flash(gettext('No analysis available for PDF generation.'), 'error')
+                return redirect(url_for('index'))
+            
+            # Generate PDF using the stored language preference
+            analysis_data.setdefault('language', get_locale())
+            if profiled:
+                with metrics.span('pdf_build'):
+                    pdf_bytes = pdf_service.generate_report(
+                        analysis_data['analysis'],
+                        analysis_data.get('input_text', ''),
+                        analysis_data['language']
+                    ).getvalue()
+            else:
+                with metrics.span('report_render'):
+                    pdf_bytes = report_cache.render(analysis_id, analysis_data)
         
+        # Stream straight from memory; send_file sets Content-Length and, being
+        # conditional, answers If-None-Match with 304 and Range with 206
         response = send_file(
-            tmp_file_path,
+            io.BytesIO(pdf_bytes),
             as_attachment=True,
             download_name=f"material_analysis_report_{get_locale()}.pdf",
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            conditional=True,
+            etag=hashlib.sha256(pdf_bytes).hexdigest()[:32],
+            max_age=0
         )
-        
-        # Schedule cleanup (files will be cleaned after response)
-        import atexit
-        atexit.register(cleanup_files)
+        response.cache_control.private = True
         
         return response
         
@@ -312,6 +396,80 @@ def download_pdf():
         referrer = request.referrer if is_safe_url(request.referrer) else None
         return redirect(referrer or url_for('index'))
 
+@app.route('/queue_status')
+def queue_status():
+    """Queue depth per endpoint, and the position of ?ticket= while it waits"""
+    ticket = request.args.get('ticket')
+    return jsonify({name: controller.status(ticket) for name, controller in admission.items()})
+
+def _collect_metrics():
+    """Janitor and admission queue state, read at scrape time"""
+    stats = janitor.metrics()
+    yield 'janitor_sweeps_total', 'counter', 'Janitor sweeps run by this process', [({}, stats['sweeps'])]
+    yield 'janitor_files_removed_total', 'counter', 'Files removed by the janitor', [({}, stats['files_removed'])]
+    yield 'janitor_reclaimed_bytes_total', 'counter', 'Bytes reclaimed by the janitor', [({}, stats['bytes_reclaimed'])]
+    yield 'janitor_directory_bytes', 'gauge', 'Bytes kept per swept directory after the last sweep', [
+        ({'directory': path}, entry['bytes']) for path, entry in stats['directories'].items()
+    ]
+    
+    queues = {name: controller.metrics() for name, controller in admission.items()}
+    yield 'admission_active', 'gauge', 'Requests holding an admission slot', [
+        ({'endpoint': name}, values['active']) for name, values in queues.items()
+    ]
+    yield 'admission_waiting', 'gauge', 'Requests waiting in the admission queue', [
+        ({'endpoint': name}, values['waiting']) for name, values in queues.items()
+    ]
+    yield 'admission_service_seconds', 'gauge', 'Moving average of admitted request duration', [
+        ({'endpoint': name}, values['service_time']) for name, values in queues.items()
+    ]
+    yield 'admission_admitted_total', 'counter', 'Requests admitted, at once or after queueing', [
+        ({'endpoint': name}, values['admitted']) for name, values in queues.items()
+    ]
+    yield 'admission_rejected_total', 'counter', 'Requests turned away (rate: 429, busy: 503, timeout: 503 after waiting)', [
+        ({'endpoint': name, 'reason': reason}, values[key])
+        for name, values in queues.items()
+        for reason, key in (('rate', 'rejected_rate'), ('busy', 'rejected_busy'), ('timeout', 'timed_out'))
+    ]
+
+metrics.registry.register_collector(_collect_metrics)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metrics of all worker processes, for scrapes that carry METRICS_SECRET"""
+    authorization = request.headers.get('Authorization', '')
+    token = authorization[7:] if authorization.startswith('Bearer ') else request.args.get('token')
+    if not Config.METRICS_ENABLED or not metrics.check_token(token, Config.METRICS_SECRET):
+        return not_found_error(None)
+    return app.response_class(metrics.registry.expose(Config.METRICS_DIR), mimetype='text/plain; version=0.0.4')
+
+def profile_access():
+    """Whether the request may see stored profiles; the secret once per session is enough"""
+    if check_secret(request.headers.get('X-Profile') or request.args.get('__profile')):
+        session['profile_access'] = True
+    return bool(Config.PROFILE_SECRET) and session.get('profile_access', False)
+
+@app.route('/profiles')
+def profile_index():
+    """Recent request profiles of this instance"""
+    if not profile_access():
+        return not_found_error(None)
+    return render_template('profiles.html', profiles=profiles.list())
+
+@app.route('/profiles/<name>')
+def profile_download(name):
+    """Download one profile (.pstats for pstats/snakeviz, .speedscope.json for speedscope.app)"""
+    path = profiles.path(name) if profile_access() else None
+    if path is None:
+        return not_found_error(None)
+    return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream', max_age=0)
+
+@app.route('/janitor_status')
+def janitor_status():
+    """Sweep counters of the background janitor in this process, behind the profile secret as they name server paths"""
+    if not profile_access():
+        return not_found_error(None)
+    return jsonify(janitor.metrics())
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
@@ -321,6 +479,9 @@ def internal_error(error):
     logging.error(f"Internal server error: {str(error)}")
     return render_template('500.html'), 500
 
+startup_profile.mark('app imported')
+startup_profile.report(_startup_profile_path())
+
 if __name__ == '__main__':
     # Ensure upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -0,0 +1,348 @@
+"""
+ASGI entry point with an asyncio-native analyze pipeline
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+POST /analyze is run as three steps: form parsing and OCR in a thread pool,
+the LLM request on the event loop through a pooled keep-alive httpx client,
+and storing and rendering the result in the thread pool again. A worker only
+holds a thread while OCR or template rendering runs, so it can keep hundreds
+of analyses waiting on the LLM at once. Every other route, /download_pdf
+included, is the unchanged Flask view run in the thread pool.
+
+Admission control for /analyze and /download_pdf (utils/admission.py) waits
+for a slot on the event loop too, so queued requests hold no thread.
+
+The WSGI entry point (main:app) keeps working as before.
+"""
+import asyncio
+import io
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import app as flask_module
+from app import PROXY_FIX, PreparedAnalysis, analysis_error, busy_response, finish_analysis, prepare_analysis
+from config import Config
+from utils import metrics
+from utils.admission import ADMITTED_ENVIRON_KEY, PRIORITIES, AdmissionController, AdmissionRejected
+from utils.cassette import async_transport
+from utils.metrics import TRACE_ENVIRON_KEY
+
+try:
+    import httpx
+except ImportError:  # without httpx the LLM request runs in the thread pool
+    httpx = None
+
+
+class ReceiveStream(io.RawIOBase):
+    """
+    wsgi.input that pulls the request body from the ASGI receive channel
+
+    The view reads it from an executor thread, and each read waits for the
+    next http.request message on the event loop. The body is therefore only
+    received as fast as the form parser consumes it, so an upload rejected
+    while streaming in (UploadRejected) is never received in full.
+    """
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._pending = b''
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._pending and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                raise OSError("Client disconnected while sending the request body")
+            self._pending = message.get('body', b'')
+            self._done = not message.get('more_body', False)
+
+        size = min(len(b), len(self._pending))
+        b[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def build_environ(scope, body=None):
+    """
+    WSGI environ for an ASGI HTTP request
+
+    Args:
+        scope (dict): ASGI connection scope
+        body (ReceiveStream): Request body, or None for a step of the
+            analyze pipeline after the body was read
+
+    Returns:
+        dict: WSGI environ
+    """
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body if body is not None else io.BytesIO(),
+        # Werkzeug then caps the stream at MAX_CONTENT_LENGTH itself
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        ADMITTED_ENVIRON_KEY: scope.get(ADMITTED_ENVIRON_KEY, False),
+        TRACE_ENVIRON_KEY: scope.get(TRACE_ENVIRON_KEY),
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value if body is not None else '0'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+# ProxyFix around an app that hands back the environ it is called with, to
+# resolve forwarded headers without going through app.wsgi_app
+_proxy_fix = ProxyFix(lambda environ, start_response: environ, **PROXY_FIX)
+
+
+def resolve_forwarded(environ):
+    """
+    Apply the app's forwarded-header handling to an environ
+
+    The analyze steps enter a request context directly instead of going
+    through app.wsgi_app and its ProxyFix, so they get it applied here.
+
+    Args:
+        environ (dict): WSGI environ from build_environ
+
+    Returns:
+        dict: The same environ, with the client address, scheme and host
+        taken from the X-Forwarded-* headers
+    """
+    return _proxy_fix(environ, None)
+
+
+class AsyncApp:
+    """ASGI application wrapping the Flask app"""
+
+    def __init__(self, flask_app, max_workers=None):
+        self.logger = logging.getLogger(__name__)
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.ASYNC_EXECUTOR_WORKERS,
+            thread_name_prefix='asgi'
+        )
+        self.client = None
+        self.in_flight = 0
+        metrics.registry.register_collector(self._collect_metrics)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if Config.METRICS_ENABLED:
+            # The async /analyze path never runs Flask's before_request
+            metrics.registry.start_flushing(Config.METRICS_DIR, Config.METRICS_FLUSH_INTERVAL)
+
+        trace = token = None
+        if scope['method'] == 'POST' and scope['path'] == '/analyze':
+            # The analyze steps run in three request contexts that share this trace
+            headers = dict(scope.get('headers', []))
+            incoming = headers.get(b'x-request-id') or headers.get(b'traceparent') or b''
+            trace, token = metrics.start_trace('analyze', metrics.incoming_trace_id(incoming.decode('latin-1')))
+            scope[TRACE_ENVIRON_KEY] = trace
+
+        response = None
+        try:
+            # Read by the view as it parses the form, not buffered up front
+            body = ReceiveStream(receive, asyncio.get_running_loop())
+            self.in_flight += 1
+            try:
+                controller = self._admission_controller(scope)
+                if controller is None:
+                    response = await self._dispatch(scope, body)
+                else:
+                    response = await self._admitted(controller, scope, body)
+            finally:
+                self.in_flight -= 1
+
+            await self._send(send, response)
+        finally:
+            if trace is not None:
+                metrics.observe_request(trace, scope['method'], response[0] if response else 500)
+                metrics.end_trace(token)
+
+    async def _dispatch(self, scope, body):
+        if scope['method'] == 'POST' and scope['path'] == '/analyze':
+            return await self._analyze(scope, body)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call_wsgi, build_environ(scope, body))
+
+    @staticmethod
+    def _admission_controller(scope):
+        if scope['path'] == '/analyze' and scope['method'] == 'POST':
+            return flask_module.admission.get('analyze')
+        if scope['path'] == '/download_pdf':
+            return flask_module.admission.get('download_pdf')
+        return None
+
+    async def _admitted(self, controller, scope, body):
+        """Dispatch once admitted; waiting for a slot happens on the event loop, not in a thread"""
+        headers = dict(scope.get('headers', []))
+        priority = PRIORITIES.get(headers.get(b'x-request-priority', b'').decode('latin-1').lower(),
+                                  PRIORITIES['interactive'])
+        ticket = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('ticket', [None])[0]
+        # Keyed like the WSGI path, on the client address behind the proxy
+        client = resolve_forwarded(build_environ(scope)).get('REMOTE_ADDR')
+
+        queued_at = time.perf_counter()
+        try:
+            async with controller.admit_async(client, priority, ticket):
+                metrics.add_span('queue_wait', time.perf_counter() - queued_at)
+                scope[ADMITTED_ENVIRON_KEY] = True
+                return await self._dispatch(scope, body)
+        except AdmissionRejected as e:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._in_request, build_environ(scope), busy_response, e)
+
+    async def _analyze(self, scope, body):
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(
+            self.executor, self._in_request, build_environ(scope, body), prepare_analysis
+        )
+        if not isinstance(prepared, PreparedAnalysis):
+            return prepared
+
+        ai_service = flask_module.ai_service
+        try:
+            client = self._get_client()
+            if client is not None:
+                analysis_result = await ai_service.analyze_material_requirements_async(
+                    prepared.combined_text, prepared.language, client=client
+                )
+            else:
+                analysis_result = await loop.run_in_executor(
+                    self.executor, ai_service.analyze_material_requirements, prepared.combined_text, prepared.language
+                )
+        except Exception as e:
+            self.logger.error(f"Error in async AI analysis: {str(e)}")
+            analysis_result = None
+
+        return await loop.run_in_executor(
+            self.executor, self._in_request, build_environ(scope), finish_analysis, prepared, analysis_result
+        )
+
+    def _in_request(self, environ, view, *args):
+        """
+        Run a step of the analyze pipeline in a Flask request context
+
+        Returns:
+            PreparedAnalysis to continue with, or a collected response
+        """
+        app = self.flask_app
+        with app.request_context(resolve_forwarded(environ)):
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = view(*args)
+                    if isinstance(rv, PreparedAnalysis):
+                        return rv
+            except HTTPException as e:
+                # A body over MAX_CONTENT_LENGTH or a client gone mid-body,
+                # answered the way Flask answers them on the WSGI path
+                rv = app.handle_user_exception(e)
+            except Exception as e:
+                rv = analysis_error(e)
+
+            response = app.process_response(app.make_response(rv))
+            return response.status_code, response.headers.to_wsgi_list(), b''.join(response.iter_encoded())
+
+    def _call_wsgi(self, environ):
+        """Run the Flask app for one request and collect its response"""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        result = self.flask_app.wsgi_app(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], body
+
+    @staticmethod
+    async def _send(send, response):
+        status, headers, body = response
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _collect_metrics(self):
+        yield 'asgi_in_flight', 'gauge', 'Requests being handled by this ASGI worker', [({}, self.in_flight)]
+
+    def _get_client(self):
+        # Created on first use when the server does not send lifespan events
+        if self.client is None and httpx is not None:
+            self.client = httpx.AsyncClient(
+                transport=async_transport(limits=httpx.Limits(
+                    max_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.ASYNC_HTTP_MAX_KEEPALIVE
+                )),
+                timeout=60
+            )
+        return self.client
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._get_client()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.client is not None:
+                    await self.client.aclose()
+                    self.client = None
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+# Analyses here wait on the event loop rather than in a thread, so many more
+# of them can run at once than under the WSGI server
+if 'analyze' in flask_module.admission:
+    flask_module.admission['analyze'] = AdmissionController(
+        'analyze', Config.ASYNC_ANALYZE_MAX_ACTIVE, Config.ANALYZE_MAX_QUEUE, Config.ANALYZE_MAX_WAIT,
+        Config.ANALYZE_RATE_PER_MINUTE, Config.ANALYZE_BURST, store=flask_module.kv_store
+    )
+
+app = AsyncApp(flask_module.app)
@@ -0,0 +1,274 @@
+"""
+End-to-end benchmark: /analyze and /download_pdf against local API stubs
+
+Starts the OpenRouter and AiTunnel stubs (stub_upstreams.py) and the app
+under gunicorn (main:app, or asgi:app under uvicorn workers) with fresh
+stores in a temp directory, then runs each concurrency level for a fixed
+time. Every virtual user keeps its own session and loops: analyze a unique
+description (plus a sample drawing with --drawing), download the report.
+Reports throughput, p50/p95/p99 latency per endpoint and the RSS of every
+worker process, and writes all of it to a JSON file for comparing commits.
+
+Admission rate limits and the LLM response cache are switched off in the
+app under test, since every request comes from one address and would
+otherwise be rate limited or cached.
+
+Usage:
+    python benchmarks/bench_e2e.py [--concurrency 1,2,4,8,16] [--duration 30] [--workers 2]
+                                   [--chat-latency lognormal:1.2,0.5] [--drawing]
+                                   [--server gunicorn|asgi] [--json results/e2e.json]
+                                   [--compare results/e2e-baseline.json]
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+
+from samples import ROOT, SAMPLE_INPUT, make_drawing
+from stub_upstreams import StubUpstreams
+
+ENDPOINTS = ('analyze', 'download_pdf')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def worker_rss_mb(master_pid):
+    """RSS of every child process of the server master, by pid"""
+    rss = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        if int(status.get('PPid', '0').strip()) == master_pid and 'VmRSS' in status:
+            rss[int(entry)] = round(int(status['VmRSS'].split()[0]) / 1024, 1)
+    return rss
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(args, stub, workdir):
+    port = free_port()
+    env = dict(os.environ, **stub.environ)
+    env.update({
+        'KV_STORE_PATH': os.path.join(workdir, 'kv_store.sqlite3'),
+        'ANALYSIS_STORE_DIR': os.path.join(workdir, 'analyses'),
+        'LLM_CACHE_TTL': '0',
+        'ANALYZE_RATE_PER_MINUTE': '0',
+        'PDF_RATE_PER_MINUTE': '0',
+        'OPENROUTER_API_KEY': 'stub',
+        'AITUNNEL_API_KEY': 'stub',
+    })
+
+    command = [sys.executable, '-m', 'gunicorn', 'main:app', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(args.workers), '--timeout', '120', '--log-level', 'warning']
+    if args.server == 'asgi':
+        command[3] = 'asgi:app'
+        command += ['--worker-class', 'uvicorn.workers.UvicornWorker']
+
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                               stderr=open(os.path.join(workdir, 'server.log'), 'w'))
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}, see {workdir}/server.log")
+        try:
+            requests.get(base_url + '/', timeout=2)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("Server did not come up within 120 s")
+
+
+def drawing_png():
+    image = make_drawing().resize((1754, 1240))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def virtual_user(base_url, stop_at, drawing, samples, lock):
+    """Analyze, then download the report, until the level's time is up"""
+    session = requests.Session()
+    while time.monotonic() < stop_at:
+        files = {'drawing': ('drawing.png', drawing, 'image/png')} if drawing else None
+        # A unique description per request keeps every analysis a real one
+        data = {'description': f"{SAMPLE_INPUT}\nВариант {uuid.uuid4().hex[:8]}"}
+        for endpoint in ENDPOINTS:
+            started = time.perf_counter()
+            try:
+                if endpoint == 'analyze':
+                    response = session.post(base_url + '/analyze', data=data, files=files,
+                                            allow_redirects=False, timeout=180)
+                else:
+                    response = session.get(base_url + '/download_pdf', allow_redirects=False, timeout=180)
+                status = response.status_code
+                ok = status == 200 and (endpoint != 'download_pdf' or response.content[:5] == b'%PDF-')
+            except requests.RequestException:
+                status, ok = 'error', False
+            elapsed = time.perf_counter() - started
+
+            with lock:
+                samples.append((endpoint, elapsed, status, ok))
+            if not ok:
+                break
+
+
+def run_level(base_url, master_pid, concurrency, duration, drawing):
+    samples, lock = [], threading.Lock()
+    started = time.monotonic()
+    stop_at = started + duration
+    users = [threading.Thread(target=virtual_user, args=(base_url, stop_at, drawing, samples, lock), daemon=True)
+             for _ in range(concurrency)]
+    for user in users:
+        user.start()
+
+    # Peak RSS per worker over the level
+    rss = {}
+    while any(user.is_alive() for user in users):
+        for pid, mb in worker_rss_mb(master_pid).items():
+            rss[pid] = max(rss.get(pid, 0), mb)
+        time.sleep(0.5)
+    wall = time.monotonic() - started
+
+    result = {'concurrency': concurrency, 'wall_seconds': round(wall, 2), 'endpoints': {},
+              'worker_rss_mb': {str(pid): mb for pid, mb in sorted(rss.items())}}
+    for endpoint in ENDPOINTS:
+        latencies = [elapsed for name, elapsed, _, ok in samples if name == endpoint and ok]
+        statuses = {}
+        for name, _, status, _ in samples:
+            if name == endpoint:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+        result['endpoints'][endpoint] = {
+            'requests': sum(statuses.values()),
+            'ok': len(latencies),
+            'statuses': statuses,
+            'throughput_rps': round(len(latencies) / wall, 3),
+            **{f'p{q}_ms': round(percentile(latencies, q) * 1000, 1) if latencies else None for q in (50, 95, 99)},
+        }
+    return result
+
+
+def print_level(level, baseline=None):
+    print(f"\nconcurrency {level['concurrency']}  ({level['wall_seconds']} s)")
+    for endpoint, stats in level['endpoints'].items():
+        line = (f"  {endpoint:<13} ok {stats['ok']:>5}/{stats['requests']:<5} {stats['throughput_rps']:>7.2f} req/s"
+                f"  p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms")
+        previous = (baseline or {}).get(endpoint)
+        if previous and previous.get('p95_ms') and stats['p95_ms']:
+            line += (f"  [p95 {(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%,"
+                     f" req/s {(stats['throughput_rps'] / previous['throughput_rps'] - 1) * 100:+.0f}%]"
+                     if previous['throughput_rps'] else '')
+        print(line)
+    print("  worker RSS MB: " + ', '.join(f"{pid}={mb}" for pid, mb in level['worker_rss_mb'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', default='1,2,4,8,16', help='Comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds per level')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--server', choices=('gunicorn', 'asgi'), default='gunicorn')
+    parser.add_argument('--chat-latency', default='lognormal:1.2,0.5')
+    parser.add_argument('--embeddings-latency', default='lognormal:0.15,0.3')
+    parser.add_argument('--chat-response', help='JSON file with a full chat completion response')
+    parser.add_argument('--drawing', action='store_true', help='Upload a sample drawing with every analysis (needs tesseract)')
+    parser.add_argument('--json', default=os.path.join('benchmarks', 'results', 'e2e.json'))
+    parser.add_argument('--compare', help='Earlier results file to print deltas against')
+    args = parser.parse_args()
+
+    if args.drawing and not shutil.which('tesseract'):
+        parser.error('--drawing needs the tesseract binary')
+
+    chat_response = None
+    if args.chat_response:
+        with open(args.chat_response, 'r', encoding='utf-8') as f:
+            chat_response = json.load(f)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = {level['concurrency']: level['endpoints'] for level in json.load(f)['levels']}
+
+    drawing = drawing_png() if args.drawing else None
+    stub = StubUpstreams(chat_latency=args.chat_latency, embeddings_latency=args.embeddings_latency,
+                         chat_response=chat_response).start()
+    workdir = tempfile.mkdtemp(prefix='bench-e2e-')
+    process, base_url = start_server(args, stub, workdir)
+    print(f"{args.server} with {args.workers} workers at {base_url}, stubs at {stub.url}, chat latency {args.chat_latency}")
+
+    levels = []
+    try:
+        # One untimed pass so lazy services and the first report are built
+        run_level(base_url, process.pid, 1, 0.1, drawing)
+        for concurrency in [int(value) for value in args.concurrency.split(',')]:
+            level = run_level(base_url, process.pid, concurrency, args.duration, drawing)
+            levels.append(level)
+            print_level(level, baseline.get(concurrency))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'benchmark': 'e2e',
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {
+            'server': args.server,
+            'workers': args.workers,
+            'duration': args.duration,
+            'chat_latency': args.chat_latency,
+            'embeddings_latency': args.embeddings_latency,
+            'drawing': bool(drawing),
+            'cpu_count': os.cpu_count(),
+        },
+        'upstream_requests': stub.counts,
+        'levels': levels,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
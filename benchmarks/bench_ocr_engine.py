@@ -0,0 +1,62 @@
+"""
+Per-image OCR cost of the in-process tesserocr engine versus pytesseract
+
+Usage:
+    python benchmarks/bench_ocr_engine.py [--images 20] [--lang rus+eng]
+"""
+import argparse
+import statistics
+import time
+
+from samples import make_drawing
+
+from services.ocr_engine import PytesseractEngine, TesserocrEngine, tesserocr
+
+
+def run(engine, images, lang, config):
+    # First call pays engine start-up for tesserocr; measure it separately
+    start = time.perf_counter()
+    engine.image_to_string(images[0], lang, config)
+    first = time.perf_counter() - start
+
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        engine.image_to_string(image, lang, config)
+        timings.append(time.perf_counter() - start)
+    return first, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--lang', default='rus+eng')
+    parser.add_argument('--config', default='--oem 3 --psm 6')
+    parser.add_argument('--width', type=int, default=1754, help="sheet width, 150 dpi A4 by default")
+    args = parser.parse_args()
+
+    height = int(args.width / 1.414)
+    images = [make_drawing(args.width, height, title=f"Вал 01.02.{i:03d}") for i in range(args.images)]
+
+    engines = [PytesseractEngine()]
+    if tesserocr is not None:
+        engines.append(TesserocrEngine())
+    else:
+        print("tesserocr is not installed; only measuring pytesseract")
+
+    results = {}
+    for engine in engines:
+        first, timings = run(engine, images, args.lang, args.config)
+        results[engine.name] = statistics.mean(timings)
+        print(f"{engine.name:12s} first={first * 1000:8.1f} ms  "
+              f"mean={statistics.mean(timings) * 1000:8.1f} ms  "
+              f"median={statistics.median(timings) * 1000:8.1f} ms  n={len(timings)}")
+
+    if len(results) == 2:
+        saving = results['pytesseract'] - results['tesserocr']
+        print(f"per-image saving: {saving * 1000:.1f} ms "
+              f"({saving / results['pytesseract'] * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
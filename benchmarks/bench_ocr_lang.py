@@ -0,0 +1,66 @@
+"""
+Time saved by script detection over always running rus+eng
+
+For Cyrillic-only, Latin-only and mixed sheets this measures OCR with the
+fixed 'rus+eng' models against the detection pre-pass plus the single model
+it picks, and reports the pre-pass cost on its own.
+
+Usage:
+    python benchmarks/bench_ocr_lang.py [--repeat 5] [--engine auto]
+"""
+import argparse
+import statistics
+import time
+
+from samples import NOTES_EN, NOTES_RU, make_drawing
+
+from config import Config
+from services.ocr_engine import get_engine
+from services.ocr_service import OCRService
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', default='auto')
+    parser.add_argument('--width', type=int, default=2480, help="sheet width, 300 dpi A4 portrait by default")
+    args = parser.parse_args()
+
+    height = int(args.width / 1.414)
+    sheets = {
+        'cyrillic': make_drawing(args.width, height, notes=NOTES_RU, title="Вал 01.02.003"),
+        'latin': make_drawing(args.width, height, notes=NOTES_EN, title="Shaft 01.02.003"),
+        'mixed': make_drawing(args.width, height, notes=NOTES_EN + NOTES_RU, title="Вал 01.02.003"),
+    }
+
+    service = OCRService(mode='page')
+    service.engine = get_engine(args.engine)
+    # Measure detection every time rather than its cached result
+    service.cache.max_entries = 0
+    Config.OCR_SCRIPT_DETECTION = True
+
+    print(f"engine={service.engine.name} repeat={args.repeat} sheet={args.width}x{height}")
+    for name, image in sheets.items():
+        fixed, _ = measure(lambda: service._recognize(image, 'rus+eng'), args.repeat)
+        detect, (languages, _rotate) = measure(
+            lambda: service._detect_languages(image, service.cache.fingerprint(image)), args.repeat
+        )
+        chosen, _ = measure(lambda: service._recognize(image, languages), args.repeat)
+
+        total = detect + chosen
+        print(f"{name:9s} rus+eng={fixed * 1000:8.1f} ms  "
+              f"osd={detect * 1000:7.1f} ms + {languages}={chosen * 1000:8.1f} ms  "
+              f"saving={(fixed - total) * 1000:8.1f} ms ({(fixed - total) / fixed * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+PDF report rendering micro-benchmarks
+
+Measures, for the Unicode PDFService:
+  - service construction (fonts and styles are process-wide after the first)
+  - text normalization throughput (_clean_text calls per second)
+  - per-report render time and paragraphs per second, in both languages
+
+Usage:
+    python benchmarks/bench_pdf_render.py [--reports 50] [--json results.json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from samples import SAMPLE_ANALYSIS, SAMPLE_INPUT
+
+from services.pdf_service_unicode import PDFService
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=50)
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+
+    start = time.perf_counter()
+    service = PDFService()
+    results['first_init_ms'] = (time.perf_counter() - start) * 1000
+    results['warm_init_ms'] = statistics.median(timed(PDFService, 100)) * 1000
+
+    paragraphs = [str(value) for section in SAMPLE_ANALYSIS.values() for value in section.values()]
+    calls = 200
+    timings = timed(lambda: [service._clean_text(text) for text in paragraphs], calls)
+    results['clean_text_per_sec'] = len(paragraphs) * calls / sum(timings)
+
+    for language in ('en', 'ru'):
+        story_size = len(service._build_story(SAMPLE_ANALYSIS, SAMPLE_INPUT, language))
+        timings = timed(lambda: service.generate_report(SAMPLE_ANALYSIS, SAMPLE_INPUT, language), args.reports)
+        results[f'render_{language}_ms_median'] = statistics.median(timings) * 1000
+        results[f'render_{language}_ms_p95'] = sorted(timings)[int(len(timings) * 0.95) - 1] * 1000
+        results[f'render_{language}_flowables'] = story_size
+        results[f'render_{language}_paragraphs_per_sec'] = story_size / statistics.median(timings)
+
+    results['font'] = service.font_name
+    for key, value in results.items():
+        print(f"{key:32s} {value:.2f}" if isinstance(value, float) else f"{key:32s} {value}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
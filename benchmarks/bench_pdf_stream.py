@@ -0,0 +1,82 @@
+"""
+Combined report memory and time benchmark
+
+Builds one combined PDF of N analyses in a fresh process per run and reports
+wall time, peak RSS and output size for:
+  - list:   the whole story materialized up front and laid out once
+  - stream: PDFService.generate_combined_report without pypdf (lazy story)
+  - merge:  PDFService.generate_combined_report with pypdf (process pool),
+            forced past REPORT_MERGE_MAX_PARTS
+
+Usage:
+    python benchmarks/bench_pdf_stream.py [--sizes 1,10,100,1000] [--json results.json]
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import tempfile
+import time
+
+from samples import SAMPLE_ANALYSIS, SAMPLE_INPUT
+
+
+def run(mode, size):
+    from config import Config
+    from services import pdf_service_unicode
+    from services.pdf_service_unicode import PDFService
+
+    service = PDFService()
+    reports = [
+        dict(analysis=SAMPLE_ANALYSIS, input_text=f"Деталь {i + 1}\n{SAMPLE_INPUT}", language='ru')
+        for i in range(size)
+    ]
+
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        if mode == 'list':
+            titles = [service._report_title(report, index) for index, report in enumerate(reports)]
+            story = list(service._iter_combined_story(reports, titles, [0] * size, 'ru'))
+            service._combined_doc(output).build(story)
+        else:
+            if mode == 'stream':
+                pdf_service_unicode.pypdf = None
+            else:
+                Config.REPORT_MERGE_MAX_PARTS = size
+            service.generate_combined_report(reports, 'ru', output=output)
+        elapsed = time.perf_counter() - start
+        output.seek(0, 2)
+        size_bytes = output.tell()
+
+    return {
+        'seconds': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'pdf_mb': size_bytes / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1,10,100,1000')
+    parser.add_argument('--modes', default='list,stream,merge')
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"{'analyses':>8s} {'mode':>6s} {'seconds':>8s} {'peak RSS MB':>11s} {'PDF MB':>7s}")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        for mode in args.modes.split(','):
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                result = pool.apply(run, (mode, size))
+            result.update(mode=mode, analyses=size)
+            results.append(result)
+            print(f"{size:8d} {mode:>6s} {result['seconds']:8.2f} {result['peak_rss_mb']:11.1f} {result['pdf_mb']:7.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
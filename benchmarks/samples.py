@@ -0,0 +1,119 @@
+"""
+Synthetic inputs shared by the benchmark scripts
+"""
+import os
+import sys
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Benchmarks run as scripts from the repository root or the benchmarks folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SAMPLE_ANALYSIS = {
+    "product_assessment": {
+        "purpose": "Приводной вал редуктора, передает крутящий момент от двигателя",
+        "operating_conditions": "Циклическое кручение, температура от -40 до +80 °C, предел выносливости не менее 400 МПа",
+        "critical_requirements": "Твердость посадочных поверхностей 38…42 HRC, биение не более 0,02 мм"
+    },
+    "material_selection": {
+        "recommended_materials": ["Сталь 40Х ГОСТ 4543-2016", "Сталь 45 ГОСТ 1050-2013", "Сталь 40ХН2МА"],
+        "primary_choice": "Сталь 40Х",
+        "justification": "Хромистая сталь с хорошей прокаливаемостью обеспечивает σв ≥ 900 МПа после улучшения",
+        "properties_analysis": "KCU ≥ 60 Дж/см², твердость сердцевины 269…302 НВ",
+        "gost_standards": ["ГОСТ 4543-2016", "ГОСТ 1050-2013"]
+    },
+    "manufacturing_technology": {
+        "processing_methods": ["Токарная обработка", "Фрезерование шпоночных пазов", "Шлифование шеек"],
+        "heat_treatment": "Закалка 850 °C в масло, отпуск 550 °C",
+        "surface_treatment": "ТВЧ-закалка шеек на глубину 1,5–2 мм",
+        "quality_control": "Контроль твердости и ультразвуковой контроль"
+    },
+    "structural_characteristics": {
+        "microstructure": "Сорбит отпуска",
+        "grain_structure": "Балл зерна 7–9 по ГОСТ 5639",
+        "phase_composition": "Феррито-карбидная смесь",
+        "mechanical_properties": "σв ≥ 900 МПа, σт ≥ 750 МПа, δ ≥ 10 %"
+    },
+    "defect_analysis": {
+        "common_defects": ["Закалочные трещины", "Обезуглероживание", "Неметаллические включения"],
+        "causes": ["Перегрев", "Окислительная атмосфера печи"],
+        "prevention_methods": ["Контроль режимов нагрева", "Защитная атмосфера"],
+        "correction_methods": ["Повторная термообработка"]
+    },
+    "testing_methods": {
+        "mechanical_tests": ["Растяжение ГОСТ 1497", "Ударный изгиб ГОСТ 9454", "Твердость ГОСТ 9013"],
+        "non_destructive_tests": ["УЗК", "Магнитопорошковый контроль"],
+        "standards": ["ГОСТ 1497-84", "ГОСТ 9454-78"],
+        "acceptance_criteria": "По чертежу и ГОСТ 4543-2016"
+    }
+}
+
+SAMPLE_INPUT = "Вал приводной, Ø45h6, длина 320 мм, циклическое кручение, рабочая температура -40…+80 °C"
+
+FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+
+NOTES_EN = [
+    "TECHNICAL REQUIREMENTS",
+    "1. Material: Steel 40X GOST 4543-2016",
+    "2. Hardness 38...42 HRC after quenching and tempering",
+    "3. Unspecified fillet radii R1 max",
+    "4. Surface roughness Ra 1.6 on bearing seats",
+]
+
+NOTES_RU = [
+    "ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ",
+    "1. Материал: Сталь 40Х ГОСТ 4543-2016",
+    "2. Твердость 38...42 HRC после закалки и отпуска",
+    "3. Неуказанные радиусы скруглений R1 max",
+    "4. Шероховатость Ra 1,6 на посадочных поверхностях",
+]
+
+
+def _font(size):
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def make_drawing(width=3508, height=2480, notes=None, title="Вал 01.02.003"):
+    """
+    Render an A4-landscape-at-300dpi style sheet with a frame, linework,
+    a notes block and a title block in the bottom-right corner
+
+    Args:
+        width (int): Sheet width in pixels
+        height (int): Sheet height in pixels
+        notes (list): Lines of the notes block (defaults to Russian notes)
+        title (str): Title block designation
+
+    Returns:
+        PIL.Image: RGB sheet image
+    """
+    notes = notes if notes is not None else NOTES_RU
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+
+    # Frame and some part linework
+    draw.rectangle((60, 60, width - 60, height - 60), outline='black', width=6)
+    draw.rectangle((width // 6, height // 5, width // 2, height // 2), outline='black', width=4)
+    for offset in range(0, width // 3, 40):
+        draw.line((width // 6 + offset, height // 2, width // 6 + offset + 60, height // 2 + 60), fill='black', width=2)
+    draw.line((width // 6, height // 2 + 200, width // 2, height // 2 + 200), fill='black', width=2)
+    draw.text((width // 3, height // 2 + 150), "Ø45h6", font=_font(36), fill='black')
+
+    # Notes block
+    font = _font(34)
+    for i, line in enumerate(notes):
+        draw.text((width // 2 + 300, 200 + i * 60), line, font=font, fill='black')
+
+    # Title block (GOST 2.104): 185 x 55 mm at 300 dpi
+    left, top = width - 60 - 2185, height - 60 - 650
+    draw.rectangle((left, top, width - 60, height - 60), outline='black', width=4)
+    draw.line((left, top + 220, width - 60, top + 220), fill='black', width=2)
+    draw.text((left + 700, top + 60), title, font=_font(60), fill='black')
+    draw.text((left + 700, top + 300), "Сталь 40Х ГОСТ 4543-2016", font=_font(44), fill='black')
+
+    return image
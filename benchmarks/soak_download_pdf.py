@@ -0,0 +1,83 @@
+"""
+Soak test for /download_pdf: memory must stay flat over many downloads
+
+Runs the Flask app in-process with a stubbed AI service, stores one analysis
+and downloads its report repeatedly, mixing full, ranged and conditional
+requests. Resident set size and traced Python allocations are sampled
+along the way; the run fails if either keeps growing.
+
+Usage:
+    python benchmarks/soak_download_pdf.py [--downloads 5000] [--max-growth-mb 5]
+"""
+import argparse
+import sys
+import tracemalloc
+
+from samples import SAMPLE_ANALYSIS
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * 4096 / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--downloads', type=int, default=5000)
+    parser.add_argument('--sample-every', type=int, default=500)
+    parser.add_argument('--max-growth-mb', type=float, default=5.0)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import app as application
+    application.ai_service.analyze_material_requirements = lambda text, language='en': SAMPLE_ANALYSIS
+
+    client = application.app.test_client()
+    response = client.post('/analyze', data={'description': 'Drive shaft, 40 mm, cyclic torsion'})
+    assert response.status_code == 200, response.status_code
+
+    first = client.get('/download_pdf')
+    assert first.status_code == 200, first.status_code
+    etag = first.headers['ETag']
+    size = int(first.headers['Content-Length'])
+
+    # Warm up allocator pools before taking the baseline
+    for _ in range(200):
+        client.get('/download_pdf').close()
+
+    tracemalloc.start()
+    baseline_rss, baseline_traced = rss_mb(), tracemalloc.get_traced_memory()[0]
+    print(f"report size={size} bytes  baseline rss={baseline_rss:.1f} MB")
+
+    for i in range(1, args.downloads + 1):
+        kind = i % 3
+        if kind == 0:
+            response = client.get('/download_pdf')
+            assert response.status_code == 200 and len(response.data) == size
+        elif kind == 1:
+            response = client.get('/download_pdf', headers={'Range': 'bytes=0-1023'})
+            assert response.status_code == 206 and len(response.data) == 1024
+        else:
+            response = client.get('/download_pdf', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+        response.close()
+
+        if i % args.sample_every == 0:
+            traced = tracemalloc.get_traced_memory()[0]
+            print(f"{i:7d} downloads  rss={rss_mb():7.1f} MB  "
+                  f"traced growth={(traced - baseline_traced) / 1024:8.1f} KB")
+
+    rss_growth = rss_mb() - baseline_rss
+    traced_growth = (tracemalloc.get_traced_memory()[0] - baseline_traced) / (1024 * 1024)
+    print(f"rss growth={rss_growth:.1f} MB  traced growth={traced_growth:.2f} MB")
+    if max(rss_growth, traced_growth) > args.max_growth_mb:
+        print("FAIL: memory grew during the soak")
+        sys.exit(1)
+    print("OK: memory stayed flat")
+
+
+if __name__ == '__main__':
+    main()
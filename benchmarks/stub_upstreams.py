@@ -0,0 +1,200 @@
+"""
+Local stand-ins for the OpenRouter chat completions and AiTunnel embeddings APIs
+
+Answers POST .../chat/completions and POST .../embeddings with canned JSON
+after a delay drawn from a latency distribution, so the app can be benchmarked
+without network access or API costs. Point the app at it with
+OPENROUTER_BASE_URL=http://host:port/api/v1 and AITUNNEL_BASE_URL=http://host:port/v1.
+
+Latency specs (seconds):
+    fixed:0.8                  always 0.8
+    uniform:0.5,2              uniform between 0.5 and 2
+    normal:1.2,0.3             normal, mean 1.2, standard deviation 0.3 (clamped at 0)
+    lognormal:1.2,0.5          lognormal with median 1.2 and sigma 0.5 (long tail, like real LLM calls)
+
+Usage:
+    python benchmarks/stub_upstreams.py [--port 8099] [--chat-latency lognormal:1.2,0.5]
+                                        [--chat-response completion.json]
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from samples import SAMPLE_ANALYSIS
+
+EMBEDDING_DIMENSION = 1536
+
+
+def parse_latency(spec):
+    """
+    Turn a latency spec into a sampler
+
+    Args:
+        spec (str): 'kind:params', see the module docstring
+
+    Returns:
+        callable: Returns a delay in seconds on every call
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(',') if value]
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def default_completion():
+    """Chat completion whose message is the sample analysis as JSON"""
+    content = json.dumps(SAMPLE_ANALYSIS, ensure_ascii=False, indent=2)
+    return {
+        "id": "gen-stub",
+        "object": "chat.completion",
+        "model": "stub",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": f"```json\n{content}\n```"},
+        }],
+        "usage": {"prompt_tokens": 1200, "completion_tokens": 900, "total_tokens": 2100},
+    }
+
+
+def embedding(text):
+    """Deterministic unit vector for a text, so identical inputs embed identically"""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIMENSION)]
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector]
+
+
+class StubUpstreams:
+    """
+    Threaded HTTP server with both stub APIs
+
+    Counts the requests it answered per API, for cross-checking the app's
+    own numbers after a run.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, chat_latency='fixed:0', embeddings_latency='fixed:0',
+                 chat_response=None, error_rate=0.0):
+        self.chat_latency = parse_latency(chat_latency)
+        self.embeddings_latency = parse_latency(embeddings_latency)
+        self.chat_body = json.dumps(chat_response or default_completion()).encode('utf-8')
+        self.error_rate = error_rate
+        self.counts = {'chat': 0, 'embeddings': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def environ(self):
+        """Environment variables that point the app at the stubs"""
+        return {
+            'OPENROUTER_BASE_URL': f"{self.url}/api/v1",
+            'AITUNNEL_BASE_URL': f"{self.url}/v1",
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+
+                if self.path.endswith('/chat/completions'):
+                    stub._count('chat')
+                    time.sleep(stub.chat_latency())
+                    if stub.error_rate and random.random() < stub.error_rate:
+                        stub._count('errors')
+                        self._send(502, b'{"error": {"message": "stub upstream error"}}')
+                        return
+                    self._send(200, stub.chat_body)
+                elif self.path.endswith('/embeddings'):
+                    stub._count('embeddings')
+                    time.sleep(stub.embeddings_latency())
+                    texts = request.get('input') or []
+                    texts = [texts] if isinstance(texts, str) else texts
+                    body = {
+                        "object": "list",
+                        "model": request.get('model', 'stub'),
+                        "data": [{"object": "embedding", "index": i, "embedding": embedding(text)}
+                                 for i, text in enumerate(texts)],
+                    }
+                    self._send(200, json.dumps(body).encode('utf-8'))
+                else:
+                    self._send(404, b'{"error": {"message": "not found"}}')
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='stub-upstreams', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--chat-latency', default='lognormal:1.2,0.5')
+    parser.add_argument('--embeddings-latency', default='lognormal:0.15,0.3')
+    parser.add_argument('--chat-response', help='JSON file with a full chat completion response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of chat requests answered with 502')
+    args = parser.parse_args()
+
+    chat_response = None
+    if args.chat_response:
+        with open(args.chat_response, 'r', encoding='utf-8') as f:
+            chat_response = json.load(f)
+
+    stub = StubUpstreams(args.host, args.port, args.chat_latency, args.embeddings_latency,
+                         chat_response, args.error_rate).start()
+    for name, value in stub.environ.items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Fingerprint and precompress static assets
+
+    python build_assets.py [--clean]
+
+Every CSS/JS/SVG/font file under static/ is copied to static/dist/ with a
+content hash in its name (css/style.css -> css/style.1a2b3c4d5e.css), next to
+.gz and, when the brotli package is installed, .br variants. The mapping is
+written to static/dist/manifest.json, which the app reads to rewrite
+url_for('static', ...) and to serve the files with immutable cache headers.
+
+Files from earlier builds are kept so pages rendered before a deploy can still
+load their assets; --clean removes everything not in the new manifest.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+STATIC_DIR = 'static'
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.ico', '.woff', '.woff2', '.ttf', '.png', '.jpg', '.jpeg')
+# Already compressed formats gain nothing from gzip/brotli
+COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.ico', '.ttf')
+MIN_COMPRESS_SIZE = 256  # bytes
+
+
+def iter_sources(static_dir: str = STATIC_DIR):
+    """Yield static file paths relative to static_dir, skipping the build output."""
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.join(static_dir, 'dist'))
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/')
+
+
+def hashed_name(path: str, content: bytes) -> str:
+    """Insert a content hash before the extension: css/style.css -> css/style.<hash>.css"""
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+def write_file(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def build_asset(source: str, static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> dict:
+    """Write the hashed copy of one asset and its compressed variants."""
+    with open(os.path.join(static_dir, source), 'rb') as f:
+        content = f.read()
+
+    target = hashed_name(source, content)
+    target_path = os.path.join(dist_dir, target)
+    write_file(target_path, content)
+
+    encodings = []
+    if source.lower().endswith(COMPRESS_EXTENSIONS) and len(content) >= MIN_COMPRESS_SIZE:
+        # mtime=0 keeps the .gz byte-identical across builds
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            write_file(target_path + '.gz', compressed)
+            encodings.append('gzip')
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                write_file(target_path + '.br', compressed)
+                encodings.append('br')
+
+    return {'file': target, 'size': len(content), 'encodings': encodings}
+
+
+def clean(dist_dir: str, manifest: dict) -> int:
+    """Delete build output that is not referenced by the manifest."""
+    keep = {MANIFEST_NAME}
+    for entry in manifest.values():
+        keep.add(entry['file'])
+        keep.update(f"{entry['file']}.{ext}" for ext in ('gz', 'br'))
+
+    removed = 0
+    for root, _, files in os.walk(dist_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, dist_dir).replace(os.sep, '/') not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR, remove_stale: bool = False) -> dict:
+    """Build every asset and write the manifest."""
+    manifest = {source: build_asset(source, static_dir, dist_dir) for source in iter_sources(static_dir)}
+    write_file(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    for source, entry in manifest.items():
+        print(f"{source} -> dist/{entry['file']} ({', '.join(entry['encodings']) or 'uncompressed'})")
+    if brotli is None:
+        print("brotli is not installed, only gzip variants were written")
+    if remove_stale:
+        print(f"Removed {clean(dist_dir, manifest)} stale files")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clean', action='store_true', help='remove files of earlier builds')
+    args = parser.parse_args()
+
+    build(remove_stale=args.clean)
+    print("Asset build complete!")
@@ -4,9 +4,17 @@ Simple script to compile .po files to .mo files without requiring msgfmt
 """
 
 import os
+import re
 import struct
 from typing import Dict, Tuple
 
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def unescape(value: str) -> str:
+    """Decode the C-style escapes of a quoted .po string."""
+    return re.sub(r'\\(.)', lambda m: _ESCAPES.get(m.group(1), m.group(0)), value)
+
 
 def parse_po_file(po_path: str) -> Dict[str, str]:
     """Parse a .po file and return a dictionary of msgid -> msgstr mappings."""
@@ -23,18 +31,18 @@ def parse_po_file(po_path: str) -> Dict[str, str]:
             if line.startswith('msgid '):
                 if current_msgid is not None and current_msgstr is not None:
                     messages[current_msgid] = current_msgstr
-                current_msgid = line[6:].strip('"')
+                current_msgid = unescape(line[6:].strip()[1:-1])
                 current_msgstr = None
                 in_msgid = True
                 in_msgstr = False
                 
             elif line.startswith('msgstr '):
-                current_msgstr = line[7:].strip('"')
+                current_msgstr = unescape(line[7:].strip()[1:-1])
                 in_msgid = False
                 in_msgstr = True
                 
             elif line.startswith('"') and line.endswith('"'):
-                content = line[1:-1]
+                content = unescape(line[1:-1])
                 if in_msgid and current_msgid is not None:
                     current_msgid += content
                 elif in_msgstr and current_msgstr is not None:
@@ -49,14 +57,16 @@ def parse_po_file(po_path: str) -> Dict[str, str]:
 
 def create_mo_file(messages: Dict[str, str], mo_path: str) -> None:
     """Create a .mo file from message dictionary."""
-    # Filter out empty msgids and msgstrs
-    filtered_messages = {k: v for k, v in messages.items() if k and v}
+    # Drop untranslated entries. The header (empty msgid) is kept: it declares
+    # the charset that gettext needs to decode the catalog.
+    filtered_messages = {k: v for k, v in messages.items() if v}
     
     # Prepare data
     keys = []
     values = []
     
-    for msgid, msgstr in filtered_messages.items():
+    # Readers binary-search the key table, so it must be sorted
+    for msgid, msgstr in sorted(filtered_messages.items(), key=lambda item: item[0].encode('utf-8')):
         # Ensure proper UTF-8 encoding
         key_bytes = msgid.encode('utf-8')
         value_bytes = msgstr.encode('utf-8')
@@ -4,13 +4,165 @@ class Config:
     SECRET_KEY = os.environ.get('SESSION_SECRET', 'dev-secret-key')
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # Uploads are kept in memory and only spooled to a temp file past this size
+    UPLOAD_SPOOL_MAX_SIZE = int(os.environ.get('UPLOAD_SPOOL_MAX_SIZE', 4 * 1024 * 1024))
+    # Uploads are checked as they arrive and refused mid-body when they break a
+    # limit: size per file, pixel count (default: what Pillow refuses to open
+    # as a decompression bomb), and a format from the magic bytes within the
+    # first UPLOAD_SNIFF_BYTES
+    UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', MAX_CONTENT_LENGTH))
+    UPLOAD_MAX_PIXELS = int(os.environ.get('UPLOAD_MAX_PIXELS', 178956970))
+    UPLOAD_SNIFF_BYTES = int(os.environ.get('UPLOAD_SNIFF_BYTES', 128 * 1024))
     
     # API Configuration
     OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY', 'default-key')
     AITUNNEL_API_KEY = os.environ.get('AITUNNEL_API_KEY', 'default-key')
+    # API roots, overridable to point at a proxy or the benchmark stubs
+    OPENROUTER_BASE_URL = os.environ.get('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
+    AITUNNEL_BASE_URL = os.environ.get('AITUNNEL_BASE_URL', 'https://api.aitunnel.ai/v1')
+    # Record/replay of LLM and embedding calls (utils/cassette.py): 'record',
+    # 'replay' (unknown requests go to the API and are recorded), 'strict'
+    # (unknown requests fail), or empty to always call the API
+    CASSETTE_MODE = os.environ.get('CASSETTE_MODE', '')
+    CASSETTE_DIR = os.environ.get('CASSETTE_DIR', os.path.join(os.getcwd(), 'cassettes'))
+    # Hold replayed responses back for as long as the recorded call took
+    CASSETTE_EMULATE_LATENCY = os.environ.get('CASSETTE_EMULATE_LATENCY', 'false').lower() == 'true'
+    
+    # Log import and service construction times at startup; a value ending in
+    # .json also writes the profile to that file
+    STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', '')
+    # Root log level; DEBUG also logs request details meant for local debugging
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    
+    # Shared key-value tier for sessions and caches across workers and instances:
+    # a redis:// URL, or empty for an embedded SQLite file on this box
+    KV_STORE_URL = os.environ.get('KV_STORE_URL', os.environ.get('REDIS_URL', ''))
+    KV_STORE_PATH = os.environ.get('KV_STORE_PATH', os.path.join(os.getcwd(), 'instance', 'kv_store.sqlite3'))
+    # 'kv' keeps session data server-side in the KV store, 'cookie' in the signed cookie.
+    # Server-side sessions are the default only with a shared (Redis) KV store:
+    # the local SQLite file would lose sessions when requests land on another box
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'kv' if KV_STORE_URL else 'cookie')
+    SESSION_TTL = int(os.environ.get('SESSION_TTL', 7 * 24 * 3600))  # seconds
+    # Share rendered reports, OCR text and LLM responses through the KV store
+    SHARED_CACHE_ENABLED = os.environ.get('SHARED_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 24 * 3600))  # seconds, 0 disables
+    
+    # Analysis result storage: a SQLAlchemy URL (sqlite:///analyses.db,
+    # postgresql://...) shared by all instances, 'kv' for the KV store, or
+    # empty for JSON files in ANALYSIS_STORE_DIR on local disk (development only)
+    ANALYSIS_STORE_URL = os.environ.get('ANALYSIS_STORE_URL', os.environ.get('DATABASE_URL', ''))
+    ANALYSIS_STORE_DIR = os.environ.get('ANALYSIS_STORE_DIR', os.path.join(os.getcwd(), 'temp_analysis'))
+    ANALYSIS_TTL = int(os.environ.get('ANALYSIS_TTL', 24 * 3600))  # seconds
+    ANALYSIS_PURGE_INTERVAL = int(os.environ.get('ANALYSIS_PURGE_INTERVAL', 600))  # seconds
+    
+    # Background sweeper for uploads/ and the file analysis store
+    JANITOR_ENABLED = os.environ.get('JANITOR_ENABLED', 'true').lower() == 'true'
+    JANITOR_INTERVAL = int(os.environ.get('JANITOR_INTERVAL', 300))  # seconds between sweeps
+    JANITOR_UPLOADS_MAX_AGE = int(os.environ.get('JANITOR_UPLOADS_MAX_AGE', 3600))  # seconds
+    JANITOR_UPLOADS_MAX_BYTES = int(os.environ.get('JANITOR_UPLOADS_MAX_BYTES', 512 * 1024 * 1024))
+    # Files younger than this are never evicted for a size quota or disk space
+    JANITOR_MIN_EVICT_AGE = int(os.environ.get('JANITOR_MIN_EVICT_AGE', 600))  # seconds
+    # Below this much free disk space the oldest evictable uploads go first
+    # (0 = off); stored analyses are only ever removed once expired
+    JANITOR_MIN_FREE_BYTES = int(os.environ.get('JANITOR_MIN_FREE_BYTES', 0))
+    
+    # ASGI entry point (asgi.py): threads for OCR, rendering and the Flask views,
+    # and the keep-alive connection pool of the async LLM client
+    ASYNC_EXECUTOR_WORKERS = int(os.environ.get('ASYNC_EXECUTOR_WORKERS', 8))
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 200))
+    ASYNC_HTTP_MAX_KEEPALIVE = int(os.environ.get('ASYNC_HTTP_MAX_KEEPALIVE', 50))
+    # Concurrent analyses per ASGI worker (they mostly wait on the LLM)
+    ASYNC_ANALYZE_MAX_ACTIVE = int(os.environ.get('ASYNC_ANALYZE_MAX_ACTIVE', 200))
+    
+    # Prometheus metrics and per-request stage traces at /metrics. Scrapes
+    # must send METRICS_SECRET as "Authorization: Bearer <secret>" or ?token=
+    # (empty keeps /metrics closed). Each worker writes its numbers to
+    # METRICS_DIR every METRICS_FLUSH_INTERVAL seconds and /metrics merges
+    # them; an empty METRICS_DIR reports only the worker that answers.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_SECRET = os.environ.get('METRICS_SECRET', '')
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(os.getcwd(), 'instance', 'metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    
+    # On-demand profiling of single requests that carry this secret in an
+    # X-Profile header or ?__profile= (empty disables profiling entirely).
+    # The newest PROFILE_KEEP profiles are kept in PROFILE_DIR, see /profiles.
+    PROFILE_SECRET = os.environ.get('PROFILE_SECRET', '')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.getcwd(), 'instance', 'profiles'))
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))  # seconds, sampling mode
+    
+    # Admission control for /analyze and /download_pdf, per worker process:
+    # requests beyond MAX_ACTIVE wait in a queue of MAX_QUEUE (interactive before
+    # batch) for up to MAX_WAIT seconds; beyond that they get 503 + Retry-After.
+    # Each client (IP) may start RATE_PER_MINUTE requests, BURST at once, else 429.
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ANALYZE_MAX_ACTIVE = int(os.environ.get('ANALYZE_MAX_ACTIVE', 4))
+    ANALYZE_MAX_QUEUE = int(os.environ.get('ANALYZE_MAX_QUEUE', 16))
+    ANALYZE_MAX_WAIT = float(os.environ.get('ANALYZE_MAX_WAIT', 90))  # seconds
+    ANALYZE_RATE_PER_MINUTE = float(os.environ.get('ANALYZE_RATE_PER_MINUTE', 6))  # 0 disables
+    ANALYZE_BURST = int(os.environ.get('ANALYZE_BURST', 3))
+    PDF_MAX_ACTIVE = int(os.environ.get('PDF_MAX_ACTIVE', 2))
+    PDF_MAX_QUEUE = int(os.environ.get('PDF_MAX_QUEUE', 8))
+    PDF_MAX_WAIT = float(os.environ.get('PDF_MAX_WAIT', 30))  # seconds
+    PDF_RATE_PER_MINUTE = float(os.environ.get('PDF_RATE_PER_MINUTE', 30))  # 0 disables
+    PDF_BURST = int(os.environ.get('PDF_BURST', 10))
     
     # Supported file extensions
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'tif', 'tiff', 'pdf'}
+    
+    # OCR configuration
+    # 'page' runs tesseract over the whole sheet, 'regions' only over detected
+    # text-dense areas, 'tiles' over overlapping tiles of the sheet
+    OCR_MODE = os.environ.get('OCR_MODE', 'page')
+    OCR_WORKERS = int(os.environ.get('OCR_WORKERS', os.cpu_count() or 1))
+    OCR_TILE_SIZE = int(os.environ.get('OCR_TILE_SIZE', 2000))  # pixels
+    OCR_TILE_OVERLAP = int(os.environ.get('OCR_TILE_OVERLAP', 200))  # pixels
+    # 'auto' uses the in-process tesserocr engine when installed, else pytesseract
+    OCR_ENGINE = os.environ.get('OCR_ENGINE', 'auto')
+    
+    # Opt-in script detection pre-pass: a page OCRs with one of the configured
+    # languages only when OSD reports its script with at least this confidence
+    # (Russian sheets are often mostly Latin letters and digits, so the
+    # default keeps both models)
+    OCR_SCRIPT_DETECTION = os.environ.get('OCR_SCRIPT_DETECTION', 'false').lower() == 'true'
+    OCR_SCRIPT_MIN_CONF = float(os.environ.get('OCR_SCRIPT_MIN_CONF', 10.0))
+    # Opt-in: turn pages upright from the OSD orientation (vertical dimension
+    # text can mislead it)
+    OCR_AUTO_ROTATE = os.environ.get('OCR_AUTO_ROTATE', 'false').lower() == 'true'
+    OCR_ROTATE_MIN_CONF = float(os.environ.get('OCR_ROTATE_MIN_CONF', 10.0))
+    OCR_OSD_MAX_SIDE = int(os.environ.get('OCR_OSD_MAX_SIDE', 1600))  # pixels
+    
+    # Word-level OCR drops low-confidence words and linework noise from the prompt
+    OCR_STRUCTURED_OUTPUT = os.environ.get('OCR_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+    OCR_MIN_CONFIDENCE = float(os.environ.get('OCR_MIN_CONFIDENCE', 50))  # 0-100
+    
+    # Multi-page PDF/TIFF drawing sets are OCRed page by page
+    OCR_PDF_DPI = int(os.environ.get('OCR_PDF_DPI', 200))
+    OCR_MAX_PAGES = int(os.environ.get('OCR_MAX_PAGES', 20))  # 0 for no limit
+    OCR_TOKEN_BUDGET = int(os.environ.get('OCR_TOKEN_BUDGET', 8000))  # LLM prompt tokens, 0 for no limit
+    
+    # OCR result cache (LRU, per process)
+    OCR_CACHE_SIZE = int(os.environ.get('OCR_CACHE_SIZE', 256))  # entries, 0 disables
+    OCR_CACHE_PERCEPTUAL = os.environ.get('OCR_CACHE_PERCEPTUAL', 'false').lower() == 'true'
+    OCR_CACHE_MAX_DISTANCE = int(os.environ.get('OCR_CACHE_MAX_DISTANCE', 8))  # bits of 256
+    
+    # PDF reports are rendered in the background when an analysis is stored
+    REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE', 64))  # reports per process
+    # As many render threads as /download_pdf admits at once, so admitted
+    # downloads do not wait again in a narrower pool behind each other
+    REPORT_RENDER_WORKERS = max(1, int(os.environ.get('REPORT_RENDER_WORKERS', PDF_MAX_ACTIVE)))
+    REPORT_RENDER_TIMEOUT = float(os.environ.get('REPORT_RENDER_TIMEOUT', 60))  # seconds
+    REPORT_BATCH_WORKERS = int(os.environ.get('REPORT_BATCH_WORKERS', 0))  # 0 = one process per CPU
+    REPORT_BATCH_START_METHOD = os.environ.get('REPORT_BATCH_START_METHOD', 'forkserver')
+    # Larger combined reports are laid out in one streamed pass instead of merging
+    # pool-rendered parts, each of which carries its own font subsets
+    REPORT_MERGE_MAX_PARTS = int(os.environ.get('REPORT_MERGE_MAX_PARTS', 50))
+    # Batch report parts and merged output stay in memory up to this size, then spill to disk
+    REPORT_SPOOL_MAX_SIZE = int(os.environ.get('REPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+    
+    # Fingerprinted assets from build_assets.py are cached by browsers this long
+    ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 3600))  # seconds
     
     # Babel configuration
     LANGUAGES = {
@@ -19,3 +171,8 @@ class Config:
     }
     BABEL_DEFAULT_LOCALE = 'en'
     BABEL_DEFAULT_TIMEZONE = 'UTC'
+    
+    # Compiled catalogs (translations/<locale>/LC_MESSAGES/messages.mo, built by
+    # compile_translations.py) are checked for changes at most this often
+    TRANSLATIONS_DIR = os.environ.get('TRANSLATIONS_DIR', os.path.join(os.getcwd(), 'translations'))
+    TRANSLATIONS_RELOAD_INTERVAL = float(os.environ.get('TRANSLATIONS_RELOAD_INTERVAL', 5))  # seconds, 0 disables
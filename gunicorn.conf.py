@@ -0,0 +1,43 @@
+import os
+
+# Read by gunicorn from the working directory on every start
+
+# Threaded workers: requests waiting for an /analyze or /download_pdf slot sit
+# in the app's bounded admission queue, where they are counted and can be shown
+# their queue position, instead of in the listen backlog. Keep this above
+# ANALYZE_MAX_ACTIVE + ANALYZE_MAX_QUEUE + PDF_MAX_ACTIVE + PDF_MAX_QUEUE.
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+
+def on_starting(server):
+    """
+    Import the app and build its services in the master so forked workers
+    share modules, fonts and the materials database copy-on-write instead of
+    each loading them on their first request. Skipped with --reload, where
+    workers must pick up code changes, and with GUNICORN_PRELOAD=false for
+    the fastest possible cold start.
+
+    Also drops the metrics snapshots of the previous run, so counters start
+    from zero like the workers do.
+    """
+    from config import Config
+    from utils import metrics
+    if Config.METRICS_DIR:
+        metrics.clear_directory(Config.METRICS_DIR)
+
+    if server.cfg.reload or os.environ.get('GUNICORN_PRELOAD', 'true').lower() != 'true':
+        return
+
+    import app
+    app.warm_up()
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own database and Redis connections; the pools it
+    inherited from the master would share their sockets with other workers
+    """
+    import sys
+    app = sys.modules.get('app')
+    if app is not None:
+        app.after_fork()
@@ -1,14 +1,23 @@
+import asyncio
 import logging
-import requests
 import json
 import os
+import hashlib
 from typing import Dict, Any, Optional
 
+from config import Config
+from utils.cassette import http_session
+from utils.metrics import record_llm_response, span
+
 class AIService:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.logger = logging.getLogger(__name__)
+        # Optional shared KV store for parsed responses to identical prompts
+        self.cache = cache if Config.LLM_CACHE_TTL > 0 else None
         self.api_key = os.environ.get('OPENROUTER_API_KEY', 'default-key')
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        # Keep-alive session, recorded or replayed when CASSETTE_MODE is set
+        self.http = http_session()
+        self.base_url = f"{Config.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
         self.model = "google/gemini-2.5-flash-lite-preview-06-17"  # Using the paid Gemini 2.5 Flash Lite model
         
     def analyze_material_requirements(self, input_text: str, language: str = 'en') -> Optional[Dict[str, Any]]:
@@ -23,46 +32,111 @@ class AIService:
             Dict[str, Any]: Analysis results or None if failed
         """
         try:
-            prompt = self._create_analysis_prompt(input_text, language)
+            cache_key, cached, headers, payload = self._prepare_request(input_text, language)
+            if cached:
+                return cached
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            with span('llm_wait'):
+                response = self.http.post(self.base_url, headers=headers, json=payload, timeout=60)
+            return self._handle_response(response.status_code, response.text, cache_key)
+                
+        except Exception as e:
+            record_llm_response(self.model, 'failed')
+            self.logger.error(f"Error in AI analysis: {str(e)}")
+            return None
+    
+    async def analyze_material_requirements_async(self, input_text: str, language: str = 'en',
+                                                  client=None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze material requirements using AI without blocking the event loop
+        
+        Args:
+            input_text (str): Combined description and OCR text
+            language (str): Language preference ('en' or 'ru')
+            client (httpx.AsyncClient): Pooled keep-alive client to send the request with
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt(language)
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": 4000,
-                "temperature": 0.3
-            }
+        Returns:
+            Dict[str, Any]: Analysis results or None if failed
+        """
+        try:
+            # The cache lookup and store block (SQLite or Redis), so they run in
+            # a thread; to_thread keeps the request's trace context
+            cache_key, cached, headers, payload = await asyncio.to_thread(self._prepare_request, input_text, language)
+            if cached:
+                return cached
             
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=60)
+            with span('llm_wait'):
+                response = await client.post(self.base_url, headers=headers, json=payload, timeout=60)
+            return await asyncio.to_thread(self._handle_response, response.status_code, response.text, cache_key)
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                self.logger.info(f"AI Response received: {content[:500]}...")
-                parsed_result = self._parse_ai_response(content)
-                self.logger.info(f"Parsed result keys: {list(parsed_result.keys()) if parsed_result else 'None'}")
-                return parsed_result
-            else:
-                self.logger.error(f"API request failed: {response.status_code} - {response.text}")
-                return None
-                
         except Exception as e:
+            record_llm_response(self.model, 'failed')
             self.logger.error(f"Error in AI analysis: {str(e)}")
             return None
     
+    def _prepare_request(self, input_text: str, language: str):
+        """
+        Build the chat completion request and look up the shared cache
+        
+        Returns:
+            tuple: (cache key, cached analysis or None, headers, payload)
+        """
+        prompt = self._create_analysis_prompt(input_text, language)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = "llm:" + hashlib.sha256(f"{self.model}\n{language}\n{prompt}".encode('utf-8')).hexdigest()
+            with span('llm_cache'):
+                cached = self.cache.get_json(cache_key)
+            if cached:
+                record_llm_response(self.model, 'cached')
+                self.logger.info("AI analysis served from the shared cache")
+                return cache_key, cached, None, None
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self._get_system_prompt(language)
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": 4000,
+            "temperature": 0.3
+        }
+        return cache_key, None, headers, payload
+    
+    def _handle_response(self, status_code: int, body: str, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Parse a chat completion response and cache the analysis"""
+        if status_code != 200:
+            record_llm_response(self.model, 'error')
+            self.logger.error(f"API request failed: {status_code} - {body}")
+            return None
+        
+        with span('llm_parse'):
+            result = json.loads(body)
+            content = result['choices'][0]['message']['content']
+            usage = result.get('usage') or {}
+            record_llm_response(self.model, 'ok', usage)
+            self.logger.info(
+                f"AI response received: {len(content)} chars, "
+                f"{usage.get('prompt_tokens', '?')} prompt / {usage.get('completion_tokens', '?')} completion tokens"
+            )
+            parsed_result = self._parse_ai_response(content)
+        self.logger.info(f"Parsed result keys: {list(parsed_result.keys()) if parsed_result else 'None'}")
+        if cache_key and parsed_result:
+            self.cache.set_json(cache_key, parsed_result, Config.LLM_CACHE_TTL)
+        return parsed_result
+    
     def _get_system_prompt(self, language: str = 'en') -> str:
         """Get the system prompt for AI analysis"""
         if language == 'ru':
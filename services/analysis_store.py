@@ -0,0 +1,379 @@
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+# SQLAlchemy (installed with flask-sqlalchemy) is slow to import and only
+# needed for database stores, so SQLAnalysisStore imports it on construction
+sa = None
+
+
+def encode_payload(data: Dict[str, Any]) -> bytes:
+    """Compact JSON, zlib-compressed"""
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+class FileAnalysisStore:
+    """
+    Analysis results as JSON files in a local directory
+
+    Only suitable for development and single-instance deployments: the files
+    are not shared between instances, and user and content hash lookups scan
+    the directory. Expired files are removed on the purge interval.
+    """
+    name = 'file'
+
+    def __init__(self, directory=None, ttl=None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory or Config.ANALYSIS_STORE_DIR
+        self.ttl = ttl if ttl is not None else Config.ANALYSIS_TTL
+        self._last_purge = 0.0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, analysis_id):
+        return os.path.join(self.directory, f"{os.path.basename(analysis_id)}.json")
+
+    def save(self, analysis_id: str, data: Dict[str, Any], user_id: str = None, content_hash: str = None):
+        """
+        Store an analysis result
+
+        Args:
+            analysis_id (str): Analysis identifier
+            data (dict): Analysis with 'analysis', 'input_text' and 'language'
+            user_id (str): Owner of the analysis
+            content_hash (str): Hash of the analyzed input
+        """
+        record = {
+            'user_id': user_id,
+            'content_hash': content_hash,
+            'expires_at': time.time() + self.ttl,
+            'data': data,
+        }
+        path = self._path(analysis_id)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+        self._maybe_purge()
+
+    def load(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load an analysis result
+
+        Returns:
+            dict: Stored analysis, or None if it does not exist or has expired
+        """
+        record = self._read(self._path(analysis_id))
+        return record['data'] if record else None
+
+    def delete(self, analysis_id: str):
+        try:
+            os.unlink(self._path(analysis_id))
+        except FileNotFoundError:
+            pass
+
+    def find_by_user(self, user_id: str, limit: int = 20) -> List[str]:
+        """Ids of a user's unexpired analyses, newest first"""
+        return [analysis_id for analysis_id, record in self._scan() if record['user_id'] == user_id][:limit]
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Id of the newest unexpired analysis of the same input"""
+        for analysis_id, record in self._scan():
+            if record['content_hash'] == content_hash:
+                return analysis_id
+        return None
+
+    def purge_expired(self) -> int:
+        """
+        Remove expired analyses
+
+        Returns:
+            int: Number of analyses removed
+        """
+        removed = 0
+        now = time.time()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json'):
+                    continue
+                record = self._read(entry.path, check_expiry=False)
+                if record is None or record.get('expires_at', 0) <= now:
+                    try:
+                        os.unlink(entry.path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
+
+    def _read(self, path, check_expiry=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Unreadable analysis file {path}: {str(e)}")
+            return None
+
+        if 'data' not in record:
+            # Written before expiry metadata was stored; aged by modification time
+            record = {'user_id': None, 'content_hash': None,
+                      'expires_at': os.path.getmtime(path) + self.ttl, 'data': record}
+        if check_expiry and record['expires_at'] <= time.time():
+            return None
+        return record
+
+    def _scan(self):
+        records = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    record = self._read(entry.path)
+                    if record is not None:
+                        records.append((entry.name[:-len('.json')], record))
+        records.sort(key=lambda item: item[1]['expires_at'], reverse=True)
+        return records
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge >= Config.ANALYSIS_PURGE_INTERVAL:
+            self._last_purge = now
+            removed = self.purge_expired()
+            if removed:
+                self.logger.info(f"Purged {removed} expired analyses")
+
+
+class SQLAnalysisStore:
+    """
+    Analysis results in a SQL database shared by all instances
+
+    Works with SQLite and PostgreSQL through SQLAlchemy. Payloads are stored
+    as compressed compact JSON; id, user, content hash and expiry are indexed
+    columns. Expired rows are never returned and are deleted on the purge
+    interval.
+    """
+    name = 'sql'
+
+    def __init__(self, url=None, ttl=None):
+        global sa
+        if sa is None:
+            try:
+                import sqlalchemy as sa
+            except ImportError:
+                raise RuntimeError("SQLAlchemy is required for database analysis storage")
+
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl if ttl is not None else Config.ANALYSIS_TTL
+        self._last_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+        url = url or Config.ANALYSIS_STORE_URL
+        if url.startswith('postgres://'):
+            # Hosted Postgres URLs use the scheme SQLAlchemy no longer accepts
+            url = 'postgresql://' + url[len('postgres://'):]
+        self.engine = sa.create_engine(url, pool_pre_ping=True)
+
+        metadata = sa.MetaData()
+        self.table = sa.Table(
+            'analysis_results', metadata,
+            sa.Column('id', sa.String(36), primary_key=True),
+            sa.Column('user_id', sa.String(64), index=True),
+            sa.Column('content_hash', sa.String(64), index=True),
+            sa.Column('language', sa.String(8)),
+            sa.Column('created_at', sa.Float, nullable=False),
+            sa.Column('expires_at', sa.Float, nullable=False, index=True),
+            sa.Column('payload', sa.LargeBinary, nullable=False),
+        )
+        metadata.create_all(self.engine)
+        # Do not keep the connection create_all used: this may run in gunicorn's
+        # master before it forks, and workers must not share one socket
+        self.engine.dispose()
+
+    def save(self, analysis_id: str, data: Dict[str, Any], user_id: str = None, content_hash: str = None):
+        """
+        Store an analysis result
+
+        Args:
+            analysis_id (str): Analysis identifier
+            data (dict): Analysis with 'analysis', 'input_text' and 'language'
+            user_id (str): Owner of the analysis
+            content_hash (str): Hash of the analyzed input
+        """
+        now = time.time()
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.id == analysis_id))
+            connection.execute(self.table.insert().values(
+                id=analysis_id,
+                user_id=user_id,
+                content_hash=content_hash,
+                language=data.get('language'),
+                created_at=now,
+                expires_at=now + self.ttl,
+                payload=encode_payload(data),
+            ))
+        self._maybe_purge()
+
+    def load(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load an analysis result
+
+        Returns:
+            dict: Stored analysis, or None if it does not exist or has expired
+        """
+        query = sa.select(self.table.c.payload).where(
+            self.table.c.id == analysis_id,
+            self.table.c.expires_at > time.time()
+        )
+        with self.engine.connect() as connection:
+            payload = connection.execute(query).scalar()
+        return decode_payload(payload) if payload is not None else None
+
+    def delete(self, analysis_id: str):
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.id == analysis_id))
+
+    def find_by_user(self, user_id: str, limit: int = 20) -> List[str]:
+        """Ids of a user's unexpired analyses, newest first"""
+        query = (
+            sa.select(self.table.c.id)
+            .where(self.table.c.user_id == user_id, self.table.c.expires_at > time.time())
+            .order_by(self.table.c.created_at.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as connection:
+            return list(connection.execute(query).scalars())
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Id of the newest unexpired analysis of the same input"""
+        query = (
+            sa.select(self.table.c.id)
+            .where(self.table.c.content_hash == content_hash, self.table.c.expires_at > time.time())
+            .order_by(self.table.c.created_at.desc())
+            .limit(1)
+        )
+        with self.engine.connect() as connection:
+            return connection.execute(query).scalar()
+
+    def purge_expired(self) -> int:
+        """
+        Remove expired analyses
+
+        Returns:
+            int: Number of analyses removed
+        """
+        with self.engine.begin() as connection:
+            result = connection.execute(self.table.delete().where(self.table.c.expires_at <= time.time()))
+        return result.rowcount
+
+    def after_fork(self):
+        """Drop pooled connections inherited from the parent process, leaving them open for it"""
+        self.engine.dispose(close=False)
+
+    def _maybe_purge(self):
+        now = time.time()
+        with self._purge_lock:
+            if now - self._last_purge < Config.ANALYSIS_PURGE_INTERVAL:
+                return
+            self._last_purge = now
+
+        try:
+            removed = self.purge_expired()
+            if removed:
+                self.logger.info(f"Purged {removed} expired analyses")
+        except Exception as e:
+            self.logger.warning(f"Could not purge expired analyses: {str(e)}")
+
+
+class KVAnalysisStore:
+    """
+    Analysis results in the shared KV store
+
+    Payloads are compressed compact JSON stored with the TTL, so the KV store
+    expires them itself. The user and content hash lookups are kept as
+    secondary keys with the same TTL.
+    """
+    name = 'kv'
+
+    # Analyses remembered per user for find_by_user
+    USER_HISTORY = 50
+
+    def __init__(self, kv, ttl=None):
+        self.logger = logging.getLogger(__name__)
+        self.kv = kv
+        self.ttl = ttl if ttl is not None else Config.ANALYSIS_TTL
+
+    def save(self, analysis_id: str, data: Dict[str, Any], user_id: str = None, content_hash: str = None):
+        """
+        Store an analysis result
+
+        Args:
+            analysis_id (str): Analysis identifier
+            data (dict): Analysis with 'analysis', 'input_text' and 'language'
+            user_id (str): Owner of the analysis
+            content_hash (str): Hash of the analyzed input
+        """
+        self.kv.set(f"analysis:{analysis_id}", encode_payload(data), self.ttl)
+        if content_hash:
+            self.kv.set(f"analysis-hash:{content_hash}", analysis_id.encode('utf-8'), self.ttl)
+        if user_id:
+            history = self.kv.get_json(f"analysis-user:{user_id}") or []
+            history = [analysis_id] + [other for other in history if other != analysis_id]
+            self.kv.set_json(f"analysis-user:{user_id}", history[:self.USER_HISTORY], self.ttl)
+
+    def load(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load an analysis result
+
+        Returns:
+            dict: Stored analysis, or None if it does not exist or has expired
+        """
+        payload = self.kv.get(f"analysis:{analysis_id}")
+        return decode_payload(payload) if payload is not None else None
+
+    def delete(self, analysis_id: str):
+        self.kv.delete(f"analysis:{analysis_id}")
+
+    def find_by_user(self, user_id: str, limit: int = 20) -> List[str]:
+        """Ids of a user's unexpired analyses, newest first"""
+        history = self.kv.get_json(f"analysis-user:{user_id}") or []
+        return [analysis_id for analysis_id in history if self.kv.get(f"analysis:{analysis_id}") is not None][:limit]
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Id of the newest unexpired analysis of the same input"""
+        analysis_id = self.kv.get(f"analysis-hash:{content_hash}")
+        return analysis_id.decode('utf-8') if analysis_id is not None else None
+
+    def purge_expired(self) -> int:
+        """Entries expire in the KV store itself"""
+        return 0
+
+
+def get_analysis_store(url=None, kv=None):
+    """
+    Create the configured analysis store
+
+    Args:
+        url (str): SQLAlchemy database URL or 'kv' (defaults to ANALYSIS_STORE_URL);
+            empty selects the file store
+        kv (KVStore): Shared KV store for 'kv'
+
+    Returns:
+        SQLAnalysisStore, KVAnalysisStore or FileAnalysisStore
+    """
+    url = url if url is not None else Config.ANALYSIS_STORE_URL
+    if url == 'kv':
+        if kv is None:
+            from services.kv_store import get_kv_store
+            kv = get_kv_store()
+        return KVAnalysisStore(kv)
+    if url:
+        return SQLAnalysisStore(url)
+    return FileAnalysisStore()
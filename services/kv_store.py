@@ -0,0 +1,172 @@
+import abc
+import importlib.util
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from config import Config
+
+# redis is optional and only imported by RedisKVStore, when KV_STORE_URL
+# points at a Redis server
+REDIS_AVAILABLE = importlib.util.find_spec('redis') is not None
+
+
+class KVStore(abc.ABC):
+    """
+    Shared key-value tier used across gunicorn workers and instances
+
+    Values are bytes with an optional TTL in seconds. Failures are logged and
+    behave like a miss, so an unavailable store degrades to per-process state
+    instead of failing requests.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored value, or None when missing, expired or unreachable"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        """Store a value, expiring after ttl seconds when given"""
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        """Remove a key; missing keys are ignored"""
+
+    def get_json(self, key: str) -> Any:
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value: Any, ttl: Optional[int] = None):
+        self.set(key, json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), ttl)
+
+    def after_fork(self):
+        """Forget connections inherited from a parent process; called in each forked worker"""
+
+
+class RedisKVStore(KVStore):
+    """KV store on a Redis (or Redis protocol compatible) server"""
+    name = 'redis'
+
+    def __init__(self, url):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("The redis package is required for a Redis KV store")
+        import redis
+
+        self.logger = logging.getLogger(__name__)
+        self.client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+
+    def get(self, key):
+        try:
+            return self.client.get(key)
+        except Exception as e:
+            self.logger.warning(f"KV get failed for {key}: {str(e)}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.client.set(key, value, ex=int(ttl) if ttl else None)
+        except Exception as e:
+            self.logger.warning(f"KV set failed for {key}: {str(e)}")
+
+    def delete(self, key):
+        try:
+            self.client.delete(key)
+        except Exception as e:
+            self.logger.warning(f"KV delete failed for {key}: {str(e)}")
+
+    def after_fork(self):
+        # Drop the parent's sockets without closing them under the parent
+        self.client.connection_pool.reset()
+
+
+class SQLiteKVStore(KVStore):
+    """
+    Embedded KV store in a local SQLite file
+
+    Stand-in for Redis on a single box: every worker process opens the same
+    database file in WAL mode, so readers never block the writer. Each thread
+    uses its own connection, reopened after a fork.
+    """
+    name = 'sqlite'
+
+    # Expired rows are deleted on every PURGE_EVERY-th write
+    PURGE_EVERY = 500
+
+    def __init__(self, path=None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path or Config.KV_STORE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS kv_expires_at ON kv (expires_at)")
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+            return bytes(row[0]) if row else None
+        except sqlite3.Error as e:
+            self.logger.warning(f"KV get failed for {key}: {str(e)}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(value), time.time() + ttl if ttl else None)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            self.logger.warning(f"KV set failed for {key}: {str(e)}")
+
+    def delete(self, key):
+        try:
+            self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"KV delete failed for {key}: {str(e)}")
+
+
+def get_kv_store(url=None):
+    """
+    Create the configured KV store
+
+    Args:
+        url (str): redis:// or rediss:// URL (defaults to KV_STORE_URL); empty
+            selects the embedded SQLite store at KV_STORE_PATH
+
+    Returns:
+        RedisKVStore or SQLiteKVStore
+    """
+    logger = logging.getLogger(__name__)
+    url = url if url is not None else Config.KV_STORE_URL
+
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        if REDIS_AVAILABLE:
+            return RedisKVStore(url)
+        logger.warning("redis is not installed, falling back to the local SQLite KV store")
+
+    return SQLiteKVStore()
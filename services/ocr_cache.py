@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import Config
+
+
+class OCRCache:
+    """
+    In-process LRU cache of OCR results keyed by image content
+
+    The exact key is a SHA-256 of the decoded pixels, so the same drawing saved
+    with different metadata or compression still hits. With perceptual matching
+    enabled, a difference hash of the downsampled sheet also lets re-exported
+    copies of a drawing hit when they are within a small Hamming distance.
+
+    With a shared KV store, exact-hash text results are also published there
+    so that other workers and instances reuse them; perceptual matching and
+    non-text values stay in process.
+    """
+
+    # Difference hash grid; drawings share frames and title blocks, so a coarse
+    # 8x8 hash would collide between different sheets
+    HASH_SIZE = 16
+
+    def __init__(self, max_entries=None, perceptual=None, max_distance=None, shared=None):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries if max_entries is not None else Config.OCR_CACHE_SIZE
+        self.perceptual = perceptual if perceptual is not None else Config.OCR_CACHE_PERCEPTUAL
+        self.max_distance = max_distance if max_distance is not None else Config.OCR_CACHE_MAX_DISTANCE
+        self.shared = shared
+
+        self._entries = OrderedDict()  # (content_hash, params) -> (perceptual_hash, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, image) -> Tuple[str, Optional[int]]:
+        """
+        Compute the cache fingerprint of a decoded image
+
+        Args:
+            image (PIL.Image): Decoded image
+
+        Returns:
+            tuple: (content hash, perceptual hash or None)
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}:{image.width}x{image.height}:".encode())
+        digest.update(image.tobytes())
+
+        phash = self.perceptual_hash(image) if self.perceptual else None
+        return digest.hexdigest(), phash
+
+    def perceptual_hash(self, image) -> int:
+        """
+        Difference hash of the image
+
+        Args:
+            image (PIL.Image): Decoded image
+
+        Returns:
+            int: HASH_SIZE * HASH_SIZE bit hash
+        """
+        size = self.HASH_SIZE
+        pixels = list(image.convert('L').resize((size + 1, size)).getdata())
+
+        value = 0
+        for row in range(size):
+            offset = row * (size + 1)
+            for col in range(size):
+                value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+        return value
+
+    def get(self, fingerprint, params):
+        """
+        Look up cached OCR text (or another per-image OCR result)
+
+        Args:
+            fingerprint (tuple): Result of fingerprint()
+            params (tuple): OCR language, config and mode the text was produced with
+
+        Returns:
+            Cached value or None on a miss
+        """
+        content_hash, phash = fingerprint
+        with self._lock:
+            key = (content_hash, params)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            elif phash is not None:
+                entry = self._find_similar(phash, params)
+
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+
+        if self.shared is not None:
+            text = self.shared.get(self._shared_key(content_hash, params))
+            if text is not None:
+                text = text.decode('utf-8')
+                self._store(fingerprint, params, text)
+                with self._lock:
+                    self.hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, fingerprint, params, text):
+        """
+        Store OCR text, evicting the least recently used entries
+
+        Args:
+            fingerprint (tuple): Result of fingerprint()
+            params (tuple): OCR language, config and mode the text was produced with
+            text: Extracted text, or another value derived from the image
+        """
+        if self.shared is not None and isinstance(text, str):
+            self.shared.set(self._shared_key(fingerprint[0], params), text.encode('utf-8'), Config.ANALYSIS_TTL)
+        self._store(fingerprint, params, text)
+
+    def _store(self, fingerprint, params, text):
+        if self.max_entries <= 0:
+            return
+
+        content_hash, phash = fingerprint
+        with self._lock:
+            key = (content_hash, params)
+            self._entries[key] = (phash, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _shared_key(content_hash, params):
+        return f"ocr:{content_hash}:{hashlib.sha256(repr(params).encode('utf-8')).hexdigest()[:16]}"
+
+    def _find_similar(self, phash, params):
+        """Find the closest entry by perceptual hash; caller holds the lock"""
+        best_key, best_distance = None, self.max_distance + 1
+        for key, (other, _text) in self._entries.items():
+            if other is None or key[1] != params:
+                continue
+            distance = (phash ^ other).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+
+        if best_key is None:
+            return None
+
+        self.logger.debug(f"Perceptual OCR cache hit at distance {best_distance}")
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key]
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,196 @@
+import logging
+import re
+import threading
+
+import pytesseract
+from pytesseract import Output
+
+from config import Config
+
+try:
+    import tesserocr
+except ImportError:  # C API bindings are optional, pytesseract is the fallback
+    tesserocr = None
+
+
+class PytesseractEngine:
+    """
+    OCR backend that runs the tesseract CLI through pytesseract
+
+    Every call writes a temporary image and starts a new tesseract process,
+    which reloads the traineddata each time.
+    """
+    name = 'pytesseract'
+
+    def image_to_string(self, image, lang, config):
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+
+    def image_to_data(self, image, lang, config):
+        """
+        Word-level recognition results
+
+        Returns:
+            list: dicts with text, box (left, top, right, bottom), conf and
+            line (block, paragraph, line numbers)
+        """
+        data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=Output.DICT)
+        words = []
+        for i, text in enumerate(data['text']):
+            text = (text or '').strip()
+            conf = float(data['conf'][i])
+            if not text or conf < 0:
+                continue
+            left, top = data['left'][i], data['top'][i]
+            words.append({
+                'text': text,
+                'box': (left, top, left + data['width'][i], top + data['height'][i]),
+                'conf': conf,
+                'line': (data['block_num'][i], data['par_num'][i], data['line_num'][i]),
+            })
+        return words
+
+    def detect_script(self, image):
+        """
+        Run tesseract orientation and script detection (needs osd.traineddata)
+
+        Returns:
+            dict: script, script_conf, rotate (clockwise degrees to make the
+            page upright) and orientation_conf
+        """
+        osd = pytesseract.image_to_osd(image, config='--psm 0', output_type=Output.DICT)
+        return {
+            'script': osd['script'],
+            'script_conf': float(osd['script_conf']),
+            'rotate': int(osd['rotate']),
+            'orientation_conf': float(osd['orientation_conf']),
+        }
+
+    def is_available(self):
+        try:
+            pytesseract.get_tesseract_version()
+            return True
+        except Exception:
+            return False
+
+
+class TesserocrEngine:
+    """
+    OCR backend that keeps initialized tesseract engines in memory
+
+    One engine per thread and language set is created on first use and reused
+    for every later image, which is fed from memory without a temp file.
+    tesserocr releases the GIL while recognizing, so OCR worker threads run
+    in parallel.
+    """
+    name = 'tesserocr'
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._fallback = PytesseractEngine()
+
+    def _get_api(self, lang):
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+
+        api = apis.get(lang)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.DEFAULT)
+            apis[lang] = api
+            self.logger.info(f"Initialized in-process tesseract engine for '{lang}'")
+        return api
+
+    def detect_script(self, image):
+        """Orientation and script detection through a per-thread OSD engine"""
+        try:
+            api = getattr(self._local, 'osd_api', None)
+            if api is None:
+                api = self._local.osd_api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.OSD_ONLY, lang='osd')
+            api.SetImage(image)
+            osd = api.DetectOrientationScript()
+            if not osd:
+                raise RuntimeError("orientation and script detection found no text")
+        except Exception as e:
+            self.logger.warning(f"In-process OSD failed, falling back to pytesseract: {str(e)}")
+            return self._fallback.detect_script(image)
+
+        return {
+            'script': osd['script_name'],
+            'script_conf': float(osd['script_conf']),
+            'rotate': (360 - osd['orient_deg']) % 360,
+            'orientation_conf': float(osd['orient_conf']),
+        }
+
+    def image_to_data(self, image, lang, config):
+        """Word-level recognition results in the same shape as PytesseractEngine"""
+        try:
+            api = self._prepare(image, lang, config)
+            api.Recognize()
+
+            words = []
+            block = paragraph = line = 0
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(api.GetIterator(), level):
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block += 1
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    paragraph += 1
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+
+                text = (word.GetUTF8Text(level) or '').strip()
+                if text:
+                    words.append({
+                        'text': text,
+                        'box': tuple(word.BoundingBox(level)),
+                        'conf': float(word.Confidence(level)),
+                        'line': (block, paragraph, line),
+                    })
+            return words
+        except Exception as e:
+            self.logger.warning(f"In-process OCR failed, falling back to pytesseract: {str(e)}")
+            return self._fallback.image_to_data(image, lang, config)
+
+    def _prepare(self, image, lang, config):
+        api = self._get_api(lang)
+        psm = re.search(r'--psm\s+(\d+)', config or '')
+        api.SetPageSegMode(int(psm.group(1)) if psm else tesserocr.PSM.AUTO)
+        api.SetImage(image)
+        return api
+
+    def image_to_string(self, image, lang, config):
+        try:
+            return self._prepare(image, lang, config).GetUTF8Text()
+        except Exception as e:
+            self.logger.warning(f"In-process OCR failed, falling back to pytesseract: {str(e)}")
+            return self._fallback.image_to_string(image, lang, config)
+
+    def is_available(self):
+        try:
+            tesserocr.tesseract_version()
+            return True
+        except Exception:
+            return False
+
+
+def get_engine(name=None):
+    """
+    Create the configured OCR backend
+
+    Args:
+        name (str): 'auto', 'tesserocr' or 'pytesseract' (defaults to OCR_ENGINE)
+
+    Returns:
+        OCR engine instance; pytesseract when the C API bindings are missing
+    """
+    logger = logging.getLogger(__name__)
+    name = name or Config.OCR_ENGINE
+
+    if name in ('auto', 'tesserocr'):
+        if tesserocr is not None:
+            return TesserocrEngine()
+        if name == 'tesserocr':
+            logger.warning("tesserocr is not installed, falling back to pytesseract")
+
+    return PytesseractEngine()
@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from config import Config
+from utils.text_utils import estimate_tokens
+
+# Symbols that carry meaning on drawings even as standalone tokens
+MEANINGFUL_SYMBOLS = set('Ø⌀±°%×=<>≤≥~√∅+-')
+
+
+@dataclass
+class OCRWord:
+    """A word recognized by tesseract with its position and confidence"""
+    text: str
+    box: Tuple[int, int, int, int]  # (left, top, right, bottom) in page coordinates
+    confidence: float  # 0-100
+    line: Tuple[int, ...]  # words sharing this key are on the same text line
+    page: int = 1
+
+
+@dataclass
+class OCRResult:
+    """
+    Word-level OCR output of a document
+
+    The raw text keeps every recognized word. The prompt rendering drops
+    low-confidence words, linework noise and repeated tokens so that hatching
+    and frame lines do not end up in the LLM prompt.
+    """
+    words: List[OCRWord] = field(default_factory=list)
+    min_confidence: float = field(default_factory=lambda: Config.OCR_MIN_CONFIDENCE)
+
+    @property
+    def raw_text(self) -> str:
+        """All recognized words, one text line per line"""
+        return self._render(self.words)
+
+    def filtered_words(self) -> List[OCRWord]:
+        """
+        Words that pass the confidence threshold and noise filters
+
+        Returns:
+            list: OCRWord objects in reading order
+        """
+        words = []
+        previous = None
+        for word in self.words:
+            if word.confidence < self.min_confidence:
+                continue
+
+            # Runs of dashes, dots and slashes are linework read as text
+            if not any(ch.isalnum() for ch in word.text) and word.text not in MEANINGFUL_SYMBOLS:
+                continue
+
+            # "45 45 45" along a dimension chain collapses to one token
+            if previous is not None and previous.line == word.line and previous.text == word.text:
+                continue
+
+            words.append(word)
+            previous = word
+        return words
+
+    def to_prompt(self) -> str:
+        """
+        Compact, prompt-ready rendering of the filtered words
+
+        Returns:
+            str: Text lines in reading order with repeated lines removed
+        """
+        return self._render(self.filtered_words(), dedupe_lines=True)
+
+    @property
+    def raw_tokens(self) -> int:
+        return estimate_tokens(self.raw_text)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return estimate_tokens(self.to_prompt())
+
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated prompt tokens saved by the compact rendering over the raw text"""
+        return self.raw_tokens - self.prompt_tokens
+
+    def to_dict(self):
+        """Serializable summary of the result"""
+        return {
+            'words': len(self.words),
+            'kept_words': len(self.filtered_words()),
+            'min_confidence': self.min_confidence,
+            'raw_tokens': self.raw_tokens,
+            'prompt_tokens': self.prompt_tokens,
+            'tokens_saved': self.tokens_saved,
+        }
+
+    @staticmethod
+    def _render(words, dedupe_lines=False):
+        lines = []
+        current_key, current = None, []
+        for word in words:
+            key = (word.page, word.line)
+            if key != current_key and current:
+                lines.append(' '.join(current))
+                current = []
+            current_key = key
+            current.append(word.text)
+        if current:
+            lines.append(' '.join(current))
+
+        if dedupe_lines:
+            seen = set()
+            unique = []
+            for line in lines:
+                normalized = line.lower()
+                if normalized not in seen:
+                    seen.add(normalized)
+                    unique.append(line)
+            lines = unique
+
+        return '\n'.join(lines)
@@ -1,92 +1,652 @@
 import logging
-import pytesseract
-from PIL import Image
+import math
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+import pypdfium2 as pdfium
+from PIL import Image, ImageSequence
 import os
 
+from config import Config
+from services.ocr_cache import OCRCache
+from services.ocr_engine import get_engine
+from services.ocr_result import OCRResult, OCRWord
+from utils.text_utils import estimate_tokens, truncate_to_tokens
+
+# Shared pools for page and region/tile OCR. Both engines run recognition
+# outside the GIL (a child process or the tesserocr C API), so threads keep
+# all cores busy. Pages and regions use separate pools because page tasks
+# wait on region tasks.
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor(name, max_workers):
+    with _executor_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'ocr-{name}')
+        return _executors[name]
+
+
 class OCRService:
-    def __init__(self):
+    MODES = ('page', 'regions', 'tiles')
+
+    # Tesseract models for scripts reported by orientation and script detection
+    SCRIPT_LANGUAGES = {'Cyrillic': 'rus', 'Latin': 'eng'}
+
+    # Text region detection works on a downsampled copy of the sheet
+    DETECTION_WIDTH = 1600
+    DETECTION_CELL = 16
+
+    # Title block (GOST 2.104) sits in the bottom-right corner of the sheet
+    TITLE_BLOCK_ZONE = (0.55, 0.75)  # (x, y) fractions of width and height
+
+    def __init__(self, mode=None, max_workers=None, shared_cache=None):
         self.logger = logging.getLogger(__name__)
-        
+
         # Configure tesseract for Russian and English languages
         self.languages = 'rus+eng'
-        
-    def extract_text(self, image_path):
+        self.config = '--oem 3 --psm 6'  # Use LSTM OCR Engine Mode with uniform block of text
+
+        self.mode = mode or Config.OCR_MODE
+        if self.mode not in self.MODES:
+            self.logger.warning(f"Unknown OCR mode '{self.mode}', falling back to 'page'")
+            self.mode = 'page'
+        self.max_workers = max_workers or Config.OCR_WORKERS
+        self.tile_size = Config.OCR_TILE_SIZE
+        self.tile_overlap = Config.OCR_TILE_OVERLAP
+        self.cache = OCRCache(shared=shared_cache)
+        self.engine = get_engine()
+
+    def extract_text(self, image_path, mode=None, max_pages=None, token_budget=None, content_hash=None):
         """
-        Extract text from image using OCR
-        
+        Extract text from an image or a multi-page PDF/TIFF drawing set
+
         Args:
-            image_path (str): Path to the image file
-            
+            image_path (str or file): Path to the image or document file, or a
+                readable binary file object holding it
+            mode (str): 'page', 'regions' or 'tiles' (defaults to the service mode)
+            max_pages (int): Stop after this many pages (defaults to OCR_MAX_PAGES)
+            token_budget (int): Stop once the text reaches this many prompt tokens
+                (defaults to OCR_TOKEN_BUDGET)
+            content_hash (str): Hash of the raw file bytes, if already known;
+                a cache hit on it skips decoding the file altogether
+
         Returns:
             str: Extracted text or empty string if no text found
         """
         try:
-            if not os.path.exists(image_path):
-                self.logger.error(f"Image file not found: {image_path}")
-                return ""
-            
-            # Open and process image
-            with Image.open(image_path) as image:
-                # Convert to RGB if necessary
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                
-                # Extract text using tesseract
-                text = pytesseract.image_to_string(
-                    image, 
-                    lang=self.languages,
-                    config='--oem 3 --psm 6'  # Use LSTM OCR Engine Mode with uniform block of text
+            mode = mode or self.mode
+            max_pages = max_pages if max_pages is not None else Config.OCR_MAX_PAGES
+            token_budget = token_budget if token_budget is not None else Config.OCR_TOKEN_BUDGET
+
+            if content_hash:
+                fingerprint = (f"file:{content_hash}", None)
+                params = self._cache_params(mode) + (
+                    Config.OCR_SCRIPT_DETECTION, Config.OCR_PDF_DPI, max_pages, token_budget
                 )
-                
-                # Clean up the extracted text
-                cleaned_text = self._clean_text(text)
-                
-                self.logger.info(f"Successfully extracted {len(cleaned_text)} characters from image")
-                return cleaned_text
-                
+                cached_text = self.cache.get(fingerprint, params)
+                if cached_text is not None:
+                    self.logger.info(f"OCR cache hit on file hash, {len(cached_text)} characters")
+                    return cached_text
+
+            texts = [
+                text for _page, text in self.iter_pages(
+                    image_path, mode=mode, max_pages=max_pages, token_budget=token_budget
+                ) if text
+            ]
+            extracted_text = '\n\n'.join(texts)
+
+            if content_hash:
+                self.cache.set(fingerprint, params, extracted_text)
+            return extracted_text
+
         except Exception as e:
             self.logger.error(f"Error during OCR processing: {str(e)}")
             return ""
-    
+
+    def iter_pages(self, image_path, mode=None, dpi=None, max_pages=None, token_budget=None):
+        """
+        OCR a document page by page
+
+        Pages are rasterized one at a time and at most max_workers of them are
+        in flight, so memory stays bounded however long the document is.
+
+        Args:
+            image_path (str or file): Path to the image or document file, or a
+                readable binary file object holding it
+            mode (str): 'page', 'regions' or 'tiles' (defaults to the service mode)
+            dpi (int): Rasterization resolution for PDF pages (defaults to OCR_PDF_DPI)
+            max_pages (int): Stop after this many pages (defaults to OCR_MAX_PAGES, 0 for no limit)
+            token_budget (int): Stop once the text reaches this many prompt tokens
+                (defaults to OCR_TOKEN_BUDGET, 0 for no limit)
+
+        Yields:
+            tuple: (page number starting at 1, cleaned page text)
+        """
+        if isinstance(image_path, (str, os.PathLike)) and not os.path.exists(image_path):
+            self.logger.error(f"Image file not found: {image_path}")
+            return
+
+        mode = mode or self.mode
+        dpi = dpi or Config.OCR_PDF_DPI
+        max_pages = max_pages if max_pages is not None else Config.OCR_MAX_PAGES
+        token_budget = token_budget if token_budget is not None else Config.OCR_TOKEN_BUDGET
+
+        page_images = self._iter_page_images(image_path, dpi)
+        pages = enumerate(islice(page_images, max_pages or None), 1)
+        executor = _get_executor('pages', self.max_workers)
+        pending = deque()
+        tokens_used = 0
+
+        try:
+            while True:
+                # Keep the workers busy without rasterizing the whole document
+                while len(pending) < self.max_workers:
+                    page = next(pages, None)
+                    if page is None:
+                        break
+                    page_number, image = page
+                    pending.append((page_number, executor.submit(self._extract_image, image, mode)))
+
+                if not pending:
+                    return
+
+                page_number, future = pending.popleft()
+                text = future.result()
+
+                if token_budget:
+                    remaining = token_budget - tokens_used
+                    tokens_used += estimate_tokens(text)
+                    if tokens_used >= token_budget:
+                        self.logger.info(f"OCR token budget of {token_budget} reached at page {page_number}")
+                        yield page_number, truncate_to_tokens(text, remaining)
+                        return
+
+                yield page_number, text
+        finally:
+            for _page_number, future in pending:
+                future.cancel()
+            page_images.close()
+
+    def extract_structured(self, image_path, mode=None, dpi=None, max_pages=None, min_confidence=None):
+        """
+        Extract word-level OCR results with positions and confidences
+
+        Args:
+            image_path (str or file): Path to the image or document file, or a
+                readable binary file object holding it
+            mode (str): 'page', 'regions' or 'tiles' (defaults to the service mode)
+            dpi (int): Rasterization resolution for PDF pages (defaults to OCR_PDF_DPI)
+            max_pages (int): Stop after this many pages (defaults to OCR_MAX_PAGES, 0 for no limit)
+            min_confidence (float): Word confidence threshold for the prompt
+                rendering (defaults to OCR_MIN_CONFIDENCE)
+
+        Returns:
+            OCRResult: Words of all pages; use to_prompt() for LLM input
+        """
+        mode = mode or self.mode
+        max_pages = max_pages if max_pages is not None else Config.OCR_MAX_PAGES
+        result = OCRResult(min_confidence=min_confidence if min_confidence is not None else Config.OCR_MIN_CONFIDENCE)
+
+        page_images = self._iter_page_images(image_path, dpi or Config.OCR_PDF_DPI)
+        try:
+            for page_number, image in enumerate(islice(page_images, max_pages or None), 1):
+                languages, rotate = self._detect_languages(image, self.cache.fingerprint(image))
+                if rotate:
+                    image = image.rotate(-rotate, expand=True, fillcolor='white')
+                for word in self._extract_words(image, mode, languages):
+                    word.page = page_number
+                    result.words.append(word)
+        finally:
+            page_images.close()
+
+        self.logger.info(f"Structured OCR: {result.to_dict()}")
+        return result
+
+    def _iter_page_images(self, image_path, dpi):
+        """
+        Yield the pages of an image, multi-page TIFF or PDF as RGB images
+
+        Args:
+            image_path (str or file): Path to the file or a readable binary file object
+            dpi (int): Rasterization resolution for PDF pages
+
+        Yields:
+            PIL.Image: One decoded page at a time
+        """
+        if isinstance(image_path, (str, os.PathLike)):
+            with open(image_path, 'rb') as f:
+                is_pdf = f.read(5) == b'%PDF-'
+        else:
+            image_path.seek(0)
+            is_pdf = image_path.read(5) == b'%PDF-'
+            image_path.seek(0)
+
+        if is_pdf:
+
+            pdf = pdfium.PdfDocument(image_path)
+            try:
+                for index in range(len(pdf)):
+                    page = pdf[index]
+                    try:
+                        # Nothing upstream bounds a PDF page's size, so keep its
+                        # bitmap within the pixel limit raster uploads have
+                        scale = dpi / 72
+                        width, height = page.get_size()
+                        limit = Config.UPLOAD_MAX_PIXELS
+                        if math.ceil(width * scale) * math.ceil(height * scale) > limit:
+                            # Largest scale with (width*scale + 1) * (height*scale + 1) <= limit,
+                            # which covers pdfium rounding the bitmap size up
+                            scale = (math.sqrt((width + height) ** 2 + 4 * width * height * (limit - 1))
+                                     - (width + height)) / (2 * width * height)
+                            self.logger.warning(
+                                f"PDF page {index + 1} is {width:.0f} x {height:.0f} pt, "
+                                f"rendering at {scale * 72:.1f} dpi instead of {dpi}"
+                            )
+                        bitmap = page.render(scale=scale)
+                        image = bitmap.to_pil().convert('RGB')
+                        bitmap.close()
+                    finally:
+                        page.close()
+                    yield image
+            finally:
+                pdf.close()
+            return
+
+        # Open and process image; TIFF frames are decoded one at a time
+        with Image.open(image_path) as image:
+            for frame in ImageSequence.Iterator(image):
+                # Convert to RGB if necessary (also detaches the frame)
+                yield frame.convert('RGB')
+
+    def _extract_image(self, image, mode):
+        """
+        OCR one decoded page
+
+        Args:
+            image (PIL.Image): RGB page image
+            mode (str): 'page', 'regions' or 'tiles'
+
+        Returns:
+            str: Cleaned text of the page
+        """
+        try:
+            # Identical drawings are re-uploaded often; skip OCR for them
+            fingerprint = self.cache.fingerprint(image)
+            languages, rotate = self._detect_languages(image, fingerprint)
+            params = self._cache_params(mode, languages)
+            cached_text = self.cache.get(fingerprint, params)
+            if cached_text is not None:
+                self.logger.info(f"OCR cache hit, {len(cached_text)} characters")
+                return cached_text
+
+            if rotate:
+                image = image.rotate(-rotate, expand=True, fillcolor='white')
+
+            if Config.OCR_STRUCTURED_OUTPUT:
+                result = OCRResult(self._extract_words(image, mode, languages), Config.OCR_MIN_CONFIDENCE)
+                cleaned_text = result.to_prompt()
+                self.logger.info(
+                    f"Kept {len(result.filtered_words())} of {len(result.words)} words, "
+                    f"saving ~{result.tokens_saved} of {result.raw_tokens} prompt tokens"
+                )
+            elif mode == 'regions':
+                cleaned_text = self._extract_regions(image, languages)
+            elif mode == 'tiles':
+                cleaned_text = self._extract_tiles(image, languages)
+            else:
+                cleaned_text = self._clean_text(self._recognize(image, languages))
+
+            self.cache.set(fingerprint, params, cleaned_text)
+            self.logger.info(f"Successfully extracted {len(cleaned_text)} characters from image ({mode} mode)")
+            return cleaned_text
+
+        except Exception as e:
+            self.logger.error(f"Error during OCR processing: {str(e)}")
+            return ""
+
+    def _cache_params(self, mode, languages=None):
+        """OCR settings that affect the extracted text and so belong in cache keys"""
+        structured = (Config.OCR_STRUCTURED_OUTPUT, Config.OCR_MIN_CONFIDENCE)
+        return (languages or self.languages, self.config, mode, self.tile_size, self.tile_overlap) + structured
+
+    def _detect_languages(self, image, fingerprint):
+        """
+        Pick the tesseract models for a page from a script detection pre-pass
+
+        Evaluating both rus and eng LSTM models roughly doubles recognition
+        time, so with OCR_SCRIPT_DETECTION a page whose script clearly wins
+        (OCR_SCRIPT_MIN_CONF) uses that one of the configured models; any
+        doubt keeps the configured pair. With OCR_AUTO_ROTATE the same pass
+        also reports the rotation that makes the page upright. Detection runs
+        on a downsampled copy and its raw result is cached by image hash.
+
+        Args:
+            image (PIL.Image): RGB page image
+            fingerprint (tuple): Cache fingerprint of the image
+
+        Returns:
+            tuple: (tesseract languages, clockwise rotation to apply in degrees)
+        """
+        if not (Config.OCR_SCRIPT_DETECTION or Config.OCR_AUTO_ROTATE):
+            return self.languages, 0
+
+        osd = self.cache.get(fingerprint, ('osd', 2))
+        if osd is None:
+            try:
+                small = image.convert('L')
+                small.thumbnail((Config.OCR_OSD_MAX_SIDE, Config.OCR_OSD_MAX_SIDE))
+                osd = self.engine.detect_script(small)
+            except Exception as e:
+                # Too little text for OSD, or no osd.traineddata installed
+                self.logger.debug(f"Script detection failed, using '{self.languages}': {str(e)}")
+                osd = {}
+            self.cache.set(fingerprint, ('osd', 2), osd)
+        if not osd:
+            return self.languages, 0
+
+        languages, rotate = self.languages, 0
+        detected = self.SCRIPT_LANGUAGES.get(osd['script'])
+        if (Config.OCR_SCRIPT_DETECTION and osd['script_conf'] >= Config.OCR_SCRIPT_MIN_CONF
+                and detected in self.languages.split('+')):
+            languages = detected
+        if Config.OCR_AUTO_ROTATE and osd['orientation_conf'] >= Config.OCR_ROTATE_MIN_CONF:
+            rotate = osd['rotate']
+
+        self.logger.info(
+            f"Detected script {osd['script']} ({osd['script_conf']:.1f}), "
+            f"rotation {osd['rotate']} ({osd['orientation_conf']:.1f}), using '{languages}', rotating {rotate}"
+        )
+        return languages, rotate
+
+    def _recognize(self, image, languages=None, config=None):
+        """Run tesseract over a single image"""
+        return self.engine.image_to_string(image, languages or self.languages, config or self.config)
+
+    def _extract_regions(self, image, languages=None):
+        """
+        OCR only the text-dense regions of a drawing, in parallel
+
+        Args:
+            image (PIL.Image): Full sheet image
+            languages (str): Tesseract languages (defaults to the service languages)
+
+        Returns:
+            str: Region texts merged in reading order, title block first
+        """
+        boxes = self._detect_text_regions(image)
+        if not boxes:
+            self.logger.info("No text regions detected, falling back to whole page OCR")
+            return self._clean_text(self._recognize(image, languages))
+
+        boxes = self._order_boxes(boxes, image.size)
+        texts = self._recognize_boxes(image, boxes, languages)
+
+        return '\n'.join(text for text in (self._clean_text(t) for t in texts) if text)
+
+    def _extract_tiles(self, image, languages=None):
+        """
+        OCR the sheet as overlapping tiles, in parallel
+
+        Args:
+            image (PIL.Image): Full sheet image
+            languages (str): Tesseract languages (defaults to the service languages)
+
+        Returns:
+            str: Tile texts merged in reading order, title block first
+        """
+        boxes = self._order_boxes(self._tile_boxes(*image.size), image.size)
+        # Tiles cut through arbitrary content, so let tesseract segment them
+        texts = self._recognize_boxes(image, boxes, languages, config='--oem 3 --psm 3')
+
+        # Overlapping tiles read the same lines twice; keep the first occurrence
+        seen = set()
+        lines = []
+        for text in texts:
+            for line in text.split('\n'):
+                line = line.strip()
+                key = ' '.join(line.split()).lower()
+                if key and key not in seen:
+                    seen.add(key)
+                    lines.append(line)
+
+        return '\n'.join(text for text in (self._clean_text(line) for line in lines) if text)
+
+    def _extract_words(self, image, mode, languages=None):
+        """
+        Word-level OCR of one page in the given mode
+
+        Args:
+            image (PIL.Image): RGB page image
+            mode (str): 'page', 'regions' or 'tiles'
+            languages (str): Tesseract languages (defaults to the service languages)
+
+        Returns:
+            list: OCRWord objects in reading order, boxes in page coordinates
+        """
+        if mode == 'page':
+            return self._recognize_words(image, languages)
+
+        if mode == 'regions':
+            boxes = self._detect_text_regions(image)
+            if not boxes:
+                return self._recognize_words(image, languages)
+            config = None
+        else:
+            boxes = self._tile_boxes(*image.size)
+            config = '--oem 3 --psm 3'
+        boxes = self._order_boxes(boxes, image.size)
+
+        crops = [image.crop(box) for box in boxes]
+        def recognize(index):
+            return self._recognize_words(crops[index], languages, config, boxes[index][:2], (index,))
+
+        if len(crops) == 1 or self.max_workers <= 1:
+            results = [recognize(index) for index in range(len(crops))]
+        else:
+            results = list(_get_executor('regions', self.max_workers).map(recognize, range(len(crops))))
+
+        words = []
+        seen = {}  # text -> boxes already kept, to drop words read twice in tile overlaps
+        for word in (word for region_words in results for word in region_words):
+            if any(self._overlap(word.box, other) > 0.5 for other in seen.get(word.text, ())):
+                continue
+            seen.setdefault(word.text, []).append(word.box)
+            words.append(word)
+        return words
+
+    def _recognize_words(self, image, languages=None, config=None, offset=(0, 0), line_prefix=()):
+        """Run word-level tesseract over a single image, shifting boxes by offset"""
+        dx, dy = offset
+        return [
+            OCRWord(
+                text=word['text'],
+                box=(word['box'][0] + dx, word['box'][1] + dy, word['box'][2] + dx, word['box'][3] + dy),
+                confidence=word['conf'],
+                line=line_prefix + word['line'],
+            )
+            for word in self.engine.image_to_data(image, languages or self.languages, config or self.config)
+        ]
+
+    @staticmethod
+    def _overlap(a, b):
+        """Intersection area over the smaller of two boxes"""
+        width = min(a[2], b[2]) - max(a[0], b[0])
+        height = min(a[3], b[3]) - max(a[1], b[1])
+        if width <= 0 or height <= 0:
+            return 0.0
+        smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+        return width * height / max(smaller, 1)
+
+    def _recognize_boxes(self, image, boxes, languages=None, config=None):
+        """OCR crops of the image across the shared worker pool, preserving order"""
+        crops = [image.crop(box) for box in boxes]
+        if len(crops) == 1 or self.max_workers <= 1:
+            return [self._recognize(crop, languages, config) for crop in crops]
+
+        executor = _get_executor('regions', self.max_workers)
+        return list(executor.map(lambda crop: self._recognize(crop, languages, config), crops))
+
+    def _detect_text_regions(self, image):
+        """
+        Find text-dense regions of a drawing
+
+        Text differs from linework by having ink transitions in both directions
+        within a small cell, while straight lines only have them across one axis.
+
+        Args:
+            image (PIL.Image): Full sheet image
+
+        Returns:
+            list: Bounding boxes (left, top, right, bottom) in image coordinates
+        """
+        gray = image.convert('L')
+        scale = min(1.0, self.DETECTION_WIDTH / gray.width)
+        if scale < 1.0:
+            gray = gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))))
+
+        cell = self.DETECTION_CELL
+        ink = np.asarray(gray) < 128
+        rows, cols = ink.shape[0] // cell, ink.shape[1] // cell
+        if rows == 0 or cols == 0:
+            return []
+        ink = ink[:rows * cell, :cols * cell]
+
+        horizontal = np.zeros_like(ink)
+        horizontal[:, 1:] = ink[:, 1:] != ink[:, :-1]
+        vertical = np.zeros_like(ink)
+        vertical[1:, :] = ink[1:, :] != ink[:-1, :]
+
+        def density(mask):
+            return mask.reshape(rows, cell, cols, cell).mean(axis=(1, 3))
+
+        ink_density = density(ink)
+        text_cells = (
+            (density(horizontal) > 0.04) &
+            (density(vertical) > 0.04) &
+            (ink_density > 0.02) &
+            (ink_density < 0.6)
+        )
+
+        # Bridge the gaps between words on the same line
+        bridged = text_cells.copy()
+        bridged[:, 1:] |= text_cells[:, :-1]
+        bridged[:, :-1] |= text_cells[:, 1:]
+
+        boxes = []
+        visited = np.zeros_like(bridged)
+        for r, c in zip(*np.nonzero(bridged)):
+            if visited[r, c]:
+                continue
+            visited[r, c] = True
+            stack = [(r, c)]
+            top, left, bottom, right = r, c, r, c
+            size = 0
+            while stack:
+                y, x = stack.pop()
+                size += 1
+                top, left = min(top, y), min(left, x)
+                bottom, right = max(bottom, y), max(right, x)
+                for ny in (y - 1, y, y + 1):
+                    for nx in (x - 1, x, x + 1):
+                        if 0 <= ny < rows and 0 <= nx < cols and bridged[ny, nx] and not visited[ny, nx]:
+                            visited[ny, nx] = True
+                            stack.append((ny, nx))
+
+            # A lone cell is a symbol or a line crossing rather than text
+            if size < 3:
+                continue
+
+            # Back to full resolution, padded by one cell on each side
+            factor = cell / scale
+            boxes.append((
+                max(0, int((left - 1) * factor)),
+                max(0, int((top - 1) * factor)),
+                min(image.width, int((right + 2) * factor)),
+                min(image.height, int((bottom + 2) * factor)),
+            ))
+
+        self.logger.debug(f"Detected {len(boxes)} text regions")
+        return boxes
+
+    def _tile_boxes(self, width, height):
+        """Split the sheet into overlapping tiles"""
+        def starts(length):
+            step = max(1, self.tile_size - self.tile_overlap)
+            positions = list(range(0, max(length - self.tile_size, 0) + 1, step))
+            if positions[-1] + self.tile_size < length:
+                positions.append(length - self.tile_size)
+            return positions
+
+        return [
+            (x, y, min(x + self.tile_size, width), min(y + self.tile_size, height))
+            for y in starts(height)
+            for x in starts(width)
+        ]
+
+    def _order_boxes(self, boxes, image_size):
+        """
+        Sort boxes in reading order, putting the title block first
+
+        Args:
+            boxes (list): Bounding boxes (left, top, right, bottom)
+            image_size (tuple): (width, height) of the sheet
+
+        Returns:
+            list: Sorted bounding boxes
+        """
+        width, height = image_size
+        zone_x, zone_y = self.TITLE_BLOCK_ZONE
+        # Boxes whose tops are within the same band count as one line of layout
+        band = max(1, height // 50)
+
+        def key(box):
+            center_x = (box[0] + box[2]) / 2
+            center_y = (box[1] + box[3]) / 2
+            in_title_block = center_x >= width * zone_x and center_y >= height * zone_y
+            return (not in_title_block, box[1] // band, box[0])
+
+        return sorted(boxes, key=key)
+
     def _clean_text(self, text):
         """
         Clean and normalize extracted text
-        
+
         Args:
             text (str): Raw extracted text
-            
+
         Returns:
             str: Cleaned text
         """
         if not text:
             return ""
-        
+
         # Remove extra whitespace and normalize line breaks
         lines = []
         for line in text.split('\n'):
             line = line.strip()
             if line:  # Only add non-empty lines
                 lines.append(line)
-        
+
         # Join lines with single spaces, preserving paragraph breaks
         cleaned = '\n'.join(lines)
-        
+
         # Remove excessive whitespace
-        import re
         cleaned = re.sub(r'\s+', ' ', cleaned)
         cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
-        
+
         return cleaned.strip()
-    
+
     def is_tesseract_available(self):
         """
         Check if tesseract is available on the system
-        
+
         Returns:
             bool: True if tesseract is available
         """
-        try:
-            pytesseract.get_tesseract_version()
-            return True
-        except Exception:
-            return False
+        return self.engine.is_available()
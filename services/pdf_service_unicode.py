@@ -1,6 +1,6 @@
 import logging
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
@@ -8,89 +8,265 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import io
+import multiprocessing
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
 import os
 
-class PDFService:
-    """
-    PDF report generation service with full Unicode and Cyrillic support
-    Creates professional material analysis reports with proper font handling
+from werkzeug.utils import secure_filename
+
+from config import Config
+
+try:
+    import pypdf
+except ImportError:  # merging rendered parts is optional, see generate_combined_report
+    pypdf = None
+
+# Simple transliteration for basic Cyrillic characters, used with Helvetica.
+# Applied as chained str.replace calls: for Cyrillic input that measures faster
+# in CPython than str.translate or a regex, whose per-character lookups take
+# the slow path for non-ASCII text.
+CYRILLIC_TRANSLITERATION = tuple({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'zh',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo', 'Ж': 'Zh',
+    'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M', 'Н': 'N', 'О': 'O',
+    'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U', 'Ф': 'F', 'Х': 'Kh', 'Ц': 'Ts',
+    'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Shch', 'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya'
+}.items())
+
+# Problematic symbols replaced regardless of font, in a single regex pass.
+# Most paragraphs contain none of them, and then the pass is a plain scan.
+SYMBOL_REPLACEMENTS = {
+    'σ': 'sigma',
+    '°': ' grad',
+    '≥': '>=',
+    '≤': '<=',
+    'МПа': 'MPa',
+    'НВ': 'HB',
+    'Дж/см²': 'J/cm2',
+    '№': 'No.',
+    '–': '-',
+    '—': '-',
+    '“': '"',
+    '”': '"',
+    '‘': "'",
+    '’': "'",
+    'µ': 'mikro',
+    '•': '*',
+    '…': '...'
+}
+SYMBOL_PATTERN = re.compile('|'.join(
+    re.escape(symbol) for symbol in sorted(SYMBOL_REPLACEMENTS, key=len, reverse=True)
+))
+
+# Fonts and styles are process-wide: registered once, before gunicorn forks
+# when preload() is called from the master, and shared by every PDFService
+_warm_state = None
+_warm_lock = threading.Lock()
+
+
+def preload():
     """
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        self.styles = getSampleStyleSheet()
-        self._register_fonts()    # Setup Unicode fonts for proper text rendering
-        self._setup_styles()      # Configure custom styles for report sections
+    Register fonts and build paragraph styles once per process
     
-    def _register_fonts(self):
-        """
-        Register Unicode-compatible fonts for proper Cyrillic text rendering
-        DejaVu fonts provide comprehensive Unicode support including Russian characters
-        """
-        try:
-            # Attempt to register DejaVu fonts for full Unicode support
-            dejavu_path = '/usr/share/fonts/truetype/dejavu'
-            if os.path.exists(dejavu_path):
-                pdfmetrics.registerFont(TTFont('DejaVu', f'{dejavu_path}/DejaVuSans.ttf'))
-                pdfmetrics.registerFont(TTFont('DejaVu-Bold', f'{dejavu_path}/DejaVuSans-Bold.ttf'))
-                self.font_name = 'DejaVu'
-                self.font_bold = 'DejaVu-Bold'
-                self.logger.info("DejaVu fonts registered successfully")
-            else:
-                raise FileNotFoundError("DejaVu fonts not found")
-        except Exception as e:
-            self.logger.warning(f"Could not register DejaVu fonts: {e}")
-            # Fallback to standard Helvetica (limited Unicode support)
-            # Will trigger transliteration for Cyrillic text
-            self.font_name = 'Helvetica'
-            self.font_bold = 'Helvetica-Bold'
+    Returns:
+        dict: font_name, font_bold and the report paragraph styles
+    """
+    global _warm_state
+    with _warm_lock:
+        if _warm_state is None:
+            font_name, font_bold = _register_fonts()
+            _warm_state = dict(font_name=font_name, font_bold=font_bold, **_setup_styles(font_name, font_bold))
+        return _warm_state
+
+
+def _register_fonts():
+    """
+    Register Unicode-compatible fonts for proper Cyrillic text rendering
+    DejaVu fonts provide comprehensive Unicode support including Russian characters
     
-    def _setup_styles(self):
-        """Setup custom styles for PDF generation"""
+    Returns:
+        tuple: (regular font name, bold font name)
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        # Attempt to register DejaVu fonts for full Unicode support
+        dejavu_path = '/usr/share/fonts/truetype/dejavu'
+        if os.path.exists(dejavu_path):
+            pdfmetrics.registerFont(TTFont('DejaVu', f'{dejavu_path}/DejaVuSans.ttf'))
+            pdfmetrics.registerFont(TTFont('DejaVu-Bold', f'{dejavu_path}/DejaVuSans-Bold.ttf'))
+            logger.info("DejaVu fonts registered successfully")
+            return 'DejaVu', 'DejaVu-Bold'
+        else:
+            raise FileNotFoundError("DejaVu fonts not found")
+    except Exception as e:
+        logger.warning(f"Could not register DejaVu fonts: {e}")
+        # Fallback to standard Helvetica (limited Unicode support)
+        # Will trigger transliteration for Cyrillic text
+        return 'Helvetica', 'Helvetica-Bold'
+
+
+def _setup_styles(font_name, font_bold):
+    """Setup custom styles for PDF generation"""
+    styles = getSampleStyleSheet()
+    return dict(
         # Title style
-        self.title_style = ParagraphStyle(
+        title_style=ParagraphStyle(
             'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontName=self.font_bold,
+            parent=styles['Heading1'],
+            fontName=font_bold,
             fontSize=16,
             spaceAfter=20,
             alignment=TA_CENTER,
             textColor=colors.black
-        )
+        ),
         
         # Heading style
-        self.heading_style = ParagraphStyle(
+        heading_style=ParagraphStyle(
             'CustomHeading',
-            parent=self.styles['Heading2'],
-            fontName=self.font_bold,
+            parent=styles['Heading2'],
+            fontName=font_bold,
             fontSize=14,
             spaceAfter=12,
             spaceBefore=16,
             textColor=colors.black
-        )
+        ),
         
         # Normal text style
-        self.normal_style = ParagraphStyle(
+        normal_style=ParagraphStyle(
             'CustomNormal',
-            parent=self.styles['Normal'],
-            fontName=self.font_name,
+            parent=styles['Normal'],
+            fontName=font_name,
             fontSize=11,
             spaceAfter=6,
             alignment=TA_LEFT,
             textColor=colors.black
-        )
+        ),
         
         # List style
-        self.list_style = ParagraphStyle(
+        list_style=ParagraphStyle(
             'CustomList',
-            parent=self.styles['Normal'],
-            fontName=self.font_name,
+            parent=styles['Normal'],
+            fontName=font_name,
             fontSize=10,
             leftIndent=20,
             spaceAfter=4,
             textColor=colors.black
         )
+    )
+
+
+# Batch renders run in worker processes: ReportLab holds the GIL throughout
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def _get_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(
+                max_workers=Config.REPORT_BATCH_WORKERS or os.cpu_count(),
+                mp_context=multiprocessing.get_context(Config.REPORT_BATCH_START_METHOD),
+                initializer=preload
+            )
+        return _batch_pool
+
+
+def _discard_batch_pool(pool):
+    """Drop a broken pool so the next batch starts a fresh one"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_report(analysis, input_text, language):
+    """Render one report in a batch worker process"""
+    return PDFService().generate_report(analysis, input_text, language).getvalue()
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink that hands zipfile output over in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _LazyStory(list):
+    """
+    Flowable list that doc.build() drains while a generator refills it
+
+    build() takes flowables off the front of the list until len() is zero.
+    Refilling in __len__ keeps only a short look-ahead in memory, so laid out
+    paragraphs are released with their page instead of living until the end.
+    """
+    LOOKAHEAD = 32
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < self.LOOKAHEAD:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+
+class _CombinedDocTemplate(SimpleDocTemplate):
+    """Document template that records the first page of every part"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.part_pages = []
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Paragraph) and flowable.style.name == 'CustomTitle':
+            self.part_pages.append(self.page)
+
+
+class PDFService:
+    """
+    PDF report generation service with full Unicode and Cyrillic support
+    Creates professional material analysis reports with proper font handling
+    """
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        # Unicode fonts and report section styles, shared across the process
+        state = preload()
+        self.font_name = state['font_name']
+        self.font_bold = state['font_bold']
+        self.title_style = state['title_style']
+        self.heading_style = state['heading_style']
+        self.normal_style = state['normal_style']
+        self.list_style = state['list_style']
     
     def generate_report(self, analysis: Dict[str, Any], input_text: str, language: str = 'en') -> io.BytesIO:
         """Generate PDF report from analysis data"""
@@ -105,55 +281,267 @@ class PDFService:
                 bottomMargin=72
             )
             
-            story = []
-            
-            # Title
-            if language == 'ru':
-                title_text = "Отчет по анализу материалов" if self.font_name == 'DejaVu' else "Otchet po analizu materialov"
-            else:
-                title_text = "Material Analysis Report"
-            story.append(Paragraph(title_text, self.title_style))
-            story.append(Spacer(1, 20))
-            
-            # Date
-            date_text = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            if language == 'ru':
-                if self.font_name == 'DejaVu':
-                    date_text = f"Создано: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
-                else:
-                    date_text = f"Sozdano: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
-            story.append(Paragraph(date_text, self.normal_style))
-            story.append(Spacer(1, 20))
-            
-            # Input data
-            if language == 'ru':
-                input_title = "Исходные данные" if self.font_name == 'DejaVu' else "Iskhodnye dannye"
-            else:
-                input_title = "Input Data"
-            story.append(Paragraph(input_title, self.heading_style))
+            doc.build(_LazyStory(self._iter_story(analysis, input_text, language)))
+            buffer.seek(0)
+            return buffer
             
-            clean_input = self._clean_text(input_text[:500] + "..." if len(input_text) > 500 else input_text)
-            story.append(Paragraph(clean_input, self.normal_style))
-            story.append(Spacer(1, 15))
+        except Exception as e:
+            self.logger.error(f"Error generating PDF: {str(e)}")
+            raise
+    
+    def iter_reports(self, reports: Iterable[Dict[str, Any]], max_workers: int = None) -> Iterator[Tuple[int, bytes]]:
+        """
+        Render many reports across the batch process pool
+        
+        Reports come back in input order. Only max_workers renders are in
+        flight at a time, so a large batch never holds more than that many
+        finished PDFs in memory.
+        
+        Args:
+            reports (iterable): Stored analyses with 'analysis', 'input_text' and 'language'
+            max_workers (int): Renders in flight (defaults to REPORT_BATCH_WORKERS or the CPU count)
             
-            # Analysis sections
-            sections = self._get_sections(language)
+        Yields:
+            tuple: (index, PDF bytes)
+        """
+        window = max_workers or Config.REPORT_BATCH_WORKERS or os.cpu_count() or 1
+        
+        if window == 1:
+            for index, report in enumerate(reports):
+                yield index, self.generate_report(*self._report_args(report)).getvalue()
+            return
+        
+        pool = _get_batch_pool()
+        pending = deque()
+        try:
+            for index, report in enumerate(reports):
+                pending.append((index, pool.submit(_render_report, *self._report_args(report))))
+                if len(pending) >= window:
+                    index, future = pending.popleft()
+                    yield index, future.result()
+            while pending:
+                index, future = pending.popleft()
+                yield index, future.result()
+        except BrokenProcessPool:
+            self.logger.error("PDF batch worker died, restarting the pool on the next batch")
+            _discard_batch_pool(pool)
+            raise
+        finally:
+            for _index, future in pending:
+                future.cancel()
+    
+    def generate_zip(self, reports: Iterable[Dict[str, Any]], max_workers: int = None) -> Iterator[bytes]:
+        """
+        Render reports into a ZIP archive, one PDF per analysis
+        
+        The archive is produced as it is rendered, suitable for a streamed
+        response body; each PDF is written out and dropped before the next
+        one is taken.
+        
+        Args:
+            reports (iterable): Stored analyses, optionally with a 'title' for the file name
+            max_workers (int): Renders in flight
             
-            for section_key, section_title in sections.items():
-                if section_key in analysis:
-                    story.append(Paragraph(section_title, self.heading_style))
-                    content = self._format_content(analysis[section_key])
-                    story.extend(content)
-                    story.append(Spacer(1, 15))
+        Yields:
+            bytes: Consecutive chunks of the ZIP file
+        """
+        reports = list(reports)
+        stream = _ZipStream()
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for index, pdf in self.iter_reports(reports, max_workers):
+                archive.writestr(self._report_filename(reports[index], index), pdf)
+                yield stream.drain()
+        yield stream.drain()
+    
+    def generate_combined_report(self, reports: Iterable[Dict[str, Any]], language: str = 'en',
+                                 max_workers: int = None, output=None):
+        """
+        Merge the reports of many analyses into one PDF with a table of contents
+        
+        With pypdf installed and at most REPORT_MERGE_MAX_PARTS reports, the
+        parts are rendered across the process pool, spooled to temporary files
+        as they finish and then concatenated behind the contents page, with a
+        PDF outline entry per part. Otherwise the document is laid out in this
+        process from a lazily generated story, so only the compressed pages
+        accumulate, not the flowables.
+        
+        Args:
+            reports (iterable): Stored analyses, optionally with a 'title' for the contents
+            language (str): Language of the contents page
+            max_workers (int): Renders in flight
+            output: Writable binary file to receive the PDF (defaults to a new BytesIO)
             
-            doc.build(story)
-            buffer.seek(0)
-            return buffer
+        Returns:
+            The output file, positioned at the start when it is seekable
+        """
+        try:
+            reports = list(reports)
+            output = output if output is not None else io.BytesIO()
+            if pypdf is None or len(reports) > Config.REPORT_MERGE_MAX_PARTS:
+                self._build_combined_report(reports, language, output)
+            else:
+                self._merge_combined_report(reports, language, max_workers, output)
             
+            if output.seekable():
+                output.seek(0)
+            return output
+                    
         except Exception as e:
-            self.logger.error(f"Error generating PDF: {str(e)}")
+            self.logger.error(f"Error generating combined PDF: {str(e)}")
             raise
     
+    def _merge_combined_report(self, reports: List[Dict[str, Any]], language: str, max_workers: int, output):
+        """Concatenate parts rendered across the process pool behind a contents page"""
+        titles = [self._report_title(report, index) for index, report in enumerate(reports)]
+        parts, page_counts = [], []
+        try:
+            for index, pdf in self.iter_reports(reports, max_workers):
+                part = tempfile.SpooledTemporaryFile(max_size=Config.REPORT_SPOOL_MAX_SIZE)
+                part.write(pdf)
+                part.seek(0)
+                parts.append(part)
+                page_counts.append(len(pypdf.PdfReader(part).pages))
+            
+            # The contents page length shifts the part page numbers
+            toc_pages = 1
+            while True:
+                first_pages = []
+                page = toc_pages + 1
+                for count in page_counts:
+                    first_pages.append(page)
+                    page += count
+                
+                toc = io.BytesIO()
+                self._combined_doc(toc).build(self._contents_story(titles, first_pages, language))
+                rendered_pages = len(pypdf.PdfReader(toc).pages)
+                if rendered_pages == toc_pages:
+                    break
+                toc_pages = rendered_pages
+            
+            writer = pypdf.PdfWriter()
+            writer.append(toc)
+            for title, part in zip(titles, parts):
+                part.seek(0)
+                start = len(writer.pages)
+                writer.append(part)
+                writer.add_outline_item(title, start)
+            writer.write(output)
+        finally:
+            for part in parts:
+                part.close()
+    
+    def _build_combined_report(self, reports: List[Dict[str, Any]], language: str, output, max_passes: int = 3):
+        """
+        Lay out the combined report in this process
+        
+        Part page numbers are only known after layout, so the document is built
+        again with the numbers from the previous pass until they settle, like
+        multiBuild() but regenerating the story instead of copying it.
+        """
+        titles = [self._report_title(report, index) for index, report in enumerate(reports)]
+        first_pages = [0] * len(reports)
+        
+        for _ in range(max_passes):
+            with tempfile.SpooledTemporaryFile(max_size=Config.REPORT_SPOOL_MAX_SIZE) as buffer:
+                doc = self._combined_doc(buffer)
+                doc.build(_LazyStory(self._iter_combined_story(reports, titles, first_pages, language)))
+                if doc.part_pages == first_pages:
+                    buffer.seek(0)
+                    shutil.copyfileobj(buffer, output)
+                    return
+                first_pages = doc.part_pages
+        
+        # Numbers still moving after max_passes: lay out once more with the last ones
+        self._combined_doc(output).build(_LazyStory(self._iter_combined_story(reports, titles, first_pages, language)))
+    
+    def _iter_combined_story(self, reports, titles, first_pages, language) -> Iterator:
+        yield from self._contents_story(titles, first_pages, language)
+        for index, report in enumerate(reports):
+            yield PageBreak()
+            story = self._iter_story(*self._report_args(report))
+            next(story)  # the part title replaces the report title
+            yield Paragraph(self._clean_text(titles[index]), self.title_style)
+            yield from story
+    
+    def _contents_story(self, titles, first_pages, language) -> list:
+        """Contents page listing each part with its first page in the combined PDF"""
+        story = [Paragraph(self._contents_title(language), self.heading_style)]
+        for title, page in zip(titles, first_pages):
+            story.append(Paragraph(f"{self._clean_text(title)} — {page}", self.normal_style))
+        return story
+    
+    @staticmethod
+    def _combined_doc(output):
+        return _CombinedDocTemplate(output, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    
+    def _contents_title(self, language: str) -> str:
+        if language == 'ru':
+            return "Содержание" if self.font_name == 'DejaVu' else "Soderzhanie"
+        return "Contents"
+    
+    @staticmethod
+    def _report_args(report):
+        return report['analysis'], report.get('input_text', ''), report.get('language', 'en')
+    
+    @staticmethod
+    def _report_title(report, index):
+        title = report.get('title') or report.get('input_text', '').strip().split('\n')[0][:80]
+        return title or f"Report {index + 1}"
+    
+    @staticmethod
+    def _report_filename(report, index):
+        # Archive names are ASCII: transliterate before secure_filename drops Cyrillic
+        name = PDFService._report_title(report, index)
+        for cyrillic, latin in CYRILLIC_TRANSLITERATION:
+            name = name.replace(cyrillic, latin)
+        name = secure_filename(name)[:60] or 'report'
+        return f"{index + 1:03d}_{name}.pdf"
+    
+    def _build_story(self, analysis: Dict[str, Any], input_text: str, language: str = 'en') -> list:
+        """Build the report flowables"""
+        return list(self._iter_story(analysis, input_text, language))
+    
+    def _iter_story(self, analysis: Dict[str, Any], input_text: str, language: str = 'en') -> Iterator:
+        """Generate the report flowables in document order; the title comes first"""
+        # Title
+        if language == 'ru':
+            title_text = "Отчет по анализу материалов" if self.font_name == 'DejaVu' else "Otchet po analizu materialov"
+        else:
+            title_text = "Material Analysis Report"
+        yield Paragraph(title_text, self.title_style)
+        yield Spacer(1, 20)
+        
+        # Date
+        date_text = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        if language == 'ru':
+            if self.font_name == 'DejaVu':
+                date_text = f"Создано: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
+            else:
+                date_text = f"Sozdano: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
+        yield Paragraph(date_text, self.normal_style)
+        yield Spacer(1, 20)
+        
+        # Input data
+        if language == 'ru':
+            input_title = "Исходные данные" if self.font_name == 'DejaVu' else "Iskhodnye dannye"
+        else:
+            input_title = "Input Data"
+        yield Paragraph(input_title, self.heading_style)
+        
+        clean_input = self._clean_text(input_text[:500] + "..." if len(input_text) > 500 else input_text)
+        yield Paragraph(clean_input, self.normal_style)
+        yield Spacer(1, 15)
+        
+        # Analysis sections
+        sections = self._get_sections(language)
+        
+        for section_key, section_title in sections.items():
+            if section_key in analysis:
+                yield Paragraph(section_title, self.heading_style)
+                content = self._format_content(analysis[section_key])
+                yield from content
+                yield Spacer(1, 15)
+    
     def _clean_text(self, text: str) -> str:
         """Clean text for safe PDF generation"""
         if not text:
@@ -163,46 +551,11 @@ class PDFService:
         
         # If using Helvetica font, transliterate Cyrillic
         if self.font_name == 'Helvetica':
-            # Simple transliteration for basic Cyrillic characters
-            cyrillic_map = {
-                'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'zh',
-                'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
-                'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts',
-                'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-                'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo', 'Ж': 'Zh',
-                'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M', 'Н': 'N', 'О': 'O',
-                'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U', 'Ф': 'F', 'Х': 'Kh', 'Ц': 'Ts',
-                'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Shch', 'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya'
-            }
-            
-            for cyrillic, latin in cyrillic_map.items():
+            for cyrillic, latin in CYRILLIC_TRANSLITERATION:
                 clean_text = clean_text.replace(cyrillic, latin)
         
         # Replace problematic symbols regardless of font
-        replacements = {
-            'σ': 'sigma',
-            '°': ' grad',
-            '≥': '>=',
-            '≤': '<=',
-            'МПа': 'MPa',
-            'НВ': 'HB',
-            'Дж/см²': 'J/cm2',
-            '№': 'No.',
-            '–': '-',
-            '—': '-',
-            '"': '"',
-            '"': '"',
-            ''': "'",
-            ''': "'",
-            'µ': 'mikro',
-            '•': '*',
-            '…': '...'
-        }
-        
-        for old, new in replacements.items():
-            clean_text = clean_text.replace(old, new)
-            
-        return clean_text
+        return SYMBOL_PATTERN.sub(lambda match: SYMBOL_REPLACEMENTS[match.group(0)], clean_text)
     
     def _format_content(self, data) -> list:
         """Format content for PDF"""
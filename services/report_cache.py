@@ -0,0 +1,133 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from config import Config
+from utils.metrics import span
+
+
+class ReportCache:
+    """
+    Background PDF rendering with an LRU cache of rendered reports
+
+    Rendering is started as soon as an analysis is stored, so the download
+    usually finds the finished bytes. All renders go through one small pool,
+    which also keeps ReportLab off the request threads. With a shared KV
+    store, finished reports are also published there, so a download that
+    lands on another worker or instance does not render again.
+    """
+
+    def __init__(self, pdf_service, max_entries=None, max_workers=None, shared=None):
+        self.logger = logging.getLogger(__name__)
+        self.pdf_service = pdf_service
+        self.max_entries = max_entries if max_entries is not None else Config.REPORT_CACHE_SIZE
+        self.max_workers = max_workers or Config.REPORT_RENDER_WORKERS
+        self.shared = shared
+
+        self._reports = OrderedDict()  # (analysis_id, language) -> Future of PDF bytes
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, analysis_id: str, analysis_data: Dict[str, Any]):
+        """
+        Start rendering the report of an analysis unless it is already cached
+
+        Args:
+            analysis_id (str): Analysis identifier
+            analysis_data (dict): Stored analysis with 'analysis', 'input_text' and 'language'
+
+        Returns:
+            Future: Resolves to the PDF bytes
+        """
+        key = (analysis_id, analysis_data.get('language', 'en'))
+        with self._lock:
+            future = self._reports.get(key)
+            if future is not None:
+                self._reports.move_to_end(key)
+                return future
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report')
+
+            future = self._executor.submit(self._render, key, analysis_data)
+            self._reports[key] = future
+            while len(self._reports) > self.max_entries:
+                self._reports.popitem(last=False)
+            return future
+
+    def get(self, analysis_id: str, language: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Get a rendered report, waiting for an in-flight render
+
+        Args:
+            analysis_id (str): Analysis identifier
+            language (str): Report language
+            timeout (float): Seconds to wait for an in-flight render (defaults to REPORT_RENDER_TIMEOUT)
+
+        Returns:
+            bytes: PDF content, or None if the report was never submitted here
+            or in the shared store, or was evicted
+
+        Raises:
+            Exception: If rendering failed or timed out
+        """
+        with self._lock:
+            future = self._reports.get((analysis_id, language))
+            if future is not None:
+                self._reports.move_to_end((analysis_id, language))
+
+        if future is None:
+            return self.shared.get(self._shared_key((analysis_id, language))) if self.shared else None
+
+        return future.result(timeout=timeout if timeout is not None else Config.REPORT_RENDER_TIMEOUT)
+
+    def render(self, analysis_id: str, analysis_data: Dict[str, Any], timeout: Optional[float] = None) -> bytes:
+        """
+        Get a report, rendering it now if it is not cached
+
+        Args:
+            analysis_id (str): Analysis identifier
+            analysis_data (dict): Stored analysis with 'analysis', 'input_text' and 'language'
+            timeout (float): Seconds to wait for the render (defaults to REPORT_RENDER_TIMEOUT)
+
+        Returns:
+            bytes: PDF content
+        """
+        future = self.submit(analysis_id, analysis_data)
+        return future.result(timeout=timeout if timeout is not None else Config.REPORT_RENDER_TIMEOUT)
+
+    def discard(self, analysis_id: str):
+        """Drop all locally cached reports of an analysis"""
+        with self._lock:
+            for key in [key for key in self._reports if key[0] == analysis_id]:
+                del self._reports[key]
+
+    @staticmethod
+    def _shared_key(key):
+        return f"report:{key[0]}:{key[1]}"
+
+    def _render(self, key, analysis_data):
+        try:
+            if self.shared is not None:
+                pdf_bytes = self.shared.get(self._shared_key(key))
+                if pdf_bytes is not None:
+                    return pdf_bytes
+
+            with span('pdf_build'):
+                buffer = self.pdf_service.generate_report(
+                    analysis_data['analysis'],
+                    analysis_data.get('input_text', ''),
+                    key[1]
+                )
+            self.logger.info(f"Pre-rendered PDF report {key[0]} ({key[1]})")
+            pdf_bytes = buffer.getvalue()
+            if self.shared is not None:
+                self.shared.set(self._shared_key(key), pdf_bytes, Config.ANALYSIS_TTL)
+            return pdf_bytes
+        except Exception:
+            # Let the next request retry instead of caching the failure
+            with self._lock:
+                self._reports.pop(key, None)
+            raise
@@ -1,17 +1,20 @@
 import logging
 import numpy as np
 import faiss
-import requests
 import json
 import os
 from typing import List, Dict, Any, Optional
 import pickle
 
+from config import Config
+from utils.cassette import http_session
+
 class VectorService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.api_key = os.environ.get('AITUNNEL_API_KEY', 'default-key')
-        self.embeddings_url = "https://api.aitunnel.ai/v1/embeddings"
+        self.embeddings_url = f"{Config.AITUNNEL_BASE_URL.rstrip('/')}/embeddings"
+        self.http = http_session()
         
         # Initialize Faiss index
         self.dimension = 1536  # Common embedding dimension
@@ -103,7 +106,7 @@ class VectorService:
                 "model": "text-embedding-ada-002"
             }
             
-            response = requests.post(self.embeddings_url, headers=headers, json=payload, timeout=30)
+            response = self.http.post(self.embeddings_url, headers=headers, json=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
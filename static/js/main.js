@@ -7,7 +7,7 @@ const MaterialApp = {
     // Configuration
     config: {
         maxFileSize: 16 * 1024 * 1024, // 16MB
-        allowedTypes: ['image/png', 'image/jpeg', 'image/jpg'],
+        allowedTypes: ['image/png', 'image/jpeg', 'image/jpg', 'image/tiff', 'application/pdf'],
         uploadTimeout: 60000 // 60 seconds
     },
 
@@ -147,7 +147,7 @@ const MaterialApp = {
 
         // Check file type
         if (!this.config.allowedTypes.includes(file.type)) {
-            this.showAlert('error', 'Please upload PNG or JPEG files only');
+            this.showAlert('error', 'Please upload PNG, JPEG, TIFF or PDF files only');
             return false;
         }
 
@@ -332,7 +332,7 @@ const MaterialApp = {
         // Add tooltips to form elements
         const elementsWithTooltips = [
             { selector: '#description', title: 'Provide detailed technical specifications and requirements' },
-            { selector: '#drawing', title: 'Upload PNG or JPEG files up to 16MB' }
+            { selector: '#drawing', title: 'Upload PNG, JPEG, TIFF or PDF files up to 16MB' }
         ];
 
         elementsWithTooltips.forEach(({ selector, title }) => {
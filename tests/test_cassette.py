@@ -0,0 +1,55 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from utils.cassette import Cassette, CassetteTransport
+
+COMPLETION = {"choices": [{"message": {"content": "{}"}}], "usage": {"prompt_tokens": 1}}
+
+
+def gzip_upstream(calls):
+    def handler(request):
+        calls.append(request)
+        body = gzip.compress(json.dumps(COMPLETION).encode('utf-8'))
+        return httpx.Response(200, headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip',
+                                            'Content-Length': str(len(body))}, content=body)
+    return httpx.MockTransport(handler)
+
+
+async def post(transport):
+    async with httpx.AsyncClient(transport=transport, base_url='https://openrouter.ai/api/v1') as client:
+        return await client.post('/chat/completions', json={'model': 'm', 'messages': []})
+
+
+def test_async_transport_records_and_replays_gzip_response(tmp_path):
+    calls = []
+
+    recording = CassetteTransport(Cassette(str(tmp_path), 'record'), gzip_upstream(calls))
+    response = asyncio.run(post(recording))
+    assert response.status_code == 200
+    assert response.json() == COMPLETION
+    assert 'content-encoding' not in response.headers
+    assert len(calls) == 1
+
+    replaying = CassetteTransport(Cassette(str(tmp_path), 'strict'), gzip_upstream(calls))
+    response = asyncio.run(post(replaying))
+    assert response.status_code == 200
+    assert response.json() == COMPLETION
+    assert len(calls) == 1
+
+
+def test_error_responses_are_not_recorded(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, json={'error': {'message': 'rate limited'}})
+
+    response = asyncio.run(post(CassetteTransport(Cassette(str(tmp_path), 'replay'), httpx.MockTransport(handler))))
+    assert response.status_code == 429
+    assert list(tmp_path.iterdir()) == []
+
+    asyncio.run(post(CassetteTransport(Cassette(str(tmp_path), 'replay'), httpx.MockTransport(handler))))
+    assert len(calls) == 2
@@ -0,0 +1,347 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+# Lower value is served first
+PRIORITIES = {'interactive': 0, 'batch': 1}
+
+# Set by the ASGI adapter on requests it has already admitted
+ADMITTED_ENVIRON_KEY = 'admission.admitted'
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away instead of queued"""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status  # 429 (client over its rate) or 503 (server busy)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    Per-client token buckets
+
+    Each client gets `burst` tokens, refilled at rate_per_minute. Only the
+    most recently seen max_clients buckets are kept.
+    """
+
+    def __init__(self, rate_per_minute, burst, max_clients=10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+
+    def take(self, client, now=None):
+        """
+        Take a token for a client
+
+        Returns:
+            float: 0 if a token was taken, else seconds until one is available
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        now = now if now is not None else time.monotonic()
+        tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'ticket', 'wake', 'granted', 'cancelled', 'snapshot')
+
+    def __init__(self, priority, seq, ticket, wake):
+        self.priority = priority
+        self.seq = seq
+        self.ticket = ticket
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+        self.snapshot = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded priority queue in front of an endpoint
+
+    At most max_active requests run at once. Up to max_queue more wait, batch
+    behind interactive and first come first served within a priority, for
+    at most max_wait seconds. Anything beyond that is rejected at once with
+    503 and a Retry-After estimated from the queue depth and the observed
+    service time. Requests over their client's rate get 429 instead.
+    Works for threads (admit) and asyncio tasks (admit_async) alike; the
+    limits apply per process.
+
+    With a shared store, the order of the waiting tickets is published there
+    whenever the queue changes, so status() finds a ticket's position from any
+    worker, not just the one it waits in.
+    """
+
+    # Weight of the newest sample in the service time average
+    SERVICE_TIME_ALPHA = 0.2
+
+    def __init__(self, name, max_active, max_queue, max_wait, rate_per_minute=0, burst=1, store=None):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.store = store  # KVStore the waiting tickets are published to, or None
+        self.max_active = max(1, max_active)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.buckets = TokenBucket(rate_per_minute, burst)
+
+        self.active = 0
+        self.waiting = 0
+        self.service_time = None  # seconds, moving average
+        self._queue = []  # heap of _Waiter, cancelled ones are skipped lazily
+        self._tickets = {}  # ticket -> waiting _Waiter
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._version = 0  # bumped on every queue change, so late snapshots are not published
+        self._published = 0
+        self._publish_lock = threading.Lock()
+        self._counters = {'admitted': 0, 'queued': 0, 'rejected_rate': 0, 'rejected_busy': 0, 'timed_out': 0}
+
+    def _estimate_wait(self, position):
+        """Seconds until the request at this queue position (1-based) starts"""
+        return math.ceil(position / self.max_active) * (self.service_time or 1.0)
+
+    def _reject(self, status, retry_after, reason):
+        self._counters['rejected_rate' if status == 429 else 'rejected_busy'] += 1
+        self.logger.info(f"Rejected {self.name} request ({reason}), retry after {retry_after:.0f}s")
+        raise AdmissionRejected(status, retry_after, reason)
+
+    def _snapshot(self):
+        """Queue state to publish; caller holds the lock"""
+        if self.store is None:
+            return None
+        self._version += 1
+        return self._version, {
+            'tickets': [waiter.ticket for waiter in sorted(self._queue) if not waiter.cancelled and waiter.ticket],
+            'waiting': self.waiting,
+            'active': self.active,
+            'max_active': self.max_active,
+            'service_time': self.service_time,
+        }
+
+    def _worker(self):
+        # Read on every use: gunicorn workers fork after the controller is built
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _publish(self, snapshot, ticket=None):
+        """Write a queue snapshot, and which worker holds a new ticket, to the shared store"""
+        if snapshot is None:
+            return
+        version, state = snapshot
+        ttl = int(self.max_wait) + 60
+        with self._publish_lock:
+            if ticket:
+                self.store.set(f"admission:{self.name}:ticket:{ticket}", self._worker().encode('utf-8'), ttl)
+            if version > self._published:
+                self._published = version
+                self.store.set_json(f"admission:{self.name}:queue:{self._worker()}", state, ttl)
+
+    def _enter(self, client, priority, ticket, wake):
+        """Admit, queue or reject a request; returns its _Waiter if it has to wait"""
+        waiter = self._queue_or_admit(client, priority, ticket, wake)
+        if waiter is not None:
+            self._publish(waiter.snapshot, ticket)
+        return waiter
+
+    def _queue_or_admit(self, client, priority, ticket, wake):
+        with self._lock:
+            queue_free = self.active < self.max_active and self.waiting == 0
+            if not queue_free:
+                position = self.waiting + 1
+                if self.waiting >= self.max_queue:
+                    self._reject(503, self._estimate_wait(position), 'queue full')
+                if self.service_time is not None and self._estimate_wait(position) > self.max_wait:
+                    self._reject(503, self._estimate_wait(position), 'queue too slow')
+
+            if client is not None:
+                retry_after = self.buckets.take(client)
+                if retry_after:
+                    self._reject(429, retry_after, 'rate limit')
+
+            if queue_free:
+                self.active += 1
+                self._counters['admitted'] += 1
+                return None
+
+            waiter = _Waiter(priority, next(self._seq), ticket, wake)
+            heapq.heappush(self._queue, waiter)
+            self.waiting += 1
+            self._counters['queued'] += 1
+            if ticket:
+                self._tickets[ticket] = waiter
+            waiter.snapshot = self._snapshot()
+            return waiter
+
+    def _abandon(self, waiter):
+        """
+        Give up waiting
+
+        Returns:
+            bool: True if the slot was granted in the meantime and must be used
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+            self.waiting -= 1
+            self._counters['timed_out'] += 1
+            self._tickets.pop(waiter.ticket, None)
+            snapshot = self._snapshot()
+        self._publish(snapshot)
+        return False
+
+    def _release(self, elapsed):
+        snapshot = None
+        with self._lock:
+            if elapsed is None:
+                pass  # slot given back unused
+            elif self.service_time is None:
+                self.service_time = elapsed
+            else:
+                self.service_time += self.SERVICE_TIME_ALPHA * (elapsed - self.service_time)
+
+            # Hand the slot straight to the next waiter
+            while self._queue:
+                waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self.waiting -= 1
+                self._counters['admitted'] += 1
+                self._tickets.pop(waiter.ticket, None)
+                waiter.wake()
+                snapshot = self._snapshot()
+                break
+            else:
+                self.active -= 1
+        self._publish(snapshot)
+
+    @contextmanager
+    def admit(self, client=None, priority=0, ticket=None):
+        """
+        Hold a slot for the duration of the block, waiting for one if needed
+
+        Args:
+            client (str): Rate limit key, None for no rate limit
+            priority (int): Value from PRIORITIES
+            ticket (str): Client-chosen id to look up the queue position with status()
+
+        Raises:
+            AdmissionRejected: When the request is not admitted
+        """
+        event = threading.Event()
+        waiter = self._enter(client, priority, ticket, event.set)
+        if waiter is not None and not event.wait(self.max_wait) and not self._abandon(waiter):
+            raise AdmissionRejected(503, self._estimate_wait(self.waiting + 1), 'wait timed out')
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def admit_async(self, client=None, priority=0, ticket=None):
+        """admit() for asyncio tasks: waiting does not hold a thread"""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enter(client, priority, ticket, wake)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), self.max_wait)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    raise AdmissionRejected(503, self._estimate_wait(self.waiting + 1), 'wait timed out')
+            except BaseException:
+                # Client went away while waiting
+                if self._abandon(waiter):
+                    self._release(None)
+                raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def status(self, ticket=None):
+        """
+        Queue state, with the ticket's position while it is waiting
+
+        A ticket not waiting in this process is looked up in the shared store.
+
+        Returns:
+            dict: position (0 when not waiting), waiting, active and estimated_wait
+        """
+        with self._lock:
+            waiter = self._tickets.get(ticket) if ticket else None
+            position = 0
+            if waiter is not None:
+                position = 1 + sum(1 for other in self._queue if not other.cancelled and other < waiter)
+            local = {
+                'position': position,
+                'waiting': self.waiting,
+                'active': self.active,
+                'estimated_wait': round(self._estimate_wait(position or self.waiting + 1), 1),
+            }
+        if waiter is not None or not ticket or self.store is None:
+            return local
+        return self._shared_status(ticket) or local
+
+    def _shared_status(self, ticket):
+        """status() of a ticket waiting in another worker, or None"""
+        worker = self.store.get(f"admission:{self.name}:ticket:{ticket}")
+        if worker is None:
+            return None
+        state = self.store.get_json(f"admission:{self.name}:queue:{worker.decode('utf-8')}")
+        if not state or ticket not in state['tickets']:
+            return None
+        position = state['tickets'].index(ticket) + 1
+        return {
+            'position': position,
+            'waiting': state['waiting'],
+            'active': state['active'],
+            'estimated_wait': round(math.ceil(position / state['max_active']) * (state['service_time'] or 1.0), 1),
+        }
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'max_active': self.max_active,
+                'max_queue': self.max_queue,
+                'service_time': self.service_time,
+                **self._counters,
+            }
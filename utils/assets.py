@@ -0,0 +1,105 @@
+import json
+import logging
+import mimetypes
+import os
+import time
+
+from flask import request, send_from_directory
+
+from config import Config
+
+
+class AssetManifest:
+    """
+    Fingerprinted static assets built by build_assets.py
+
+    Registers a url_defaults hook, so url_for('static', filename='css/style.css')
+    in templates yields the hashed dist/ URL once a build exists, and replaces
+    the static view so hashed files are served precompressed (brotli or gzip,
+    whichever the client accepts) with immutable, long-lived cache headers.
+    Without a manifest everything falls back to Flask's plain static files.
+    """
+
+    # (Content-Encoding, file suffix) in order of preference
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, app, manifest_path=None, max_age=None, reload_interval=5.0):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.dist_dir = os.path.join(app.static_folder, 'dist')
+        self.manifest_path = manifest_path or os.path.join(self.dist_dir, 'manifest.json')
+        self.max_age = max_age if max_age is not None else Config.ASSET_MAX_AGE
+        self.reload_interval = reload_interval
+
+        self.urls = {}  # source path -> 'dist/<hashed path>'
+        self.files = {}  # hashed path -> available encodings
+        self._mtime = None
+        self._checked_at = 0.0
+        self.load()
+
+        self._send_static_file = app.view_functions['static']
+        app.view_functions['static'] = self.serve
+        app.url_defaults(self.url_defaults)
+
+    def load(self):
+        """(Re)read the manifest; a missing manifest disables fingerprinting"""
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            self.urls, self.files, self._mtime = {}, {}, None
+            return
+
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading asset manifest: {str(e)}")
+            return
+
+        # Files of earlier builds stay servable (the manifest only lists the
+        # latest ones), but are looked up on disk without precompression
+        self.urls = {source: 'dist/' + entry['file'] for source, entry in manifest.items()}
+        self.files = {entry['file']: tuple(entry.get('encodings', ())) for entry in manifest.values()}
+        self._mtime = mtime
+        self.logger.info(f"Loaded asset manifest with {len(manifest)} files")
+
+    def url_defaults(self, endpoint, values):
+        if endpoint != 'static' or self.app.debug:
+            return
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.load()
+
+        filename = values.get('filename')
+        hashed = self.urls.get(filename)
+        if hashed is not None:
+            values['filename'] = hashed
+
+    def serve(self, filename):
+        """Static view: hashed dist/ files get negotiated encodings and immutable caching"""
+        if not filename.startswith('dist/') or filename.endswith(('.gz', '.br')):
+            return self._send_static_file(filename=filename)
+
+        name = filename[len('dist/'):]
+        available = self.files.get(name, ())
+        encoding, suffix = None, ''
+        for candidate, candidate_suffix in self.ENCODINGS:
+            if candidate in available and request.accept_encodings[candidate]:
+                encoding, suffix = candidate, candidate_suffix
+                break
+
+        response = send_from_directory(
+            self.dist_dir, name + suffix,
+            mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            max_age=self.max_age
+        )
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        if available:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+try:
+    import httpx
+except ImportError:  # only needed by the ASGI entry point
+    httpx = None
+
+# CASSETTE_MODE values:
+#   record  every request goes to the API and its response is stored
+#   replay  stored responses are served, unknown requests go to the API and are stored
+#   strict  stored responses are served, unknown requests raise CassetteMiss
+MODES = ('record', 'replay', 'strict')
+
+# Headers describing the wire encoding of a body, dropped once it is decoded
+HOP_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class CassetteMiss(requests.ConnectionError):
+    """A request with no recorded response in strict mode"""
+
+
+def fingerprint(method, url, body):
+    """
+    Identity of a request for matching recordings
+
+    Covers the method, the URL path and query (not the host, so recordings
+    replay against any base URL) and the body, with JSON bodies normalized.
+    Headers, including the API key, are left out.
+
+    Returns:
+        str: Hex digest
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    body = body or b''
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode('utf-8')
+    except ValueError:
+        pass
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else '')
+    return hashlib.sha256(method.upper().encode('ascii') + b' ' + target.encode('utf-8') + b'\n' + body).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded API responses, one JSON file per request fingerprint
+
+    Files hold the request (without headers) for readability and the
+    response status, content type, body and original latency. They are
+    plain JSON, so they can be reviewed and committed as test fixtures.
+    """
+
+    def __init__(self, directory=None, mode=None, emulate_latency=None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory or Config.CASSETTE_DIR
+        self.mode = mode or Config.CASSETTE_MODE
+        self.emulate_latency = Config.CASSETTE_EMULATE_LATENCY if emulate_latency is None else emulate_latency
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+        self._entries = {}  # fingerprint -> entry, loaded on first use
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def lookup(self, method, url, body):
+        """
+        Recorded response for a request
+
+        Returns:
+            tuple: (fingerprint, entry dict or None); None is always returned in record mode
+
+        Raises:
+            CassetteMiss: In strict mode, when nothing is recorded for the request
+        """
+        key = fingerprint(method, url, body)
+        if self.mode == 'record':
+            return key, None
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                with self._lock:
+                    self._entries[key] = entry
+            except FileNotFoundError:
+                pass
+
+        if entry is None and self.mode == 'strict':
+            raise CassetteMiss(f"No recorded response for {method} {urlsplit(url).path} ({key[:12]})")
+        if entry is not None:
+            self.logger.debug(f"Replaying {method} {urlsplit(url).path} ({key[:12]})")
+        return key, entry
+
+    def store(self, key, method, url, body, status, content_type, content, elapsed):
+        """Save a live response under its request fingerprint; errors (429, 5xx, ...) are not kept"""
+        if not 200 <= status < 300:
+            self.logger.info(f"Not recording {method} {urlsplit(url).path}: status {status}")
+            return
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', errors='replace')
+        entry = {
+            'request': {'method': method.upper(), 'path': urlsplit(url).path, 'body': body},
+            'response': {
+                'status': status,
+                'content_type': content_type,
+                'body': content.decode('utf-8', errors='replace'),
+                'elapsed': round(elapsed, 4),
+            },
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, indent=1)
+            os.replace(path + '.tmp', path)
+            with self._lock:
+                self._entries[key] = entry
+            self.logger.info(f"Recorded {method} {urlsplit(url).path} ({key[:12]}, {elapsed:.2f}s)")
+        except Exception as e:
+            self.logger.error(f"Error recording response: {str(e)}")
+
+    def delay(self, entry):
+        """Seconds to hold a replayed response back"""
+        return entry['response'].get('elapsed', 0) if self.emulate_latency else 0
+
+
+class CassetteAdapter(HTTPAdapter):
+    """requests transport adapter that records to and replays from a Cassette"""
+
+    def __init__(self, cassette, **kwargs):
+        self.cassette = cassette
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        key, entry = self.cassette.lookup(request.method, request.url, request.body)
+        if entry is not None:
+            time.sleep(self.cassette.delay(entry))
+            recorded = entry['response']
+            response = requests.Response()
+            response.status_code = recorded['status']
+            response.headers['Content-Type'] = recorded.get('content_type') or 'application/json'
+            response._content = recorded['body'].encode('utf-8')
+            response.encoding = 'utf-8'
+            response.url = request.url
+            response.request = request
+            response.reason = 'Replayed'
+            return response
+
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        self.cassette.store(key, request.method, request.url, request.body, response.status_code,
+                            response.headers.get('Content-Type'), response.content, time.perf_counter() - started)
+        return response
+
+
+if httpx is not None:
+    class CassetteTransport(httpx.AsyncBaseTransport):
+        """httpx transport that records to and replays from a Cassette, for the async LLM client"""
+
+        def __init__(self, cassette, transport):
+            self.cassette = cassette
+            self.transport = transport
+
+        async def handle_async_request(self, request):
+            body = await request.aread()
+            try:
+                key, entry = self.cassette.lookup(request.method, str(request.url), body)
+            except CassetteMiss as e:
+                raise httpx.ConnectError(str(e), request=request)
+
+            if entry is not None:
+                await asyncio.sleep(self.cassette.delay(entry))
+                recorded = entry['response']
+                return httpx.Response(
+                    recorded['status'],
+                    headers={'Content-Type': recorded.get('content_type') or 'application/json'},
+                    content=recorded['body'].encode('utf-8'),
+                    request=request
+                )
+
+            started = time.perf_counter()
+            response = await self.transport.handle_async_request(request)
+            content = await response.aread()
+            await response.aclose()
+            self.cassette.store(key, request.method, str(request.url), body, response.status_code,
+                                response.headers.get('Content-Type'), content, time.perf_counter() - started)
+            # The content is already decoded; passing the framing headers on
+            # would make the client decode or length-check it a second time
+            headers = [(name, value) for name, value in response.headers.multi_items()
+                       if name.lower() not in HOP_HEADERS]
+            return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+        async def aclose(self):
+            await self.transport.aclose()
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """The process-wide Cassette, or None when CASSETTE_MODE is unset"""
+    global _cassette
+    if not Config.CASSETTE_MODE:
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette()
+            logging.getLogger(__name__).info(
+                f"API cassette in {_cassette.mode} mode at {_cassette.directory}"
+            )
+        return _cassette
+
+
+def http_session():
+    """
+    requests.Session for outgoing API calls, going through the cassette when enabled
+
+    Returns:
+        requests.Session: Session with keep-alive connections
+    """
+    session = requests.Session()
+    cassette = get_cassette()
+    if cassette is not None:
+        adapter = CassetteAdapter(cassette)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    return session
+
+
+def async_transport(**kwargs):
+    """
+    httpx transport for the async API client, going through the cassette when enabled
+
+    Args:
+        **kwargs: Passed to httpx.AsyncHTTPTransport (limits and so on)
+
+    Returns:
+        httpx.AsyncBaseTransport: Transport to hand to httpx.AsyncClient
+    """
+    transport = httpx.AsyncHTTPTransport(**kwargs)
+    cassette = get_cassette()
+    return CassetteTransport(cassette, transport) if cassette is not None else transport
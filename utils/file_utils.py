@@ -1,7 +1,173 @@
 import os
 import logging
+import hashlib
+import tempfile
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
-from flask import current_app
+from flask import current_app, Request
+
+from config import Config
+
+# Upload formats by magic bytes, with the extensions that accept them
+UPLOAD_FORMATS = {
+    'png': ('png',),
+    'jpeg': ('jpg', 'jpeg'),
+    'tiff': ('tif', 'tiff'),
+    'pdf': ('pdf',),
+}
+
+# An unrecognized upload is rejected once this many bytes have arrived
+# (a PDF header may follow up to 1 KB of leading junk)
+SIGNATURE_BYTES = 1024
+
+
+class UploadRejected(HTTPException):
+    """An upload refused while it was being received"""
+    
+    def __init__(self, code, reason, **params):
+        super().__init__(description=reason % params)
+        self.code = code
+        self.reason = reason
+        self.params = params
+    
+    def message(self):
+        """Reason in the language of the current request"""
+        from utils.i18n import gettext
+        return gettext(self.reason) % self.params
+
+
+def _jpeg_size(head):
+    """(width, height) from the first SOF segment of a JPEG, if it is within head"""
+    i = 2
+    while i + 9 <= len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # markers without a length
+            i += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(head[i + 7:i + 9], 'big'), int.from_bytes(head[i + 5:i + 7], 'big')
+        i += 2 + int.from_bytes(head[i + 2:i + 4], 'big')
+    return None
+
+
+def _tiff_size(head):
+    """(width, height) from the first IFD of a TIFF, if it is within head"""
+    order = 'little' if head[:2] == b'II' else 'big'
+    offset = int.from_bytes(head[4:8], order)
+    if offset + 2 > len(head):
+        return None
+    
+    count = int.from_bytes(head[offset:offset + 2], order)
+    tags = {}
+    for entry in range(offset + 2, min(offset + 2 + count * 12, len(head) - 11), 12):
+        tag = int.from_bytes(head[entry:entry + 2], order)
+        if tag in (256, 257):  # ImageWidth, ImageLength: SHORT or LONG
+            kind = int.from_bytes(head[entry + 2:entry + 4], order)
+            width = 2 if kind == 3 else 4
+            tags[tag] = int.from_bytes(head[entry + 8:entry + 8 + width], order)
+    if 256 in tags and 257 in tags:
+        return tags[256], tags[257]
+    return None
+
+
+def sniff_upload(head):
+    """
+    Identify an upload from its first bytes
+    
+    Args:
+        head (bytes): Beginning of the file
+        
+    Returns:
+        tuple: (format, (width, height) or None) with format a key of
+        UPLOAD_FORMATS, or (None, None) when the bytes match none of them
+    """
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(head) >= 24 and head[12:16] == b'IHDR':
+            return 'png', (int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big'))
+        return 'png', None
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg', _jpeg_size(head)
+    if head[:4] in (b'II*\x00', b'MM\x00*'):
+        return 'tiff', _tiff_size(head)
+    if b'%PDF-' in head[:SIGNATURE_BYTES]:
+        return 'pdf', None
+    return None, None
+
+
+class HashingSpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    Upload buffer that validates and hashes content as it is written
+    
+    Data stays in memory until it exceeds max_size, then rolls over to an
+    anonymous temporary file that is removed when the buffer is closed.
+    The format and pixel size are checked from the first bytes and the size
+    limit on every write, so a bad upload raises UploadRejected out of the
+    form parser before the rest of the request body is read.
+    """
+    
+    def __init__(self, max_size, validate=False):
+        super().__init__(max_size=max_size, mode='w+b')
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self._head = bytearray() if validate else None
+    
+    def write(self, s):
+        self.size += len(s)
+        if self.size > Config.UPLOAD_MAX_FILE_SIZE:
+            raise UploadRejected(413, 'The file is larger than %(limit)s MB.',
+                                 limit=Config.UPLOAD_MAX_FILE_SIZE // (1024 * 1024))
+        if self._head is not None:
+            self._head += s[:Config.UPLOAD_SNIFF_BYTES - len(self._head)]
+            self._validate(complete=False)
+        self._digest.update(s)
+        return super().write(s)
+    
+    def seek(self, *args):
+        # The form parser rewinds the buffer once the whole part has arrived
+        if self._head is not None:
+            self._validate(complete=True)
+        return super().seek(*args)
+    
+    def _validate(self, complete):
+        """Validate the head of the upload once there is enough of it"""
+        if complete and self.size == 0:
+            self._head = None  # empty file field, nothing was uploaded
+            return
+        
+        head = bytes(self._head)
+        enough = complete or len(head) >= Config.UPLOAD_SNIFF_BYTES
+        kind, dimensions = sniff_upload(head)
+        allowed = kind is not None and any(
+            extension in Config.ALLOWED_EXTENSIONS for extension in UPLOAD_FORMATS[kind]
+        )
+        if not allowed:
+            if enough or len(head) >= SIGNATURE_BYTES:
+                raise UploadRejected(415, 'The file is not a PNG, JPEG, TIFF or PDF document.')
+            return
+        
+        if dimensions is None and kind != 'pdf' and not enough:
+            return  # the header with the size may still be coming
+        if dimensions is not None and dimensions[0] * dimensions[1] > Config.UPLOAD_MAX_PIXELS:
+            raise UploadRejected(413, 'The drawing is too large: %(width)s × %(height)s pixels.',
+                                 width=dimensions[0], height=dimensions[1])
+        self._head = None
+    
+    def hexdigest(self):
+        """SHA-256 of everything written so far"""
+        return self._digest.hexdigest()
+
+
+class UploadRequest(Request):
+    """Request class that receives file uploads into validating HashingSpooledFile buffers"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingSpooledFile(max_size=Config.UPLOAD_SPOOL_MAX_SIZE, validate=bool(filename))
+
 
 def allowed_file(filename):
     """
@@ -69,12 +235,38 @@ def save_uploaded_file(file):
         logger.error(f"Error saving uploaded file: {str(e)}")
         raise
 
-def cleanup_temp_files(directory=None):
+def get_upload_hash(file):
     """
-    Clean up temporary files older than 1 hour
+    Get the SHA-256 of an uploaded file's content
+    
+    Args:
+        file: FileStorage object from Flask
+        
+    Returns:
+        str: Hex digest, computed while the upload was received when possible
+    """
+    stream = file.stream
+    if hasattr(stream, 'hexdigest'):
+        return stream.hexdigest()
+    
+    # Uploads that did not go through UploadRequest are hashed here
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def cleanup_temp_files(directory=None, max_age=3600):
+    """
+    Clean up temporary files older than max_age (one hour by default)
+    
+    The background Janitor (utils/janitor.py) runs this kind of cleanup on a
+    schedule with size quotas; this is the one-off variant.
     
     Args:
         directory (str): Directory to clean (defaults to upload folder)
+        max_age (int): Age in seconds past which files are removed
     """
     logger = logging.getLogger(__name__)
     
@@ -82,24 +274,19 @@ def cleanup_temp_files(directory=None):
         if directory is None:
             directory = current_app.config['UPLOAD_FOLDER']
         
-        if not os.path.exists(directory):
-            return
-        
         import time
+        from utils.janitor import scan_files
         current_time = time.time()
         
-        for filename in os.listdir(directory):
-            file_path = os.path.join(directory, filename)
-            
-            if os.path.isfile(file_path):
-                # Check if file is older than 1 hour (3600 seconds)
-                file_age = current_time - os.path.getmtime(file_path)
-                if file_age > 3600:
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Cleaned up old file: {file_path}")
-                    except Exception as e:
-                        logger.warning(f"Could not remove file {file_path}: {str(e)}")
+        for mtime, _size, file_path in scan_files(directory):
+            if current_time - mtime <= max_age:
+                # Oldest first, so everything after this is newer
+                break
+            try:
+                os.remove(file_path)
+                logger.info(f"Cleaned up old file: {file_path}")
+            except Exception as e:
+                logger.warning(f"Could not remove file {file_path}: {str(e)}")
                         
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}")
@@ -131,12 +318,17 @@ def validate_file_size(file, max_size_mb=16):
         bool: True if file size is acceptable
     """
     try:
+        max_size_bytes = max_size_mb * 1024 * 1024
+        
+        # Uploads received by UploadRequest were measured as they arrived
+        if hasattr(file.stream, 'hexdigest'):
+            return file.stream.size <= max_size_bytes
+        
         # Get file size by seeking to end
         file.seek(0, 2)  # Seek to end
         size = file.tell()
         file.seek(0)  # Reset to beginning
         
-        max_size_bytes = max_size_mb * 1024 * 1024
         return size <= max_size_bytes
         
     except Exception:
@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+import time
+from gettext import GNUTranslations
+
+from flask import g, render_template, request, session
+from markupsafe import Markup
+
+from config import Config
+
+
+class TranslationCatalogs:
+    """
+    Compiled gettext catalogs, loaded once per process
+
+    Each locale's messages.mo is read into a plain dict, so a lookup is a
+    single dict access. The files are stat()ed at most every reload_interval
+    seconds and reloaded when one changes; version is bumped on every reload
+    so anything rendered from the old catalogs can be invalidated.
+    """
+
+    def __init__(self, directory=None, locales=None, default_locale=None, domain='messages',
+                 reload_interval=None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory or Config.TRANSLATIONS_DIR
+        self.locales = list(locales or Config.LANGUAGES)
+        self.default_locale = default_locale or Config.BABEL_DEFAULT_LOCALE
+        self.domain = domain
+        self.reload_interval = reload_interval if reload_interval is not None else Config.TRANSLATIONS_RELOAD_INTERVAL
+
+        self.version = 0
+        self._catalogs = {}
+        self._mtimes = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def _path(self, locale):
+        return os.path.join(self.directory, locale, 'LC_MESSAGES', f'{self.domain}.mo')
+
+    def _mtime(self, locale):
+        try:
+            return os.stat(self._path(locale)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self, locale):
+        try:
+            with open(self._path(locale), 'rb') as f:
+                translations = GNUTranslations(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.error(f"Error loading {locale} translations: {str(e)}")
+            return None
+
+        # The '' entry is the catalog header, not a translation
+        return {msgid: msgstr for msgid, msgstr in translations._catalog.items()
+                if isinstance(msgid, str) and msgid and msgstr}
+
+    def load(self):
+        """(Re)load every locale's catalog; a catalog that fails to parse keeps its previous messages"""
+        with self._lock:
+            catalogs = dict(self._catalogs)
+            for locale in self.locales:
+                self._mtimes[locale] = self._mtime(locale)
+                messages = self._read(locale)
+                if messages is not None:
+                    catalogs[locale] = messages
+            self._catalogs = catalogs
+            self.version += 1
+            self._checked_at = time.monotonic()
+
+        self.logger.info(
+            "Loaded translations: " + ', '.join(f"{locale} ({len(messages)})" for locale, messages in catalogs.items())
+        )
+
+    def refresh(self):
+        """
+        Reload the catalogs if a .mo file changed since they were loaded
+
+        Returns:
+            bool: True if the catalogs were reloaded
+        """
+        if self.reload_interval <= 0 or time.monotonic() - self._checked_at < self.reload_interval:
+            return False
+
+        self._checked_at = time.monotonic()
+        if all(self._mtime(locale) == self._mtimes.get(locale) for locale in self.locales):
+            return False
+
+        self.logger.info("Translation catalogs changed, reloading")
+        self.load()
+        return True
+
+    def resolve(self, locale):
+        """Map a requested locale to one that has a catalog"""
+        return locale if locale in self._catalogs else self.default_locale
+
+    def translator(self, locale):
+        """
+        Get the translation function for a locale
+
+        Args:
+            locale (str): Locale code
+
+        Returns:
+            callable: text -> translated text, or the text itself when untranslated
+        """
+        lookup = self._catalogs.get(locale, {}).get
+
+        def translate(text):
+            return lookup(text, text)
+
+        return translate
+
+    def gettext(self, text, locale):
+        return self._catalogs.get(locale, {}).get(text, text)
+
+
+catalogs = TranslationCatalogs()
+
+
+def get_locale():
+    """
+    Locale of the current request, resolved once and kept on flask.g
+
+    The user's choice in the session wins, then the Accept-Language header.
+    """
+    locale = g.get('_locale')
+    if locale is None:
+        if 'language' in session:
+            locale = session['language']
+        else:
+            locale = request.accept_languages.best_match(catalogs.locales, default=catalogs.default_locale)
+        g._locale = locale
+    return locale
+
+
+def get_translator():
+    """Translation function for the current request's locale"""
+    translate = g.get('_translate')
+    if translate is None:
+        catalogs.refresh()
+        translate = g._translate = catalogs.translator(get_locale())
+    return translate
+
+
+def gettext(text):
+    """Translate text into the current request's locale"""
+    return get_translator()(text)
+
+
+class FragmentCache:
+    """
+    Rendered static template fragments, one copy per locale
+
+    A fragment is a template under templates/fragments/ whose output only
+    depends on the locale (translated strings and url_for links). It is
+    rendered the first time a locale needs it and served from memory after
+    that, until the translation catalogs are reloaded. Caching is bypassed
+    while Jinja auto-reloads templates, so edits show up during development.
+    """
+
+    def __init__(self, app, translations=None):
+        self.app = app
+        self.translations = translations or catalogs
+        self._fragments = {}
+        self._version = None
+
+    def render(self, name):
+        """
+        Get a rendered fragment for the current request's locale
+
+        Args:
+            name (str): Fragment name, e.g. 'footer' for templates/fragments/footer.html
+
+        Returns:
+            Markup: Rendered HTML
+        """
+        template = f'fragments/{name}.html'
+        if self.app.jinja_env.auto_reload:
+            return Markup(render_template(template))
+
+        get_translator()  # picks up reloaded catalogs before the version check
+        if self._version != self.translations.version:
+            self._fragments = {}
+            self._version = self.translations.version
+
+        key = (name, self.translations.resolve(get_locale()), request.script_root)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = self._fragments[key] = Markup(render_template(template))
+        return fragment
@@ -0,0 +1,255 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; every process then sweeps on its own
+    fcntl = None
+
+
+@dataclass
+class SweepRule:
+    """Quotas of one swept directory"""
+    path: str
+    max_age: Optional[float] = None  # seconds since last modification
+    max_bytes: Optional[int] = None  # total size of the files in the directory
+    min_age: float = 0  # files younger than this are never evicted for size or disk space
+
+
+def default_rules() -> List[SweepRule]:
+    """
+    Uploads and file analysis store directories with their configured quotas
+
+    Stored analyses are live state that /download_pdf reads back, so they
+    are only removed once expired, never evicted early.
+    """
+    return [
+        SweepRule(Config.UPLOAD_FOLDER, Config.JANITOR_UPLOADS_MAX_AGE, Config.JANITOR_UPLOADS_MAX_BYTES,
+                  Config.JANITOR_MIN_EVICT_AGE),
+        SweepRule(Config.ANALYSIS_STORE_DIR, Config.ANALYSIS_TTL, min_age=Config.ANALYSIS_TTL),
+    ]
+
+
+def scan_files(directory):
+    """
+    List the regular files of a directory in one scandir pass
+
+    Returns:
+        list: (mtime, size, path) tuples, oldest first
+    """
+    files = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    pass
+    except FileNotFoundError:
+        return []
+    files.sort()
+    return files
+
+
+class Janitor:
+    """
+    Background sweeper that keeps scratch directories within their quotas
+
+    Each sweep removes files past their directory's age limit, then the
+    oldest files of any directory over its size quota, and finally, if
+    JANITOR_MIN_FREE_BYTES is set, the oldest files across all directories
+    while free disk space is below it. Files younger than their rule's
+    min_age are never evicted. With several gunicorn workers the lock file
+    records when the last sweep ran, and a worker skips its round when
+    another one swept less than half an interval ago.
+    """
+
+    def __init__(self, rules=None, interval=None, min_free_bytes=None):
+        self.logger = logging.getLogger(__name__)
+        self.rules = rules if rules is not None else default_rules()
+        self.interval = interval if interval is not None else Config.JANITOR_INTERVAL
+        self.min_free_bytes = min_free_bytes if min_free_bytes is not None else Config.JANITOR_MIN_FREE_BYTES
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'sweeps': 0,
+            'files_removed': 0,
+            'bytes_reclaimed': 0,
+            'last_sweep_at': None,
+            'last_sweep_seconds': 0.0,
+            'last_bytes_reclaimed': 0,
+            'directories': {},
+        }
+
+    def start(self):
+        """Start the sweeper thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='janitor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                self.logger.error(f"Janitor sweep failed: {str(e)}")
+
+    def sweep(self) -> Optional[Dict[str, int]]:
+        """
+        Run one sweep over all directories
+
+        Returns:
+            dict: files_removed and bytes_reclaimed, or None if another process
+            is sweeping or swept recently
+        """
+        now = time.time()
+        lock = self._acquire_process_lock(now)
+        if lock is False:
+            return None
+
+        try:
+            start = time.perf_counter()
+            removed = reclaimed = 0
+            remaining = []
+            directories = {}
+
+            for rule in self.rules:
+                files = scan_files(rule.path)
+                kept = []
+                total = sum(size for _mtime, size, _path in files)
+
+                for mtime, size, path in files:
+                    expired = rule.max_age is not None and now - mtime > rule.max_age
+                    over_quota = (rule.max_bytes is not None and total > rule.max_bytes
+                                  and now - mtime >= rule.min_age)
+                    if (expired or over_quota) and self._remove(path):
+                        removed += 1
+                        reclaimed += size
+                        total -= size
+                    else:
+                        kept.append((mtime, size, path, rule))
+
+                directories[rule.path] = {'files': len(kept), 'bytes': total}
+                remaining.extend(kept)
+
+            # Under disk pressure the oldest evictable files go first, across directories
+            free = self._free_bytes() if self.min_free_bytes else None
+            if free is not None and free < self.min_free_bytes:
+                remaining.sort(key=lambda item: item[0])
+                for mtime, size, path, rule in remaining:
+                    if free >= self.min_free_bytes:
+                        break
+                    if now - mtime < rule.min_age:
+                        continue
+                    if self._remove(path):
+                        removed += 1
+                        reclaimed += size
+                        free += size
+                        directories[rule.path]['files'] -= 1
+                        directories[rule.path]['bytes'] -= size
+                self.logger.warning(f"Low disk space, {free} bytes free after evicting old files")
+
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stats['sweeps'] += 1
+                self.stats['files_removed'] += removed
+                self.stats['bytes_reclaimed'] += reclaimed
+                self.stats['last_sweep_at'] = now
+                self.stats['last_sweep_seconds'] = elapsed
+                self.stats['last_bytes_reclaimed'] = reclaimed
+                self.stats['directories'] = directories
+
+            if removed:
+                self.logger.info(f"Janitor removed {removed} files ({reclaimed} bytes) in {elapsed:.3f}s")
+            if lock:
+                lock.seek(0)
+                lock.truncate()
+                lock.write(str(now))
+                lock.flush()
+            return {'files_removed': removed, 'bytes_reclaimed': reclaimed}
+        finally:
+            if lock:
+                lock.close()
+
+    def metrics(self) -> Dict:
+        """Snapshot of the sweep counters"""
+        with self._lock:
+            return dict(self.stats, directories={path: dict(entry) for path, entry in self.stats['directories'].items()})
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self.logger.warning(f"Could not remove file {path}: {str(e)}")
+            return False
+
+    def _free_bytes(self):
+        for rule in self.rules:
+            if os.path.isdir(rule.path):
+                return shutil.disk_usage(rule.path).free
+        return None
+
+    def _acquire_process_lock(self, now):
+        """
+        Take the cross-process sweep lock
+
+        The lock file holds the time of the last sweep by any process; sweeps
+        take milliseconds, so holding the lock alone would let every worker
+        sweep in turn.
+
+        Args:
+            now (float): Time of this sweep
+
+        Returns:
+            The open lock file, None when locking is unavailable, or False if
+            another process holds the lock or swept less than half an
+            interval ago
+        """
+        if fcntl is None:
+            return None
+
+        lock_path = os.path.join(self.rules[0].path if self.rules else '.', '.janitor.lock')
+        try:
+            os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            lock = open(lock_path, 'a+')
+        except OSError:
+            return None
+
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+
+        lock.seek(0)
+        try:
+            last_sweep = float(lock.read() or 0)
+        except ValueError:
+            last_sweep = 0
+        if 0 <= now - last_sweep < self.interval / 2:
+            lock.close()
+            return False
+        return lock
@@ -0,0 +1,88 @@
+import secrets
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+from config import Config
+
+
+class KVSession(CallbackDict, SessionMixin):
+    """Session whose data lives in the KV store; the cookie only carries its id"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class KVSessionInterface(SessionInterface):
+    """
+    Server-side sessions in the shared KV store
+
+    Any worker or instance can read a session written by another one, and the
+    session is not limited to the 4KB a cookie can hold. The cookie value is
+    the signed session id.
+    """
+    serializer = TaggedJSONSerializer()
+    key_prefix = 'session:'
+
+    def __init__(self, store, ttl=None):
+        self.store = store
+        self.ttl = ttl if ttl is not None else Config.SESSION_TTL
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='kv-session')
+
+    def open_session(self, app, request):
+        signed = request.cookies.get(self.get_cookie_name(app))
+        if signed:
+            try:
+                sid = self._signer(app).unsign(signed).decode('ascii')
+            except BadSignature:
+                sid = None
+
+            if sid:
+                data = self.store.get(self.key_prefix + sid)
+                if data is not None:
+                    return KVSession(self.serializer.loads(data.decode('utf-8')), sid=sid)
+
+        return KVSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                self.store.delete(self.key_prefix + session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        self.store.set(
+            self.key_prefix + session.sid,
+            self.serializer.dumps(dict(session)).encode('utf-8'),
+            self.ttl
+        )
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid.encode('ascii')).decode('ascii'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
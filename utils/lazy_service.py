@@ -0,0 +1,50 @@
+import threading
+
+from utils import startup_profile
+
+
+class LazyService:
+    """
+    Proxy that constructs a service on first use
+
+    Attribute access is forwarded to the service, which is built at most once
+    even when several request threads reach it at the same time. Heavy imports
+    belong inside the factory so they are also deferred.
+    """
+
+    def __init__(self, name, factory):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def get(self):
+        """
+        Get the service, constructing it if needed
+
+        Returns:
+            The service instance
+        """
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    with startup_profile.timed(self._name):
+                        instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get(), name, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyService {self._name} ({state})>"
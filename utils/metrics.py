@@ -0,0 +1,483 @@
+import atexit
+import bisect
+import contextvars
+import hmac
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Metrics in the Prometheus text format, and per-request traces. Every worker
+# process counts in memory and writes a snapshot to a shared directory every
+# few seconds; /metrics answers with the snapshots of all workers merged, so
+# a scrape sees the same totals whichever worker answers it.
+
+PREFIX = 'materialmaster_'
+
+# Seconds; covers a cached page render up to a slow LLM call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Set by the ASGI adapter when it owns the trace of a request
+TRACE_ENVIRON_KEY = 'metrics.trace'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def family(self):
+        """Current values as a metric family dict, see Registry.families()"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return {'name': self.name, 'type': self.type, 'doc': self.documentation,
+                'samples': [[dict(zip(self.labelnames, key)), self._copy(value)] for key, value in items]}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def family(self):
+        return dict(super().family(), buckets=list(self.buckets))
+
+    @staticmethod
+    def _copy(value):
+        counts, total, count = value
+        return [list(counts), total, count]
+
+
+def _render(families):
+    """Prometheus text exposition of metric families"""
+    lines = []
+    for family in families:
+        name = family['name']
+        lines.append(f"# HELP {name} {family['doc']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in family['samples']:
+            if family['type'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(family['buckets'] + [math.inf], counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(labels.keys(), labels.values(), {'le': _format_value(float(bound))})
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels.keys(), labels.values())} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels.keys(), labels.values())} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    """
+    Combine the metric families of several processes
+
+    Counters and histograms are summed, including those of processes that
+    have exited, so totals never go down. Gauges are current state, so they
+    keep one sample per live process with a pid label.
+
+    Args:
+        snapshots (list): (pid, families) per process
+
+    Returns:
+        list: Merged metric families
+    """
+    merged = {}
+    for pid, families in snapshots:
+        alive = pid == os.getpid() or _pid_alive(pid)
+        for family in families:
+            if family['type'] == 'gauge':
+                if not alive:
+                    continue
+                samples = [[dict(labels, pid=str(pid)), value] for labels, value in family['samples']]
+            else:
+                samples = family['samples']
+
+            target = merged.setdefault(family['name'], dict(family, samples={}))
+            for labels, value in samples:
+                key = tuple(sorted(labels.items()))
+                previous = target['samples'].get(key)
+                if previous is None:
+                    target['samples'][key] = value
+                elif family['type'] == 'histogram':
+                    target['samples'][key] = [[a + b for a, b in zip(previous[0], value[0])],
+                                              previous[1] + value[1], previous[2] + value[2]]
+                else:
+                    target['samples'][key] = previous + value
+    return [dict(family, samples=[[dict(key), value] for key, value in sorted(family['samples'].items())])
+            for family in merged.values()]
+
+
+class Registry:
+    """Metrics of this process, plus collectors that report other components' state"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._snapshot_name = None  # (pid, file name) of this process's snapshot
+        self._flusher_pid = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        Add a callable that reports values read at scrape time
+
+        Args:
+            collector (callable): Returns an iterable of
+                (name, 'counter' or 'gauge', documentation, [(labels dict, value), ...])
+        """
+        self._collectors.append(collector)
+
+    def families(self):
+        """
+        Every metric and collector value of this process
+
+        Returns:
+            list: Dicts with name, type, doc, samples ([labels dict, value]
+            pairs; [bucket counts, sum, count] for histograms) and buckets
+        """
+        families = [metric.family() for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                for name, metric_type, documentation, samples in collector():
+                    families.append({
+                        'name': PREFIX + name, 'type': metric_type, 'doc': documentation,
+                        'samples': [[dict(labels), value] for labels, value in samples if value is not None],
+                    })
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"Metrics collector failed: {str(e)}")
+        return families
+
+    def expose(self, directory=None):
+        """
+        Render the metrics in the Prometheus text exposition format
+
+        Args:
+            directory (str): Shared snapshot directory; when given, the
+                snapshots of all processes are merged in
+
+        Returns:
+            str: Exposition text
+        """
+        if not directory:
+            return _render(self.families())
+
+        self.flush(directory)
+        snapshots = []
+        try:
+            names = [name for name in os.listdir(directory) if name.endswith('.json')]
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                snapshots.append((snapshot['pid'], snapshot['families']))
+            except (OSError, ValueError, KeyError):
+                continue
+        return _render(merge(snapshots))
+
+    def flush(self, directory):
+        """Write this process's snapshot to the shared directory"""
+        pid = os.getpid()
+        if self._snapshot_name is None or self._snapshot_name[0] != pid:
+            # A fresh name per process, so a reused pid never overwrites the
+            # counters of the process that had it before
+            self._snapshot_name = (pid, f"{pid}-{uuid.uuid4().hex[:8]}.json")
+        path = os.path.join(directory, self._snapshot_name[1])
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'pid': pid, 'families': self.families()}, f, separators=(',', ':'))
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not write metrics snapshot: {str(e)}")
+
+    def start_flushing(self, directory, interval):
+        """Flush every interval seconds and at exit, from the serving process (idempotent)"""
+        if not directory or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.flush(directory)
+
+        threading.Thread(target=run, name='metrics-flush', daemon=True).start()
+        atexit.register(self.flush, directory)
+
+
+def clear_directory(directory):
+    """Remove the snapshots of a previous run; called once before any worker starts"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.endswith(('.json', '.tmp')):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def check_token(value, secret):
+    """Constant-time comparison of a scrape token; always False while the secret is unset"""
+    return bool(secret) and bool(value) and hmac.compare_digest(value.encode('utf-8'), secret.encode('utf-8'))
+
+
+registry = Registry()
+
+REQUESTS = registry.counter('http_requests_total', 'HTTP requests by endpoint, method and status', ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = registry.histogram('http_request_duration_seconds', 'HTTP request latency', ('endpoint',))
+STAGE_SECONDS = registry.histogram('stage_duration_seconds', 'Latency of each stage of a request', ('endpoint', 'stage'))
+LLM_REQUESTS = registry.counter('llm_requests_total', 'Chat completion requests by outcome', ('model', 'status'))
+LLM_TOKENS = registry.counter('llm_tokens_total', 'Tokens reported in the completion usage field', ('model', 'kind'))
+
+
+class Trace:
+    """Stages of one request, timed by span()"""
+
+    def __init__(self, endpoint=None, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.spans = []  # (stage, seconds)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def summary(self, status=None):
+        """One-line JSON record of the request and its stages"""
+        return json.dumps({
+            'trace_id': self.trace_id,
+            'endpoint': self.endpoint,
+            'status': status,
+            'total_ms': round(self.elapsed() * 1000, 1),
+            'stages': [{'stage': stage, 'ms': round(seconds * 1000, 1)} for stage, seconds in self.spans],
+        })
+
+
+_current_trace = contextvars.ContextVar('trace', default=None)
+
+_TRACE_ID = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+
+def incoming_trace_id(value):
+    """Trace id from an X-Request-ID or W3C traceparent header, if it is well formed"""
+    if not value:
+        return None
+    if value.count('-') == 3 and len(value) == 55:  # traceparent: version-traceid-parentid-flags
+        value = value.split('-')[1]
+    return value if _TRACE_ID.match(value) else None
+
+
+def start_trace(endpoint=None, trace_id=None):
+    """
+    Make a new trace current in this context
+
+    Returns:
+        tuple: (Trace, token for end_trace)
+    """
+    trace = Trace(endpoint, trace_id)
+    return trace, _current_trace.set(trace)
+
+
+def use_trace(trace):
+    """Make an existing trace current, e.g. in an executor thread; returns a token for end_trace"""
+    return _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def add_span(stage, seconds):
+    """Record a stage duration measured by the caller"""
+    trace = _current_trace.get()
+    # Work outside a request (background renders, warm-up) is labelled 'background'
+    STAGE_SECONDS.observe(seconds, endpoint=(trace.endpoint if trace is not None else None) or 'background', stage=stage)
+    if trace is not None:
+        trace.spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a stage of the current request
+
+    The duration goes into the stage histogram and the request's trace.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(stage, time.perf_counter() - started)
+
+
+def observe_request(trace, method, status):
+    """Record a finished request and log its stage summary"""
+    endpoint = trace.endpoint or 'none'
+    REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    REQUEST_SECONDS.observe(trace.elapsed(), endpoint=endpoint)
+    if trace.spans:
+        logging.getLogger(__name__).info(f"Request trace {trace.summary(status)}")
+
+
+def record_llm_response(model, status, usage=None):
+    """Count a chat completion and the tokens from its usage field"""
+    LLM_REQUESTS.inc(model=model, status=status)
+    for kind in ('prompt', 'completion'):
+        tokens = (usage or {}).get(f'{kind}_tokens')
+        if isinstance(tokens, (int, float)):
+            LLM_TOKENS.inc(tokens, model=model, kind=kind)
+
+
+def install_log_trace_ids():
+    """Give every log record a trace_id attribute ('-' outside a request) for use in formats"""
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, 'adds_trace_id', False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.trace_id = current_trace_id() or '-'
+        return record
+
+    record_factory.adds_trace_id = True
+    logging.setLogRecordFactory(record_factory)
+
+
+def init_app(app):
+    """
+    Trace every Flask request: X-Request-ID in and out, request counters and
+    latency, and a JSON stage summary in the log for requests that had spans
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_trace():
+        if request.environ.get(TRACE_ENVIRON_KEY) is not None:
+            # The ASGI adapter started the trace and will finish it
+            g._trace_token = use_trace(request.environ[TRACE_ENVIRON_KEY])
+            return
+        endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+        trace_id = incoming_trace_id(request.headers.get('X-Request-ID') or request.headers.get('traceparent'))
+        g._trace, g._trace_token = start_trace(endpoint, trace_id)
+
+    @app.after_request
+    def _finish_request_trace(response):
+        trace = g.get('_trace') or current_trace()
+        if trace is not None:
+            response.headers['X-Request-ID'] = trace.trace_id
+        if g.get('_trace') is not None:
+            observe_request(g._trace, request.method, response.status_code)
+        return response
+
+    @app.teardown_request
+    def _end_request_trace(error=None):
+        token = g.pop('_trace_token', None)
+        if token is not None:
+            try:
+                end_trace(token)
+            except ValueError:
+                pass  # token from another context (the request was handed between threads)
@@ -0,0 +1,258 @@
+import cProfile
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
+from config import Config
+
+# Set on the WSGI environ of a request that is being profiled
+PROFILE_ENVIRON_KEY = 'profiling.active'
+
+MODES = ('cprofile', 'sample')
+PROFILE_NAME = re.compile(r'^[\w.-]+\.(pstats|speedscope\.json)$')
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread
+
+    A background thread records the target thread's stack every interval
+    seconds from sys._current_frames(). Cheaper than cProfile on deep call
+    trees such as the ReportLab layout loop, and the result opens as a flame
+    graph in speedscope.
+    """
+
+    def __init__(self, thread_id=None, interval=None):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval or Config.PROFILE_SAMPLE_INTERVAL
+        self._frames = {}  # (name, file, line) -> index
+        self._samples = []  # list of frame index stacks, root first
+        self._weights = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                index = self._frames.get(key)
+                if index is None:
+                    index = self._frames[key] = len(self._frames)
+                stack.append(index)
+                frame = frame.f_back
+            stack.reverse()
+
+            self._samples.append(stack)
+            self._weights.append(now - last)
+            last = now
+
+    def speedscope(self, name):
+        """
+        Samples in the speedscope file format
+
+        Returns:
+            dict: JSON-serializable speedscope document
+        """
+        frames = [None] * len(self._frames)
+        for (function, filename, line), index in self._frames.items():
+            frames[index] = {'name': function, 'file': filename, 'line': line}
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'materialmaster',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(self._weights),
+                'samples': self._samples,
+                'weights': self._weights,
+            }],
+        }
+
+
+class ProfileStore:
+    """
+    Bounded ring of profile files in a directory
+
+    File names carry the time, duration, method and path of the request, so
+    the directory listing is the index. Only the newest `keep` are kept.
+    """
+
+    def __init__(self, directory=None, keep=None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory or Config.PROFILE_DIR
+        self.keep = keep if keep is not None else Config.PROFILE_KEEP
+
+    def filename(self, method, path, seconds, profile_id, extension):
+        slug = re.sub(r'[^\w]+', '_', path.strip('/')) or 'index'
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        return f"{stamp}-{int(seconds * 1000)}ms-{method}-{slug[:40]}-{profile_id}.{extension}"
+
+    def write(self, name, write):
+        """
+        Write a profile, then drop the oldest beyond the ring size
+
+        Args:
+            name (str): File name from filename()
+            write (callable): Called with the target path
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        write(path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+        for stale in self.list()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, stale['name']))
+            except OSError:
+                pass
+        return path
+
+    def list(self):
+        """
+        Stored profiles, newest first
+
+        Returns:
+            list: dicts with name, size and created (epoch seconds)
+        """
+        try:
+            names = [name for name in os.listdir(self.directory) if PROFILE_NAME.match(name)]
+        except FileNotFoundError:
+            return []
+
+        profiles = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            profiles.append({'name': name, 'size': stat.st_size, 'created': stat.st_mtime})
+        return sorted(profiles, key=lambda profile: profile['created'], reverse=True)
+
+    def path(self, name):
+        """Path of a stored profile, or None for names that are not profiles"""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+def check_secret(value):
+    """Constant-time comparison against PROFILE_SECRET; always False while it is unset"""
+    secret = Config.PROFILE_SECRET
+    return bool(secret) and bool(value) and hmac.compare_digest(value.encode('utf-8'), secret.encode('utf-8'))
+
+
+def is_profiling(environ):
+    return bool(environ.get(PROFILE_ENVIRON_KEY))
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand
+
+    A request carrying the shared secret in an X-Profile header (or a
+    __profile query parameter) is run under cProfile (default, written as
+    .pstats) or the sampling profiler (X-Profile-Mode: sample or
+    __profile_mode=sample, written as speedscope JSON). The response body
+    is produced inside the profile and the response gets an X-Profile-Id
+    header naming the file. Other requests pass straight through.
+    """
+
+    def __init__(self, app, store=None):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.store = store or ProfileStore()
+
+    def _requested_mode(self, environ):
+        if environ.get('PATH_INFO', '').startswith('/profiles'):
+            return None  # the index and downloads themselves
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        secret = environ.get('HTTP_X_PROFILE') or query.get('__profile', [None])[0]
+        if not check_secret(secret):
+            return None
+        mode = (environ.get('HTTP_X_PROFILE_MODE') or query.get('__profile_mode', ['cprofile'])[0]).lower()
+        return mode if mode in MODES else 'cprofile'
+
+    def __call__(self, environ, start_response):
+        mode = self._requested_mode(environ)
+        if mode is None:
+            return self.app(environ, start_response)
+
+        profile_id = uuid.uuid4().hex[:12]
+        environ[PROFILE_ENVIRON_KEY] = True
+
+        def start_profiled_response(status, headers, exc_info=None):
+            return start_response(status, list(headers) + [('X-Profile-Id', profile_id)], exc_info)
+
+        started = time.perf_counter()
+        if mode == 'sample':
+            profiler = SamplingProfiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        try:
+            result = self.app(environ, start_profiled_response)
+            try:
+                body = list(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            if mode == 'sample':
+                profiler.stop()
+            else:
+                profiler.disable()
+            self._save(environ, mode, profiler, time.perf_counter() - started, profile_id)
+
+        return body
+
+    def _save(self, environ, mode, profiler, seconds, profile_id):
+        method, path = environ.get('REQUEST_METHOD', 'GET'), environ.get('PATH_INFO', '/')
+        try:
+            if mode == 'sample':
+                name = self.store.filename(method, path, seconds, profile_id, 'speedscope.json')
+                document = profiler.speedscope(f"{method} {path}")
+
+                def write(target):
+                    with open(target, 'w', encoding='utf-8') as f:
+                        json.dump(document, f, separators=(',', ':'))
+            else:
+                name = self.store.filename(method, path, seconds, profile_id, 'pstats')
+                write = profiler.dump_stats
+
+            self.store.write(name, write)
+            self.logger.info(f"Profiled {method} {path} ({mode}, {seconds * 1000:.0f} ms) -> {name}")
+        except Exception as e:
+            self.logger.error(f"Error saving profile of {method} {path}: {str(e)}")
@@ -0,0 +1,110 @@
+import builtins
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Startup profiling: import time per module and construction time per service.
+# Off unless enable() is called, which app.py does when STARTUP_PROFILE is set.
+
+_enabled = False
+_started_at = None
+_original_import = builtins.__import__
+_local = threading.local()
+_modules = {}  # module name -> [inclusive seconds, self seconds]
+_services = {}  # service name -> seconds
+_marks = []  # (label, seconds since enable)
+
+
+def enable():
+    """Start timing first imports of modules (idempotent)"""
+    global _enabled, _started_at
+    if _enabled:
+        return
+    _enabled = True
+    _started_at = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+
+def is_enabled():
+    return _enabled
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only the first, absolute import of a module does any work worth timing
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+
+    stack.append(0.0)  # time spent in nested first imports
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        _modules[name] = [elapsed, elapsed - nested]
+
+
+@contextmanager
+def timed(service_name):
+    """Record how long constructing a service takes"""
+    if not _enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _services[service_name] = time.perf_counter() - start
+        logging.getLogger(__name__).info(f"Constructed {service_name} service in {_services[service_name] * 1000:.1f} ms")
+
+
+def mark(label):
+    """Record a startup milestone, measured from enable()"""
+    if _enabled:
+        _marks.append((label, time.perf_counter() - _started_at))
+
+
+def report(path=None, top=25):
+    """
+    Log the slowest imports, service constructions and milestones
+
+    Args:
+        path (str): Also write the full profile to this JSON file
+        top (int): Number of modules to log
+
+    Returns:
+        dict: modules, services and marks
+    """
+    if not _enabled:
+        return None
+
+    logger = logging.getLogger(__name__)
+    profile = {
+        'modules': {name: {'seconds': seconds, 'self_seconds': own} for name, (seconds, own) in _modules.items()},
+        'services': dict(_services),
+        'marks': [{'label': label, 'seconds': seconds} for label, seconds in _marks],
+    }
+
+    lines = ["Startup profile (inclusive / self ms):"]
+    for name, (seconds, own) in sorted(_modules.items(), key=lambda item: item[1][1], reverse=True)[:top]:
+        lines.append(f"  import {name:40s} {seconds * 1000:8.1f} {own * 1000:8.1f}")
+    for name, seconds in _services.items():
+        lines.append(f"  service {name:39s} {seconds * 1000:8.1f}")
+    for label, seconds in _marks:
+        lines.append(f"  {label:47s} {seconds * 1000:8.1f}")
+    logger.info('\n'.join(lines))
+
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2)
+    return profile
@@ -0,0 +1,43 @@
+import math
+
+# Rough size of an LLM token. Cyrillic text tokenizes denser than English,
+# so the estimate errs on the side of more tokens.
+CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text):
+    """
+    Estimate how many LLM prompt tokens a text will take
+    
+    Args:
+        text (str): Prompt text
+        
+    Returns:
+        int: Approximate token count
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Cut text down to an approximate token budget on a word boundary
+    
+    Args:
+        text (str): Text to truncate
+        max_tokens (int): Token budget
+        
+    Returns:
+        str: Truncated text
+    """
+    if max_tokens <= 0:
+        return ""
+    
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    
+    cut = text[:max_chars]
+    space = cut.rfind(' ')
+    return cut[:space] if space > 0 else cut